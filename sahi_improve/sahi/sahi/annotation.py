@@ -1,16 +1,25 @@
 # OBSS SAHI Tool
 # Code written by Fatih C Akyon, 2020.
 
+import collections
 import copy
+import threading
 from typing import Dict, List, Optional
 
 import numpy as np
 
 from utils.coco import CocoAnnotation, CocoPrediction
 from utils.cv import (
-    get_bbox_from_bool_mask,
-    get_bool_mask_from_coco_segmentation,
     get_coco_segmentation_from_bool_mask,
+    get_cropped_bool_mask,
+    get_cropped_bool_mask_from_coco_segmentation,
+)
+from utils.rle import (
+    get_bool_mask_from_rle_counts,
+    get_rle_column_runs,
+    get_rle_counts_from_bool_mask,
+    get_rle_counts_from_column_runs,
+    get_rle_counts_from_string,
 )
 from utils.shapely import ShapelyAnnotation
 
@@ -21,6 +30,56 @@ try:
 except ImportError:
     use_rle = False
 
+# maximum total size of the decoded RLE crops that are kept in memory, in bytes
+MASK_DECODE_CACHE_SIZE = 2**27
+
+
+class _MaskDecodeCache:
+    """
+    Keeps the decoded crops of RLE masks in memory, and drops the least recently used ones once
+    their total size exceeds max_size_bytes. Crops are keyed by their RLE, so the masks that share
+    an encoded crop (e.g. a mask and its shifted mask) share the decoded crop as well.
+    """
+
+    def __init__(self, max_size_bytes: int = MASK_DECODE_CACHE_SIZE):
+        self.max_size_bytes = max_size_bytes
+        self.size_bytes = 0
+        self.num_hits = 0
+        self.num_misses = 0
+        self._crops = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def decode(self, rle: Dict) -> np.ndarray:
+        """Returns the decoded bool crop of rle, the crop is read only since it is shared."""
+        key = (bytes(rle["counts"]), tuple(rle["size"]))
+        with self._lock:
+            crop = self._crops.get(key)
+            if crop is not None:
+                self._crops.move_to_end(key)
+                self.num_hits += 1
+                return crop
+            self.num_misses += 1
+        crop = mask_utils.decode(rle).astype(bool)
+        crop.flags.writeable = False
+        if crop.nbytes <= self.max_size_bytes:
+            with self._lock:
+                if key not in self._crops:
+                    self._crops[key] = crop
+                    self.size_bytes += crop.nbytes
+                while self.size_bytes > self.max_size_bytes:
+                    _, evicted_crop = self._crops.popitem(last=False)
+                    self.size_bytes -= evicted_crop.nbytes
+        return crop
+
+    def clear(self):
+        """Drops all decoded crops."""
+        with self._lock:
+            self._crops.clear()
+            self.size_bytes = 0
+
+
+_mask_decode_cache = _MaskDecodeCache()
+
 
 class BoundingBox:
     """
@@ -171,13 +230,136 @@ class Mask:
         # confirm full_shape is given
         if full_shape is None:
             raise ValueError("full_shape must be provided")
-        bool_mask = get_bool_mask_from_coco_segmentation(segmentation, height=full_shape[0], width=full_shape[1])
-        return cls(
-            bool_mask=bool_mask,
-            shift_amount=shift_amount,
+        # only the bounding box region of the polygons is filled
+        cropped_bool_mask, crop_offset = get_cropped_bool_mask_from_coco_segmentation(
+            segmentation, height=full_shape[0], width=full_shape[1]
+        )
+        return cls.from_cropped_bool_mask(
+            cropped_bool_mask,
+            crop_offset=crop_offset,
+            shape=full_shape,
             full_shape=full_shape,
+            shift_amount=shift_amount,
         )
 
+    @classmethod
+    def from_cropped_bool_mask(
+        cls,
+        cropped_bool_mask,
+        crop_offset: List[int],
+        shape: List[int],
+        full_shape=None,
+        shift_amount: list = [0, 0],
+    ):
+        """
+        Init Mask from the crop of a boolean mask, without creating the full sized mask.
+
+        Args:
+            cropped_bool_mask: np.ndarray with bool elements
+                Crop of the 2D mask of object
+            crop_offset: List
+                Position of the crop in the mask, should be in the form of [x, y]
+            shape: List
+                Size of the mask, should be in the form of [height, width]
+            full_shape: List
+                Size of the full image, should be in the form of [height, width]
+            shift_amount: List
+                To shift the box and mask predictions from sliced image to full
+                sized image, should be in the form of [shift_x, shift_y]
+        """
+        mask = cls(bool_mask=None, full_shape=full_shape or shape, shift_amount=shift_amount)
+        mask._shape = [shape[0], shape[1]]
+        # crop the nonzero region of the crop as well
+        cropped_bool_mask, (crop_x, crop_y) = get_cropped_bool_mask(cropped_bool_mask)
+        mask._set_crop(cropped_bool_mask, [crop_offset[0] + crop_x, crop_offset[1] + crop_y])
+        return mask
+
+    @classmethod
+    def from_column_runs(
+        cls,
+        cols,
+        row_starts,
+        row_ends,
+        shape: List[int],
+        full_shape=None,
+        shift_amount: list = [0, 0],
+    ):
+        """
+        Init Mask from its column runs (see sahi.utils.rle), runs can overlap and the parts
+        outside the mask are dropped. RLE masks are encoded without creating a bool mask.
+
+        Args:
+            cols, row_starts, row_ends: np.ndarray
+                Column, first row and end row (exclusive) of each run
+            shape: List
+                Size of the mask, should be in the form of [height, width]
+            full_shape: List
+                Size of the full image, should be in the form of [height, width]
+            shift_amount: List
+                To shift the box and mask predictions from sliced image to full
+                sized image, should be in the form of [shift_x, shift_y]
+        """
+        height, width = shape
+        cols = np.asarray(cols, dtype=np.int64)
+        row_starts = np.maximum(row_starts, 0)
+        row_ends = np.minimum(row_ends, height)
+        inside = (cols >= 0) & (cols < width) & (row_ends > row_starts)
+        cols, row_starts, row_ends = cols[inside], row_starts[inside], row_ends[inside]
+        if len(cols) == 0:
+            return cls._from_encoded_crop(None, [0, 0], [0, 0], shape, full_shape, shift_amount)
+
+        crop_x, crop_y = int(cols.min()), int(row_starts.min())
+        crop_height, crop_width = int(row_ends.max()) - crop_y, int(cols.max()) + 1 - crop_x
+        counts = get_rle_counts_from_column_runs(
+            cols - crop_x, row_starts - crop_y, row_ends - crop_y, crop_height, crop_width
+        )
+        if use_rle:
+            encoded_crop = mask_utils.frPyObjects(
+                {"size": [crop_height, crop_width], "counts": counts.tolist()}, crop_height, crop_width
+            )
+        else:
+            encoded_crop = get_bool_mask_from_rle_counts(counts, crop_height, crop_width)
+        return cls._from_encoded_crop(
+            encoded_crop, [crop_x, crop_y], [crop_height, crop_width], shape, full_shape, shift_amount
+        )
+
+    @classmethod
+    def from_rle(
+        cls,
+        rle: Dict,
+        crop_offset: List[int],
+        shape: List[int],
+        full_shape=None,
+        shift_amount: list = [0, 0],
+    ):
+        """
+        Init Mask from the pycocotools RLE of its nonzero region, which should be tight (e.g. the
+        union of tight crops), without decoding it.
+
+        Args:
+            rle: Dict
+                pycocotools RLE of the crop, as {"size": [height, width], "counts": bytes}
+            crop_offset: List
+                Position of the crop in the mask, should be in the form of [x, y]
+            shape: List
+                Size of the mask, should be in the form of [height, width]
+            full_shape: List
+                Size of the full image, should be in the form of [height, width]
+            shift_amount: List
+                To shift the box and mask predictions from sliced image to full
+                sized image, should be in the form of [shift_x, shift_y]
+        """
+        return cls._from_encoded_crop(rle, crop_offset, rle["size"], shape, full_shape, shift_amount)
+
+    @classmethod
+    def _from_encoded_crop(cls, encoded_crop, crop_offset, crop_shape, shape, full_shape, shift_amount):
+        mask = cls(bool_mask=None, full_shape=full_shape or shape, shift_amount=shift_amount)
+        mask._shape = [shape[0], shape[1]]
+        mask._mask = encoded_crop
+        mask._crop_offset = [int(crop_offset[0]), int(crop_offset[1])]
+        mask._crop_shape = [int(crop_shape[0]), int(crop_shape[1])]
+        return mask
+
     def __init__(
         self,
         bool_mask=None,
@@ -185,6 +367,8 @@ class Mask:
         shift_amount: list = [0, 0],
     ):
         """
+        Only the nonzero region of bool_mask is stored, together with its position in the mask.
+
         Args:
             bool_mask: np.ndarray with bool elements
                 2D mask of object, should have a shape of height*width
@@ -194,16 +378,16 @@ class Mask:
                 To shift the box and mask predictions from sliced image to full
                 sized image, should be in the form of [shift_x, shift_y]
         """
+        has_bool_mask = bool_mask is not None and len(bool_mask) > 0
 
-        if len(bool_mask) > 0:
-            has_bool_mask = True
-        else:
-            has_bool_mask = False
-
+        # size of the mask and the crop of its nonzero region
+        self._mask = None
+        self._shape = None
+        self._crop_offset = [0, 0]
+        self._crop_shape = [0, 0]
         if has_bool_mask:
-            self._mask = self.encode_bool_mask(bool_mask)
-        else:
-            self._mask = None
+            self._shape = [bool_mask.shape[0], bool_mask.shape[1]]
+            self._set_crop(*get_cropped_bool_mask(bool_mask))
 
         self.shift_x = shift_amount[0]
         self.shift_y = shift_amount[1]
@@ -212,12 +396,17 @@ class Mask:
             self.full_shape_height = full_shape[0]
             self.full_shape_width = full_shape[1]
         elif has_bool_mask:
-            self.full_shape_height = self.bool_mask.shape[0]
-            self.full_shape_width = self.bool_mask.shape[1]
+            self.full_shape_height = self._shape[0]
+            self.full_shape_width = self._shape[1]
         else:
             self.full_shape_height = None
             self.full_shape_width = None
 
+    def _set_crop(self, cropped_bool_mask, crop_offset: List[int]):
+        self._crop_offset = [int(crop_offset[0]), int(crop_offset[1])]
+        self._crop_shape = [cropped_bool_mask.shape[0], cropped_bool_mask.shape[1]]
+        self._mask = self.encode_bool_mask(cropped_bool_mask) if cropped_bool_mask.size > 0 else None
+
     def encode_bool_mask(self, bool_mask):
         _mask = bool_mask
         if use_rle:
@@ -227,19 +416,52 @@ class Mask:
     def decode_bool_mask(self, bool_mask):
         _mask = bool_mask
         if use_rle:
-            _mask = mask_utils.decode(bool_mask).astype(bool)
+            _mask = _mask_decode_cache.decode(bool_mask)
         return _mask
 
     @property
-    def bool_mask(self):
+    def cropped_bool_mask(self):
+        """
+        Returns the nonzero region of the mask, located at crop_offset in bool_mask. RLE crops are
+        decoded once and shared through a bounded cache, so the returned array is read only.
+        """
+        if self._mask is None:
+            return np.zeros(self._crop_shape, dtype=bool)
         return self.decode_bool_mask(self._mask)
 
+    @property
+    def crop_offset(self):
+        """
+        Returns the position of cropped_bool_mask in bool_mask as [x, y]
+        """
+        return list(self._crop_offset)
+
+    @property
+    def crop_shape(self):
+        """
+        Returns the size of cropped_bool_mask as [height, width], [0, 0] for empty masks
+        """
+        return list(self._crop_shape)
+
+    @property
+    def bool_mask(self):
+        """
+        Returns the full sized mask, prefer cropped_bool_mask and crop_offset for large masks
+        """
+        if self._shape is None:
+            return np.zeros((0, 0), dtype=bool)
+        bool_mask = np.zeros(self._shape, dtype=bool)
+        crop_x, crop_y = self._crop_offset
+        crop_height, crop_width = self._crop_shape
+        bool_mask[crop_y : crop_y + crop_height, crop_x : crop_x + crop_width] = self.cropped_bool_mask
+        return bool_mask
+
     @property
     def shape(self):
         """
         Returns mask shape as [height, width]
         """
-        return [self.bool_mask.shape[0], self.bool_mask.shape[1]]
+        return list(self._shape) if self._shape is not None else [0, 0]
 
     @property
     def full_shape(self):
@@ -255,36 +477,93 @@ class Mask:
         """
         return [self.shift_x, self.shift_y]
 
+    @property
+    def area(self):
+        """
+        Returns the number of pixels of the mask, RLE masks are not decoded
+        """
+        if self._mask is None:
+            return 0
+        if use_rle:
+            return int(mask_utils.area(self._mask))
+        return int(np.count_nonzero(self._mask))
+
+    def get_column_runs(self):
+        """
+        Returns the column runs (see sahi.utils.rle) of the mask as cols, row_starts, row_ends,
+        RLE masks are not decoded.
+        """
+        if self._mask is None:
+            return tuple(np.zeros(0, dtype=np.int64) for _ in range(3))
+        if use_rle:
+            counts = get_rle_counts_from_string(self._mask["counts"])
+        else:
+            counts = get_rle_counts_from_bool_mask(self._mask)
+        cols, row_starts, row_ends = get_rle_column_runs(counts, self._crop_shape[0])
+        crop_x, crop_y = self._crop_offset
+        return cols + crop_x, row_starts + crop_y, row_ends + crop_y
+
+    def get_rle_in_frame(self, frame_offset: List[int], frame_shape: List[int]) -> Dict:
+        """
+        Returns the pycocotools RLE of the mask in the frame of given position ([x, y]) and size
+        ([height, width]) in the mask, e.g. to merge masks with mask_utils.merge. The frame should
+        contain the crop of the mask. Only available if pycocotools is installed.
+        """
+        if self._mask is not None and self._crop_offset == list(frame_offset) and self._crop_shape == list(frame_shape):
+            return self._mask
+        frame_height, frame_width = frame_shape
+        cols, row_starts, row_ends = self.get_column_runs()
+        counts = get_rle_counts_from_column_runs(
+            cols - frame_offset[0], row_starts - frame_offset[1], row_ends - frame_offset[1], frame_height, frame_width
+        )
+        return mask_utils.frPyObjects(
+            {"size": [frame_height, frame_width], "counts": counts.tolist()}, frame_height, frame_width
+        )
+
+    def get_bbox(self):
+        """
+        Returns the voc bbox ([xmin, ymin, xmax, ymax]) of the mask as get_bbox_from_bool_mask,
+        None for masks that are empty or a single pixel wide/high.
+        """
+        crop_height, crop_width = self._crop_shape
+        if crop_height <= 1 or crop_width <= 1:
+            return None
+        crop_x, crop_y = self._crop_offset
+        return [crop_x, crop_y, crop_x + crop_width - 1, crop_y + crop_height - 1]
+
     def get_shifted_mask(self):
         # Confirm full_shape is specified
         if (self.full_shape_height is None) or (self.full_shape_width is None):
             raise ValueError("full_shape is None")
-        # init full mask
-        mask_fullsized = np.full(
-            (
-                self.full_shape_height,
-                self.full_shape_width,
-            ),
-            0,
-            dtype="float32",
-        )
-
-        # arrange starting ending indexes
-        starting_pixel = [self.shift_x, self.shift_y]
-        ending_pixel = [
-            min(starting_pixel[0] + self.bool_mask.shape[1], self.full_shape_width),
-            min(starting_pixel[1] + self.bool_mask.shape[0], self.full_shape_height),
-        ]
 
-        # convert sliced mask to full mask
-        mask_fullsized[starting_pixel[1] : ending_pixel[1], starting_pixel[0] : ending_pixel[0]] = self.bool_mask[
-            : ending_pixel[1] - starting_pixel[1], : ending_pixel[0] - starting_pixel[0]
+        # move the crop, the parts outside the full image are dropped
+        crop_x = self._crop_offset[0] + self.shift_x
+        crop_y = self._crop_offset[1] + self.shift_y
+        crop_height, crop_width = self._crop_shape
+        if crop_x + crop_width <= self.full_shape_width and crop_y + crop_height <= self.full_shape_height:
+            # the encoded crop is reused as is
+            return Mask._from_encoded_crop(
+                self._mask, [crop_x, crop_y], self._crop_shape, self.full_shape, self.full_shape, [0, 0]
+            )
+        if use_rle:
+            cols, row_starts, row_ends = self.get_column_runs()
+            return Mask.from_column_runs(
+                cols + self.shift_x,
+                row_starts + self.shift_y,
+                row_ends + self.shift_y,
+                shape=self.full_shape,
+                full_shape=self.full_shape,
+            )
+        cropped_bool_mask = self.cropped_bool_mask[
+            : max(self.full_shape_height - crop_y, 0), : max(self.full_shape_width - crop_x, 0)
         ]
 
-        return Mask(
-            mask_fullsized,
-            shift_amount=[0, 0],
+        return Mask.from_cropped_bool_mask(
+            cropped_bool_mask,
+            crop_offset=[crop_x, crop_y],
+            shape=self.full_shape,
             full_shape=self.full_shape,
+            shift_amount=[0, 0],
         )
 
     def to_coco_segmentation(self):
@@ -296,9 +575,19 @@ class Mask:
             ...
         ]
         """
-        coco_segmentation = get_coco_segmentation_from_bool_mask(self.bool_mask)
+        if self._mask is None:
+            return []
+        # polygons of the crop are moved to the mask
+        crop_x, crop_y = self._crop_offset
+        coco_segmentation = [
+            [coord + (crop_y if ind % 2 else crop_x) for ind, coord in enumerate(segmentation)]
+            for segmentation in get_coco_segmentation_from_bool_mask(self.cropped_bool_mask)
+        ]
         return coco_segmentation
 
+    def __repr__(self):
+        return f"Mask: <shape: {self.shape}, crop_offset: {self.crop_offset}, crop_shape: {self._crop_shape}>"
+
 
 class ObjectAnnotation:
     """
@@ -372,10 +661,10 @@ class ObjectAnnotation:
                 To shift the box and mask predictions from sliced image to full
                 sized image, should be in the form of [shift_x, shift_y]
         """
-        bool_mask = get_bool_mask_from_coco_segmentation(segmentation, width=full_shape[1], height=full_shape[0])
+        mask = Mask.from_coco_segmentation(segmentation, full_shape=full_shape, shift_amount=shift_amount)
         return cls(
             category_id=category_id,
-            bool_mask=bool_mask,
+            mask=mask,
             category_name=category_name,
             shift_amount=shift_amount,
             full_shape=full_shape,
@@ -483,12 +772,12 @@ class ObjectAnnotation:
                 To shift the box and mask predictions from sliced image to full
                 sized image, should be in the form of [shift_x, shift_y]
         """
-        bool_mask = get_bool_mask_from_coco_segmentation(
-            annotation.to_coco_segmentation(), width=full_shape[1], height=full_shape[0]
+        mask = Mask.from_coco_segmentation(
+            annotation.to_coco_segmentation(), full_shape=full_shape, shift_amount=shift_amount
         )
         return cls(
             category_id=category_id,
-            bool_mask=bool_mask,
+            mask=mask,
             category_name=category_name,
             shift_amount=shift_amount,
             full_shape=full_shape,
@@ -528,6 +817,7 @@ class ObjectAnnotation:
         category_name: Optional[str] = None,
         shift_amount: Optional[List[int]] = [0, 0],
         full_shape: Optional[List[int]] = None,
+        mask: Optional[Mask] = None,
     ):
         """
         Args:
@@ -545,19 +835,24 @@ class ObjectAnnotation:
             full_shape: List
                 Size of the full image after shifting, should be in
                 the form of [height, width]
+            mask: Mask
+                Mask of object, can be given instead of bool_mask to avoid creating
+                a full sized bool_mask, e.g. Mask.get_shifted_mask()
         """
         if not isinstance(category_id, int):
             raise ValueError("category_id must be an integer")
-        if (bbox is None) and (bool_mask is None):
+        if (bbox is None) and (bool_mask is None) and (mask is None):
             raise ValueError("you must provide a bbox or bool_mask")
 
         if bool_mask is not None:
-            self.mask = Mask(
+            mask = Mask(
                 bool_mask=bool_mask,
                 shift_amount=shift_amount,
                 full_shape=full_shape,
             )
-            bbox_from_bool_mask = get_bbox_from_bool_mask(bool_mask)
+        if mask is not None:
+            self.mask = mask
+            bbox_from_bool_mask = mask.get_bbox()
             # https://github.com/obss/sahi/issues/235
             if bbox_from_bool_mask is not None:
                 bbox = bbox_from_bool_mask
@@ -675,13 +970,14 @@ class ObjectAnnotation:
 
     def get_shifted_object_annotation(self):
         if self.mask:
+            shifted_mask = self.mask.get_shifted_mask()
             return ObjectAnnotation(
                 bbox=self.bbox.get_shifted_box().to_voc_bbox(),
                 category_id=self.category.id,
-                bool_mask=self.mask.get_shifted_mask().bool_mask,
                 category_name=self.category.name,
                 shift_amount=[0, 0],
-                full_shape=self.mask.get_shifted_mask().full_shape,
+                full_shape=shifted_mask.full_shape,
+                mask=shifted_mask,
             )
         else:
             return ObjectAnnotation(
@@ -2,18 +2,24 @@
 # Code written by Fatih C Akyon, 2020.
 
 import logging
+import math
+import time
 import warnings
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
 
 import numpy as np
 import pybboxes.functional as pbf
 
+from annotation import Mask
 from prediction import ObjectPrediction
 from utils.compatibility import fix_full_shape_list, fix_shift_amount_list
 from utils.cv import get_bbox_from_bool_mask
 from utils.import_utils import check_requirements, is_available
 from utils.torch import is_torch_cuda_available
 
+if TYPE_CHECKING:
+    import torch
+
 logger = logging.getLogger(__name__)
 
 
@@ -103,13 +109,14 @@ class DetectionModel:
 
             empty_cuda_cache()
 
-    def perform_inference(self, image: np.ndarray):
+    def perform_inference(self, image: Union[List[np.ndarray], np.ndarray]):
         """
         This function should be implemented in a way that prediction should be
         performed using self.model and the prediction result should be set to self._original_predictions.
         Args:
-            image: np.ndarray
-                A numpy array that contains the image to be predicted.
+            image: np.ndarray or list of np.ndarray
+                A numpy array that contains the image to be predicted, or a list of numpy arrays
+                to be predicted as a single batch.
         """
         raise NotImplementedError()
 
@@ -218,28 +225,27 @@ class MmdetDetectionModel(DetectionModel):
             category_mapping = {str(ind): category_name for ind, category_name in enumerate(self.category_names)}
             self.category_mapping = category_mapping
 
-    def perform_inference(self, image: np.ndarray):
+    def perform_inference(self, image: Union[List[np.ndarray], np.ndarray]):
         """
         Prediction is performed using self.model and the prediction result is set to self._original_predictions.
         Args:
-            image: np.ndarray
+            image: np.ndarray or list of np.ndarray
                 A numpy array that contains the image to be predicted. 3 channel image should be in RGB order.
+                A list of numpy arrays is predicted as a single batch.
         """
         check_requirements(["torch", "mmdet", "mmcv"])
 
         # Confirm model is loaded
         if self.model is None:
             raise ValueError("Model is not loaded, load it by calling .load_model()")
-        # Supports only batch of 1
         from mmdet.apis import inference_detector
 
-        # perform inference
-        if isinstance(image, np.ndarray):
-            # https://github.com/obss/sahi/issues/265
-            image = image[:, :, ::-1]
         # compatibility with sahi v0.8.15
         if not isinstance(image, list):
             image = [image]
+        # perform inference
+        # https://github.com/obss/sahi/issues/265
+        image = [img[:, :, ::-1] if isinstance(img, np.ndarray) else img for img in image]
         prediction_result = inference_detector(self.model, image)
 
         self._original_predictions = prediction_result
@@ -401,12 +407,13 @@ class Yolov5DetectionModel(DetectionModel):
             category_mapping = {str(ind): category_name for ind, category_name in enumerate(self.category_names)}
             self.category_mapping = category_mapping
 
-    def perform_inference(self, image: np.ndarray):
+    def perform_inference(self, image: Union[List[np.ndarray], np.ndarray]):
         """
         Prediction is performed using self.model and the prediction result is set to self._original_predictions.
         Args:
-            image: np.ndarray
+            image: np.ndarray or list of np.ndarray
                 A numpy array that contains the image to be predicted. 3 channel image should be in RGB order.
+                A list of numpy arrays is predicted as a single batch.
         """
 
         # Confirm model is loaded
@@ -577,18 +584,24 @@ class Detectron2DetectionModel(DetectionModel):
         else:
             self.category_names = list(self.category_mapping.values())
 
-    def perform_inference(self, image: np.ndarray):
+    def perform_inference(self, image: Union[List[np.ndarray], np.ndarray]):
         """
         Prediction is performed using self.model and the prediction result is set to self._original_predictions.
         Args:
-            image: np.ndarray
+            image: np.ndarray or list of np.ndarray
                 A numpy array that contains the image to be predicted. 3 channel image should be in RGB order.
+                A list of numpy arrays is predicted as a single batch.
         """
 
         # Confirm model is loaded
         if self.model is None:
             raise RuntimeError("Model is not loaded, load it by calling .load_model()")
 
+        if isinstance(image, list):
+            # DefaultPredictor supports single image, batch through the underlying model instead
+            self._original_predictions = self._perform_batch_inference(image)
+            return
+
         if isinstance(image, np.ndarray) and self.model.input_format == "BGR":
             # convert RGB image to BGR format
             image = image[:, :, ::-1]
@@ -597,6 +610,33 @@ class Detectron2DetectionModel(DetectionModel):
 
         self._original_predictions = prediction_result
 
+    def _perform_batch_inference(self, image_list: List[np.ndarray]) -> List[Dict]:
+        """
+        Applies the DefaultPredictor preprocessing to each image and feeds them
+        to the underlying model as a single batch.
+        Args:
+            image_list: list of np.ndarray
+                Images to be predicted. 3 channel images should be in RGB order.
+        Returns:
+            A list of detectron2 prediction dicts, one per image.
+        """
+        import torch
+
+        inputs = []
+        for image in image_list:
+            if self.model.input_format == "BGR":
+                # convert RGB image to BGR format
+                image = image[:, :, ::-1]
+            height, width = image.shape[:2]
+            transformed_image = self.model.aug.get_transform(image).apply_image(image)
+            transformed_image = torch.as_tensor(transformed_image.astype("float32").transpose(2, 0, 1))
+            inputs.append({"image": transformed_image, "height": height, "width": width})
+
+        with torch.no_grad():
+            prediction_result = self.model.model(inputs)
+
+        return prediction_result
+
     @property
     def num_categories(self):
         """
@@ -629,65 +669,64 @@ class Detectron2DetectionModel(DetectionModel):
         if full_shape_list is not None and isinstance(full_shape_list[0], int):
             full_shape_list = [full_shape_list]
 
-        # parse boxes, masks, scores, category_ids from predictions
-        boxes = original_predictions["instances"].pred_boxes.tensor.tolist()
-        scores = original_predictions["instances"].scores.tolist()
-        category_ids = original_predictions["instances"].pred_classes.tolist()
-
-        # check if predictions contain mask
-        try:
-            masks = original_predictions["instances"].pred_masks.tolist()
-        except AttributeError:
-            masks = None
+        # DefaultPredictor returns a single prediction dict, batch inference returns a list of them
+        if isinstance(original_predictions, dict):
+            original_predictions = [original_predictions]
 
         # create object_prediction_list
         object_prediction_list_per_image = []
-        object_prediction_list = []
+        for image_ind, image_predictions in enumerate(original_predictions):
+            shift_amount = shift_amount_list[image_ind]
+            full_shape = None if full_shape_list is None else full_shape_list[image_ind]
 
-        # detectron2 DefaultPredictor supports single image
-        shift_amount = shift_amount_list[0]
-        full_shape = None if full_shape_list is None else full_shape_list[0]
+            # parse boxes, masks, scores, category_ids from predictions
+            boxes = image_predictions["instances"].pred_boxes.tensor.tolist()
+            scores = image_predictions["instances"].scores.tolist()
+            category_ids = image_predictions["instances"].pred_classes.tolist()
 
-        for ind in range(len(boxes)):
-            score = scores[ind]
-            if score < self.confidence_threshold:
-                continue
+            # check if predictions contain mask
+            try:
+                masks = image_predictions["instances"].pred_masks.tolist()
+            except AttributeError:
+                masks = None
 
-            category_id = category_ids[ind]
+            object_prediction_list = []
+            for ind in range(len(boxes)):
+                score = scores[ind]
+                if score < self.confidence_threshold:
+                    continue
 
-            if masks is None:
-                bbox = boxes[ind]
-                mask = None
-            else:
-                mask = np.array(masks[ind])
+                category_id = category_ids[ind]
 
-                # check if mask is valid
-                # https://github.com/obss/sahi/issues/389
-                if get_bbox_from_bool_mask(mask) is None:
-                    continue
+                if masks is None:
+                    bbox = boxes[ind]
+                    mask = None
                 else:
-                    bbox = None
-
-            object_prediction = ObjectPrediction(
-                bbox=bbox,
-                bool_mask=mask,
-                category_id=category_id,
-                category_name=self.category_mapping[str(category_id)],
-                shift_amount=shift_amount,
-                score=score,
-                full_shape=full_shape,
-            )
-            object_prediction_list.append(object_prediction)
+                    mask = np.array(masks[ind])
+
+                    # check if mask is valid
+                    # https://github.com/obss/sahi/issues/389
+                    if get_bbox_from_bool_mask(mask) is None:
+                        continue
+                    else:
+                        bbox = None
 
-        # detectron2 DefaultPredictor supports single image
-        object_prediction_list_per_image = [object_prediction_list]
+                object_prediction = ObjectPrediction(
+                    bbox=bbox,
+                    bool_mask=mask,
+                    category_id=category_id,
+                    category_name=self.category_mapping[str(category_id)],
+                    shift_amount=shift_amount,
+                    score=score,
+                    full_shape=full_shape,
+                )
+                object_prediction_list.append(object_prediction)
+            object_prediction_list_per_image.append(object_prediction_list)
 
         self._object_prediction_list_per_image = object_prediction_list_per_image
 
 
 class HuggingfaceDetectionModel(DetectionModel):
-    import torch
-
     def __init__(
         self,
         model_path: Optional[str] = None,
@@ -768,8 +807,9 @@ class HuggingfaceDetectionModel(DetectionModel):
         """
         Prediction is performed using self.model and the prediction result is set to self._original_predictions.
         Args:
-            image: np.ndarray
+            image: np.ndarray or list of np.ndarray
                 A numpy array that contains the image to be predicted. 3 channel image should be in RGB order.
+                A list of numpy arrays is predicted as a single batch.
         """
         import torch
 
@@ -791,8 +831,8 @@ class HuggingfaceDetectionModel(DetectionModel):
         self._original_predictions = outputs
 
     def get_valid_predictions(
-        self, logits: torch.Tensor, pred_boxes: torch.Tensor
-    ) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+        self, logits: "torch.Tensor", pred_boxes: "torch.Tensor"
+    ) -> Tuple["torch.Tensor", "torch.Tensor", "torch.Tensor"]:
         import torch
 
         probs = logits.softmax(-1)
@@ -969,30 +1009,33 @@ class TorchVisionDetectionModel(DetectionModel):
             category_names = {str(i): COCO_CLASSES[i] for i in range(len(COCO_CLASSES))}
             self.category_mapping = category_names
 
-    def perform_inference(self, image: np.ndarray, image_size: int = None):
+    def perform_inference(self, image: Union[List[np.ndarray], np.ndarray], image_size: int = None):
         """
         Prediction is performed using self.model and the prediction result is set to self._original_predictions.
         Args:
-            image: np.ndarray
+            image: np.ndarray or list of np.ndarray
                 A numpy array that contains the image to be predicted. 3 channel image should be in RGB order.
+                A list of numpy arrays is predicted as a single batch.
             image_size: int
                 Inference input size.
         """
         from sahi.utils.torch import to_float_tensor
 
+        if not isinstance(image, list):
+            image = [image]
+
         # arrange model input size
         if self.image_size is not None:
             # get min and max of image height and width
-            min_shape, max_shape = min(image.shape[:2]), max(image.shape[:2])
+            min_shape, max_shape = min(image[0].shape[:2]), max(image[0].shape[:2])
             # torchvision resize transform scales the shorter dimension to the target size
             # we want to scale the longer dimension to the target size
             image_size = self.image_size * min_shape / max_shape
             self.model.transform.min_size = (image_size,)  # default is (800,)
             self.model.transform.max_size = image_size  # default is 1333
 
-        image = to_float_tensor(image)
-        image = image.to(self.device)
-        prediction_result = self.model([image])
+        image = [to_float_tensor(img).to(self.device) for img in image]
+        prediction_result = self.model(image)
 
         self._original_predictions = prediction_result
 
@@ -1038,9 +1081,8 @@ class TorchVisionDetectionModel(DetectionModel):
         if full_shape_list is not None and isinstance(full_shape_list[0], int):
             full_shape_list = [full_shape_list]
 
-        for image_predictions in original_predictions:
-            object_prediction_list_per_image = []
-
+        object_prediction_list_per_image = []
+        for image_ind, image_predictions in enumerate(original_predictions):
             # get indices of boxes with score > confidence_threshold
             scores = image_predictions["scores"].cpu().detach().numpy()
             selected_indices = np.where(scores > self.confidence_threshold)[0]
@@ -1060,8 +1102,8 @@ class TorchVisionDetectionModel(DetectionModel):
             # create object_prediction_list
             object_prediction_list = []
 
-            shift_amount = shift_amount_list[0]
-            full_shape = None if full_shape_list is None else full_shape_list[0]
+            shift_amount = shift_amount_list[image_ind]
+            full_shape = None if full_shape_list is None else full_shape_list[image_ind]
 
             for ind in range(len(boxes)):
 
@@ -1083,3 +1125,278 @@ class TorchVisionDetectionModel(DetectionModel):
             object_prediction_list_per_image.append(object_prediction_list)
 
         self._object_prediction_list_per_image = object_prediction_list_per_image
+
+
+def _hash_to_uniform(*keys) -> np.ndarray:
+    """
+    Mixes given integer arrays with the splitmix64 finalizer and returns uniform floats in [0, 1),
+    the same keys always give the same values.
+    """
+    hashes = np.zeros(np.broadcast(*keys).shape, dtype=np.uint64)
+    for key in keys:
+        hashes = hashes ^ np.asarray(key, dtype=np.int64).astype(np.uint64)
+        hashes = hashes + np.uint64(0x9E3779B97F4A7C15)
+        hashes = (hashes ^ (hashes >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        hashes = (hashes ^ (hashes >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        hashes = hashes ^ (hashes >> np.uint64(31))
+    return (hashes >> np.uint64(11)).astype(np.float64) / float(2**53)
+
+
+class MockDetectionModel(DetectionModel):
+    """
+    Stand-in detection model that needs no framework or weights, to test and benchmark the full
+    pipeline offline. Predictions are deterministic synthetic objects of a virtual scene: the scene is
+    divided into cells of cell_size pixels and the objects of each cell are derived from a hash of the
+    seed and the cell position. Overlapping slices and the standard prediction therefore see the same
+    objects, clipped to their windows, as a real detector would.
+    """
+
+    cell_size = 64
+
+    def __init__(
+        self,
+        model_path: Optional[str] = None,
+        model: Optional[Any] = None,
+        config_path: Optional[str] = None,
+        device: Optional[str] = None,
+        mask_threshold: float = 0.5,
+        confidence_threshold: float = 0.3,
+        category_mapping: Optional[Dict] = None,
+        category_remapping: Optional[Dict] = None,
+        load_at_init: bool = True,
+        image_size: int = None,
+        num_predictions_per_megapixel: float = 100,
+        min_object_size: int = 8,
+        max_object_size: int = 64,
+        num_categories: int = 3,
+        with_mask: bool = False,
+        latency_per_batch: float = 0,
+        latency_per_image: float = 0,
+        seed: int = 0,
+    ):
+        """
+        Init mock detection model. Arguments of DetectionModel are followed by:
+            num_predictions_per_megapixel: float
+                Mean number of objects in the scene per 1e6 pixels, before confidence_threshold
+                is applied. Scores are uniform in [0.3, 1).
+            min_object_size: int
+                Minimum width and height of the objects in pixels.
+            max_object_size: int
+                Maximum width and height of the objects in pixels.
+            num_categories: int
+                Number of categories, used if category_mapping is not given.
+            with_mask: bool
+                If True, elliptic bool masks are predicted for the objects.
+            latency_per_batch: float
+                Seconds each perform_inference call sleeps, regardless of the batch size.
+            latency_per_image: float
+                Seconds perform_inference additionally sleeps for each image of the batch.
+            seed: int
+                Seed of the virtual scene.
+        """
+        if not 0 < min_object_size <= max_object_size:
+            raise ValueError(
+                f"expected 0 < min_object_size <= max_object_size but given as {min_object_size}, {max_object_size}"
+            )
+        self.num_predictions_per_megapixel = num_predictions_per_megapixel
+        self.min_object_size = min_object_size
+        self.max_object_size = max_object_size
+        self._num_categories = num_categories
+        self.with_mask = with_mask
+        self.latency_per_batch = latency_per_batch
+        self.latency_per_image = latency_per_image
+        self.seed = seed
+        super().__init__(
+            model_path=model_path,
+            model=model,
+            config_path=config_path,
+            # no device is used, checking cuda would import torch
+            device=device or "cpu",
+            mask_threshold=mask_threshold,
+            confidence_threshold=confidence_threshold,
+            category_mapping=category_mapping,
+            category_remapping=category_remapping,
+            load_at_init=load_at_init,
+            image_size=image_size,
+        )
+
+    def load_model(self):
+        """
+        Nothing is loaded, the model is the virtual scene description.
+        """
+        self.set_model({"seed": self.seed, "num_predictions_per_megapixel": self.num_predictions_per_megapixel})
+
+    def set_model(self, model: Any):
+        """
+        Sets the underlying model, which is not used by the predictions.
+        Args:
+            model: Any
+        """
+        self.model = model
+
+        # set category_mapping
+        if not self.category_mapping:
+            self.category_mapping = {str(ind): f"mock{ind}" for ind in range(self._num_categories)}
+
+    @property
+    def num_categories(self):
+        """
+        Returns number of categories
+        """
+        return len(self.category_mapping)
+
+    @property
+    def has_mask(self):
+        """
+        Returns if model output contains segmentation mask
+        """
+        return self.with_mask
+
+    @property
+    def category_names(self):
+        return list(self.category_mapping.values())
+
+    def perform_inference(self, image: Union[List[np.ndarray], np.ndarray]):
+        """
+        Simulates the latency of the model, the image sizes are set to self._original_predictions.
+        The objects are created in _create_object_prediction_list_from_original_predictions,
+        once the positions of the images in the scene are known.
+        Args:
+            image: np.ndarray or list of np.ndarray
+                A numpy array that contains the image to be predicted, or a list of numpy arrays
+                to be predicted as a single batch.
+        """
+        # Confirm model is loaded
+        if self.model is None:
+            raise ValueError("Model is not loaded, load it by calling .load_model()")
+
+        if not isinstance(image, list):
+            image = [image]
+        latency = self.latency_per_batch + self.latency_per_image * len(image)
+        if latency > 0:
+            time.sleep(latency)
+        self._original_predictions = [img.shape[:2] for img in image]
+
+    def get_scene_objects(self, window: List[int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns the objects of the virtual scene that intersect given window.
+        Args:
+            window: list
+                [xmin, ymin, xmax, ymax] of the window in the scene
+        Returns:
+            boxes: np.ndarray
+                N x [xmin, ymin, xmax, ymax] boxes of the objects in the scene, not clipped to the window
+            scores: np.ndarray
+            category_ids: np.ndarray
+        """
+        cell_size = self.cell_size
+        mean_objects_per_cell = self.num_predictions_per_megapixel * cell_size**2 / 1e6
+        num_slots = max(1, math.ceil(mean_objects_per_cell))
+        # objects of the cells close to the window may extend into it
+        cell_xs = np.arange(
+            max(0, (window[0] - self.max_object_size) // cell_size), (window[2] + self.max_object_size) // cell_size + 1
+        )
+        cell_ys = np.arange(
+            max(0, (window[1] - self.max_object_size) // cell_size), (window[3] + self.max_object_size) // cell_size + 1
+        )
+        cell_xs, cell_ys, slots = [
+            keys.ravel() for keys in np.meshgrid(cell_xs, cell_ys, np.arange(num_slots), indexing="ij")
+        ]
+
+        def uniform(attribute_ind):
+            return _hash_to_uniform(self.seed, cell_xs, cell_ys, slots, attribute_ind)
+
+        present = uniform(0) < mean_objects_per_cell / num_slots
+        center_xs = (cell_xs + uniform(1)) * cell_size
+        center_ys = (cell_ys + uniform(2)) * cell_size
+        size_range = self.max_object_size - self.min_object_size
+        widths = self.min_object_size + uniform(3) * size_range
+        heights = self.min_object_size + uniform(4) * size_range
+        scores = 0.3 + 0.7 * uniform(5)
+        # category ids are the keys of category_mapping, which need not be 0..n-1
+        mapping_category_ids = np.array(sorted(int(category_id) for category_id in self.category_mapping))
+        category_ids = mapping_category_ids[(uniform(6) * len(mapping_category_ids)).astype(int)]
+
+        boxes = np.stack(
+            [center_xs - widths / 2, center_ys - heights / 2, center_xs + widths / 2, center_ys + heights / 2], axis=1
+        ).round()
+        inside = (
+            present
+            & (boxes[:, 0] < window[2])
+            & (boxes[:, 1] < window[3])
+            & (boxes[:, 2] > window[0])
+            & (boxes[:, 3] > window[1])
+        )
+        return boxes[inside], scores[inside], category_ids[inside]
+
+    def _create_object_prediction_list_from_original_predictions(
+        self,
+        shift_amount_list: Optional[List[List[int]]] = [[0, 0]],
+        full_shape_list: Optional[List[List[int]]] = None,
+    ):
+        """
+        Objects of the virtual scene in the window of each image are converted to a list of
+        prediction.ObjectPrediction and set to self._object_prediction_list_per_image.
+        Args:
+            shift_amount_list: list of list
+                To shift the box and mask predictions from sliced image to full sized image, should
+                be in the form of List[[shift_x, shift_y],[shift_x, shift_y],...]
+            full_shape_list: list of list
+                Size of the full image after shifting, should be in the form of
+                List[[height, width],[height, width],...]
+        """
+        # compatilibty for sahi v0.8.15
+        shift_amount_list = fix_shift_amount_list(shift_amount_list)
+        full_shape_list = fix_full_shape_list(full_shape_list)
+
+        object_prediction_list_per_image = []
+        for image_ind, (height, width) in enumerate(self._original_predictions):
+            shift_amount = shift_amount_list[image_ind]
+            full_shape = None if full_shape_list is None else full_shape_list[image_ind]
+
+            shift_x, shift_y = int(shift_amount[0]), int(shift_amount[1])
+            boxes, scores, category_ids = self.get_scene_objects([shift_x, shift_y, shift_x + width, shift_y + height])
+            # boxes relative to the image
+            boxes = boxes - [shift_x, shift_y, shift_x, shift_y]
+
+            object_prediction_list = []
+            for box, score, category_id in zip(boxes, scores, category_ids):
+                # ignore low scored predictions
+                if score < self.confidence_threshold:
+                    continue
+
+                # clip to the image
+                bbox = [max(0, box[0]), max(0, box[1]), min(width, box[2]), min(height, box[3])]
+
+                mask = None
+                if self.with_mask:
+                    # ellipse inscribed in the unclipped box, only the crop of the box is created
+                    ys, xs = np.ogrid[int(bbox[1]) : int(bbox[3]), int(bbox[0]) : int(bbox[2])]
+                    radius_x, radius_y = (box[2] - box[0]) / 2, (box[3] - box[1]) / 2
+                    ellipse = ((xs + 0.5 - box[0] - radius_x) / radius_x) ** 2 + (
+                        (ys + 0.5 - box[1] - radius_y) / radius_y
+                    ) ** 2 <= 1
+                    mask = Mask.from_cropped_bool_mask(
+                        ellipse,
+                        crop_offset=[int(bbox[0]), int(bbox[1])],
+                        shape=[height, width],
+                        full_shape=full_shape,
+                        shift_amount=shift_amount,
+                    )
+                    # ignore masks clipped to a line
+                    if mask.get_bbox() is None:
+                        continue
+
+                object_prediction = ObjectPrediction(
+                    bbox=bbox,
+                    category_id=int(category_id),
+                    score=float(score),
+                    mask=mask,
+                    category_name=self.category_mapping[str(int(category_id))],
+                    shift_amount=shift_amount,
+                    full_shape=full_shape,
+                )
+                object_prediction_list.append(object_prediction)
+            object_prediction_list_per_image.append(object_prediction_list)
+
+        self._object_prediction_list_per_image = object_prediction_list_per_image
@@ -1,27 +1,245 @@
 # OBSS SAHI Tool
 # Code written by Fatih C Akyon, 2021.
 
+from __future__ import annotations
+
 import logging
-from typing import List
+from typing import Dict, List, Optional
 
-import torch
+import numpy as np
 
-from sahi.postprocess.utils import ObjectPredictionList, has_match, merge_object_prediction_pair
+from sahi.postprocess.utils import (
+    ObjectPredictionList,
+    get_overlapping_pairs,
+    has_match,
+    merge_object_prediction_pair,
+)
 from sahi.prediction import ObjectPrediction
-from sahi.utils.import_utils import check_requirements
+from sahi.utils.import_utils import check_requirements, lazy_import
 
-
-#-----------------------
-import numpy as np
-import tensorflow as tf
-from keras import backend as K
-import time
+torch = lazy_import("torch")
 
 logger = logging.getLogger(__name__)
 
 
+def calculate_match_metric_value(
+    boxes_s: torch.tensor,
+    boxes_t: torch.tensor,
+    areas_s: torch.tensor,
+    areas_t: torch.tensor,
+    match_metric: str = "IOU",
+) -> torch.tensor:
+    """
+    Computes IOU/IOS between the selected predictions S and the other predictions T,
+    all arguments are broadcast against each other.
+    Args:
+        boxes_s: (tensor) Boxes of S as [..., 4] with [x1, y1, x2, y2]
+        boxes_t: (tensor) Boxes of T as [..., 4] with [x1, y1, x2, y2]
+        areas_s: (tensor) Areas of S
+        areas_t: (tensor) Areas of T
+        match_metric: (str) IOU or IOS
+    Returns:
+        match_metric_value: (tensor) IOU/IOS of every S and T pair
+    """
+    # find the coordinates of the intersection boxes
+    xx1 = torch.max(boxes_t[..., 0], boxes_s[..., 0])
+    yy1 = torch.max(boxes_t[..., 1], boxes_s[..., 1])
+    xx2 = torch.min(boxes_t[..., 2], boxes_s[..., 2])
+    yy2 = torch.min(boxes_t[..., 3], boxes_s[..., 3])
+
+    # take max with 0.0 to avoid negative w and h
+    # due to non-overlapping boxes
+    w = torch.clamp(xx2 - xx1, min=0.0)
+    h = torch.clamp(yy2 - yy1, min=0.0)
+
+    # find the intersection area
+    inter = w * h
+
+    if match_metric == "IOU":
+        # find the union of every prediction T in P
+        # with the prediction S
+        union = (areas_t - inter) + areas_s
+        return inter / union
+    elif match_metric == "IOS":
+        # find the smaller area of every prediction T in P
+        # with the prediction S
+        smaller = torch.min(areas_t, areas_s)
+        return inter / smaller
+    else:
+        raise ValueError(f"'match_metric' should be one of ['IOU', 'IOS'] but given as {match_metric}")
+
+
+def get_match_matrix(
+    predictions: torch.tensor,
+    match_metric: str = "IOU",
+    match_threshold: float = 0.5,
+    category_ids: torch.tensor = None,
+    chunk_size: int = 1024,
+) -> np.ndarray:
+    """
+    Computes the pairwise IOU/IOS matches of all predictions at once.
+    Args:
+        predictions: (tensor) The location preds for the image
+            along with the class predscores, Shape: [num_boxes,5].
+        match_metric: (str) IOU or IOS
+        match_threshold: (float) The overlap thresh for
+            match metric.
+        category_ids: (tensor) If given, predictions with different
+            category ids never match, Shape: [num_boxes,].
+        chunk_size: (int) Number of rows computed at once, bounds the
+            size of the intermediate tensors.
+    Returns:
+        match_matrix: (np.ndarray) Boolean matrix of Shape: [num_boxes, num_boxes],
+        match_matrix[i, j] is True if prediction j is suppressed/merged by prediction i.
+    """
+    if match_metric not in ("IOU", "IOS"):
+        raise ValueError(f"'match_metric' should be one of ['IOU', 'IOS'] but given as {match_metric}")
+
+    # calculate area of every block in P
+    areas = (predictions[:, 2] - predictions[:, 0]) * (predictions[:, 3] - predictions[:, 1])
+
+    num_predictions = len(predictions)
+    match_matrix = np.zeros((num_predictions, num_predictions), dtype=bool)
+    for start in range(0, num_predictions, chunk_size):
+        end = min(start + chunk_size, num_predictions)
+
+        # rows are the selected predictions S, columns are the others T
+        match_metric_value = calculate_match_metric_value(
+            predictions[start:end, None, :4], predictions[None, :, :4], areas[start:end, None], areas[None, :], match_metric
+        )
+
+        # boxes with IoU/IoS less than thresh_iou do not match
+        matched = ~(match_metric_value < match_threshold)
+        if category_ids is not None:
+            matched &= category_ids[None, :] == category_ids[start:end, None]
+        match_matrix[start:end] = matched.numpy()
+
+    return match_matrix
 
-def batched_nms(predictions: torch.tensor, match_metric: str = "IOU", match_threshold: float = 0.5,len_original:int=3):
+
+def greedy_suppression(match_matrix: np.ndarray) -> List[int]:
+    """
+    Runs greedy suppression over a match matrix whose rows and columns
+    are sorted by selection priority (highest priority first).
+    Args:
+        match_matrix: (np.ndarray) Boolean matrix from get_match_matrix.
+    Returns:
+        A list of kept positions in selection order
+    """
+    num_predictions = len(match_matrix)
+    suppressed = np.zeros(num_predictions, dtype=bool)
+    keep = []
+    for pos in range(num_predictions):
+        if suppressed[pos]:
+            continue
+        keep.append(pos)
+        suppressed[pos + 1 :] |= match_matrix[pos, pos + 1 :]
+    return keep
+
+
+def get_suppressed_by(match_matrix: np.ndarray, keep: List[int]) -> Dict[int, int]:
+    """
+    Returns the kept position that suppressed each of the other positions in greedy_suppression.
+    Args:
+        match_matrix: (np.ndarray) Boolean matrix from get_match_matrix.
+        keep: (List[int]) Kept positions returned by greedy_suppression.
+    Returns:
+        suppressed_by: (Dict[int:int]) mapping from suppressed positions to the kept positions
+    """
+    num_predictions = len(match_matrix)
+    keep = np.asarray(keep, dtype=int)
+    # only earlier kept positions suppress a position
+    matched = match_matrix[keep] & (keep[:, None] < np.arange(num_predictions)[None, :])
+    suppressed = np.ones(num_predictions, dtype=bool)
+    suppressed[keep] = False
+    suppressed_positions = np.flatnonzero(suppressed)
+    suppressor_rows = matched[:, suppressed_positions].argmax(axis=0)
+    return dict(zip(suppressed_positions.tolist(), keep[suppressor_rows].tolist()))
+
+
+def _record_suppression(
+    debug_trace: Optional[List[dict]],
+    function_name: str,
+    priority_order: torch.tensor,
+    match_matrix: np.ndarray,
+    keep_positions: List[int],
+    **fields,
+):
+    """Appends the kept and suppressed prediction indices of a suppression to debug_trace."""
+    if debug_trace is None:
+        return
+    priority_order = priority_order.tolist()
+    suppressed_by = get_suppressed_by(match_matrix, keep_positions)
+    debug_trace.append(
+        {
+            "function": function_name,
+            "keep": [priority_order[pos] for pos in keep_positions],
+            "suppressed_by": {
+                priority_order[pos]: priority_order[keeper_pos] for pos, keeper_pos in suppressed_by.items()
+            },
+            **fields,
+        }
+    )
+
+
+def get_match_lists(
+    predictions: torch.tensor,
+    match_metric: str = "IOU",
+    match_threshold: float = 0.5,
+    grid_cell_size: float = None,
+) -> List[np.ndarray]:
+    """
+    Computes the IOU/IOS matches of every prediction as a list of matched indices.
+    Args:
+        predictions: (tensor) The location preds for the image
+            along with the class predscores, Shape: [num_boxes,5].
+        match_metric: (str) IOU or IOS
+        match_threshold: (float) The overlap thresh for
+            match metric.
+        grid_cell_size: (float) If given, a uniform grid with this cell size is
+            used as spatial index and only overlapping boxes are compared.
+            Slice size is a good choice for sliced predictions.
+    Returns:
+        match_lists: (List[np.ndarray]) match_lists[i] is the sorted array of
+        prediction indices (excluding i) that are suppressed/merged by prediction i.
+    """
+    num_predictions = len(predictions)
+    # with a non-positive threshold non-overlapping boxes match as well
+    if grid_cell_size is None or match_threshold <= 0:
+        match_matrix = get_match_matrix(predictions, match_metric, match_threshold)
+        np.fill_diagonal(match_matrix, False)
+        return [np.flatnonzero(matched) for matched in match_matrix]
+
+    if match_metric not in ("IOU", "IOS"):
+        raise ValueError(f"'match_metric' should be one of ['IOU', 'IOS'] but given as {match_metric}")
+
+    first_indices, second_indices = get_overlapping_pairs(predictions[:, :4].numpy(), grid_cell_size)
+    # every pair is checked in both directions, rows are S and cols are T
+    rows = np.concatenate([first_indices, second_indices])
+    cols = np.concatenate([second_indices, first_indices])
+
+    areas = (predictions[:, 2] - predictions[:, 0]) * (predictions[:, 3] - predictions[:, 1])
+    rows_tensor = torch.from_numpy(rows)
+    cols_tensor = torch.from_numpy(cols)
+    match_metric_value = calculate_match_metric_value(
+        predictions[rows_tensor, :4], predictions[cols_tensor, :4], areas[rows_tensor], areas[cols_tensor], match_metric
+    )
+    matched = (~(match_metric_value < match_threshold)).numpy()
+    rows, cols = rows[matched], cols[matched]
+
+    # group the matched cols by row
+    order = np.lexsort((cols, rows))
+    rows, cols = rows[order], cols[order]
+    return np.split(cols, np.searchsorted(rows, np.arange(1, num_predictions)))
+
+
+def batched_nms(
+    predictions: torch.tensor,
+    match_metric: str = "IOU",
+    match_threshold: float = 0.5,
+    len_original: int = 3,
+    debug_trace: Optional[List[dict]] = None,
+):
     """
     Apply non-maximum suppression to avoid detecting too many
     overlapping bounding boxes for a given object.
@@ -32,37 +250,49 @@ def batched_nms(predictions: torch.tensor, match_metric: str = "IOU", match_thre
 
         match_threshold: (float) The overlap thresh for
             match metric.
+        debug_trace: (List[dict]) If given, the kept and suppressed indices are appended to it.
     Returns:
         A list of filtered indexes, Shape: [ ,]
     """
+    scores = predictions[:, 4]
+    category_ids = predictions[:, 5]
 
+    # category ids of the predictions selected first, see origin_nms
+    original_category_ids = predictions[len_original:, 5]
 
-    scores = predictions[:, 4].squeeze()
-    category_ids = predictions[:, 5].squeeze()
-
-    #오리지널 리스트
-    original_category_ids = predictions[len_original:,5].squeeze()
-
-
-    keep_mask = torch.zeros_like(category_ids, dtype=torch.bool)
-    #nms를 한번에 돌리는 것이 아닌가? - 카테고리 별로 돌린다
+    # build the selection order per category, as origin_nms would, so that all
+    # categories can be suppressed in a single pass over one match matrix
+    priority_order = []
+    original_indices = []
     for category_id in torch.unique(category_ids):
         curr_indices = torch.where(category_ids == category_id)[0]
-        original_curr_indices = torch.where(original_category_ids == category_id)[0]##
-
-        len_original  = len(predictions[original_curr_indices])
-        #카테고리별 빠지는 개수 계산
-
+        curr_len_original = int((original_category_ids == category_id).sum())
+        curr_order, curr_original_order = get_origin_nms_order(scores[curr_indices], curr_len_original)
+        priority_order.append(curr_indices[torch.cat([curr_order, curr_original_order]).flip(dims=(0,))])
+        original_indices.append(curr_indices[curr_original_order])
 
-        #curr_keep_indices = nms(predictions[curr_indices], match_metric, match_threshold,len_original)
-        curr_keep_indices = origin_nms(predictions[curr_indices], match_metric, match_threshold, len_original)
-        #print("curr_keep_indices-----",curr_keep_indices)
-        keep_mask[curr_indices[curr_keep_indices]] = True
+    keep_mask = torch.zeros_like(category_ids, dtype=torch.bool)
+    if priority_order:
+        priority_order = torch.cat(priority_order)
+        match_matrix = get_match_matrix(
+            predictions[priority_order], match_metric, match_threshold, category_ids=category_ids[priority_order]
+        )
+        keep_positions = greedy_suppression(match_matrix)
+        keep_mask[priority_order[keep_positions]] = True
+        original_indices = torch.cat(original_indices)
+        keep_mask[original_indices] = True
+        _record_suppression(
+            debug_trace,
+            "batched_nms",
+            priority_order,
+            match_matrix,
+            keep_positions,
+            original_indices=original_indices.tolist(),
+        )
     keep_indices = torch.where(keep_mask)[0]
     # sort selected indices by their scores
     keep_indices = keep_indices[scores[keep_indices].sort(descending=True)[1]].tolist()
 
-    #print("batch_keep_indices------",keep_indices)
     return keep_indices
 
 
@@ -71,6 +301,7 @@ def nms(
     match_metric: str = "IOU",
     match_threshold: float = 0.5,
     len_original:int=0,
+    debug_trace: Optional[List[dict]] = None,
 ):
     """
     Apply non-maximum suppression to avoid detecting too many
@@ -81,279 +312,100 @@ def nms(
         match_metric: (str) IOU or IOS
         match_threshold: (float) The overlap thresh for
             match metric.
+        debug_trace: (List[dict]) If given, the kept and suppressed indices are appended to it.
     Returns:
         A list of filtered indexes, Shape: [ ,]
     """
-
-
-
-    # we extract coordinates for every
-    # prediction box present in P
-
-    x1 = predictions[:, 0]
-    y1 = predictions[:, 1]
-    x2 = predictions[:, 2]
-    y2 = predictions[:, 3]
-
     # we extract the confidence scores as well
     scores = predictions[:, 4]
 
-    # calculate area of every block in P
-    areas = (x2 - x1) * (y2 - y1)
-
     # sort the prediction boxes in P
     # according to their confidence scores
+    priority_order = scores.argsort().flip(dims=(0,))
 
-    order = scores.argsort()
-
-
-    # initialise an empty list for
-    # filtered prediction boxes
-    keep = []
-
-    while len(order) > 0:
-        # extract the index of the
-        # prediction with highest score
-        # we call this prediction S
-
-        idx = order[-1]
-
-        keep.append(idx.tolist())
-
-
-        # remove S from P
-        order = order[:-1]
-
-
-
-        # sanity check
-        if len(order) == 0:
-            break
-
-        # select coordinates of BBoxes according to
-        # the indices in order
-        xx1 = torch.index_select(x1, dim=0, index=order)
-        xx2 = torch.index_select(x2, dim=0, index=order)
-        yy1 = torch.index_select(y1, dim=0, index=order)
-        yy2 = torch.index_select(y2, dim=0, index=order)
-
-        # find the coordinates of the intersection boxes
-        xx1 = torch.max(xx1, x1[idx])
-        yy1 = torch.max(yy1, y1[idx])
-        xx2 = torch.min(xx2, x2[idx])
-        yy2 = torch.min(yy2, y2[idx])
-
-        # find height and width of the intersection boxes
-        w = xx2 - xx1
-        h = yy2 - yy1
-
-        # take max with 0.0 to avoid negative w and h
-        # due to non-overlapping boxes
-        w = torch.clamp(w, min=0.0)
-        h = torch.clamp(h, min=0.0)
-
-        # find the intersection (교차) area
-        inter = w * h
-
-        # find the areas of BBoxes according the indices in order
-        rem_areas = torch.index_select(areas, dim=0, index=order)
-
-        if match_metric == "IOU":
-            # find the union of every prediction T in P
-            # with the prediction S
-            # Note that areas[idx] represents area of S
-            union = (rem_areas - inter) + areas[idx]
-            # find the IoU of every prediction in P with S
-            match_metric_value = inter / union
-
-
-        elif match_metric == "IOS":
-            # find the smaller area of every prediction T in P
-            # with the prediction S
-            # Note that areas[idx] represents area of S
-            smaller = torch.min(rem_areas, areas[idx])
-            # print("IOS--areas[idx] ", areas[idx])
-            # find the IoU of every prediction in P with S
-            match_metric_value = inter / smaller
-            # print("IOS--inter ", inter)
-            # print("IOS--smaller", smaller)
-        else:
-            raise ValueError()
-
-        # print("keep",keep)
-        # print("idx : ",idx)
-        # print("match_metric_value : ",match_metric_value)
+    match_matrix = get_match_matrix(predictions[priority_order], match_metric, match_threshold)
+    keep_positions = greedy_suppression(match_matrix)
+    keep = priority_order[keep_positions].tolist()
+    _record_suppression(debug_trace, "nms", priority_order, match_matrix, keep_positions)
 
+    return keep
 
-        # keep the boxes with IoU less than thresh_iou
-        mask = match_metric_value < match_threshold
-        order = order[mask] #boolean indexing
-        #print(order)
 
+def get_origin_nms_order(scores: torch.tensor, len_original: int = 0):
+    """
+    Returns the ascending score order of the first len_original predictions and
+    of the remaining (original first) predictions, which are selected before them.
+    """
+    order = scores[:len_original].argsort()
+    original_order = scores[len_original:].argsort()
+    # shift to the indices of the remaining predictions
+    original_order = original_order + len(order)
+    return order, original_order
 
 
-    print("keep---------------------------------------",keep)
-    return keep
-
-#오리지널 먼저
 def origin_nms(
     predictions: torch.tensor,
     match_metric: str = "IOU",
     match_threshold: float = 0.5,
     len_original:int=0,
+    debug_trace: Optional[List[dict]] = None,
 ):
     """
     Apply non-maximum suppression to avoid detecting too many
-    overlapping bounding boxes for a given object.
+    overlapping bounding boxes for a given object. Predictions after the
+    first len_original ones are selected first and always kept.
     Args:
         predictions: (tensor) The location preds for the image
             along with the class predscores, Shape: [num_boxes,5].
         match_metric: (str) IOU or IOS
         match_threshold: (float) The overlap thresh for
             match metric.
+        debug_trace: (List[dict]) If given, the kept and suppressed indices are appended to it.
     Returns:
         A list of filtered indexes, Shape: [ ,]
     """
-
-
-
-    # we extract coordinates for every
-    # prediction box present in P
-
-    x1 = predictions[:, 0]
-    y1 = predictions[:, 1]
-    x2 = predictions[:, 2]
-    y2 = predictions[:, 3]
-
-    # we extract the confidence scores as well
-
-    slice_value = len(predictions) - len_original
-
-    original_scores = predictions[len_original:,4]
-    scores = predictions[:len_original, 4]
-
-    # calculate area of every block in P
-    areas = (x2 - x1) * (y2 - y1)
-
     # sort the prediction boxes in P
     # according to their confidence scores
+    order, original_order = get_origin_nms_order(predictions[:, 4], len_original)
+    priority_order = torch.cat([order, original_order]).flip(dims=(0,))
+
+    match_matrix = get_match_matrix(predictions[priority_order], match_metric, match_threshold)
+    keep_positions = greedy_suppression(match_matrix)
+    keep = priority_order[keep_positions].tolist()
+
+    # add the remaining predictions that are not kept yet
+    kept = set(keep)
+    keep.extend(i for i in original_order.tolist() if i not in kept)
+    _record_suppression(
+        debug_trace,
+        "origin_nms",
+        priority_order,
+        match_matrix,
+        keep_positions,
+        original_indices=original_order.tolist(),
+    )
 
-    order = scores.argsort() #sort index num
-    original_order = original_scores.argsort()
-    #idx값 조정
-    original_order = original_order+len(scores)
-
-
-    order = torch.cat([order, original_order])
-
-    #print("order----oigin", original_order)
-    #print("order-----add",order)
-
-
-
-    # initialise an empty list for
-    # filtered prediction boxes
-    keep = []
-
-    while len(order) > 0:
-        # extract the index of the
-        # prediction with highest score
-        # we call this prediction S
-
-        idx = order[-1]
-
-
-        # push S in filtered predictions list
-        keep.append(idx.tolist())
-
-
-        # remove S from P
-        order = order[:-1]
-
-        # sanity check
-        if len(order) == 0:
-            break
-
-        # select coordinates of BBoxes according to
-        # the indices in order
-        xx1 = torch.index_select(x1, dim=0, index=order)
-        xx2 = torch.index_select(x2, dim=0, index=order)
-        yy1 = torch.index_select(y1, dim=0, index=order)
-        yy2 = torch.index_select(y2, dim=0, index=order)
-
-        # find the coordinates of the intersection boxes
-        xx1 = torch.max(xx1, x1[idx])
-        yy1 = torch.max(yy1, y1[idx])
-        xx2 = torch.min(xx2, x2[idx])
-        yy2 = torch.min(yy2, y2[idx])
-
-        # find height and width of the intersection boxes
-        w = xx2 - xx1
-        h = yy2 - yy1
-
-        # take max with 0.0 to avoid negative w and h
-        # due to non-overlapping boxes
-        w = torch.clamp(w, min=0.0)
-        h = torch.clamp(h, min=0.0)
-
-        # find the intersection (교차) area
-        inter = w * h
-
-        # find the areas of BBoxes according the indices in order
-        rem_areas = torch.index_select(areas, dim=0, index=order)
-
-        if match_metric == "IOU":
-            # find the union of every prediction T in P
-            # with the prediction S
-            # Note that areas[idx] represents area of S
-            union = (rem_areas - inter) + areas[idx]
-            # find the IoU of every prediction in P with S
-            match_metric_value = inter / union
-
-        elif match_metric == "IOS":
-            # find the smaller area of every prediction T in P
-            # with the prediction S
-            # Note that areas[idx] represents area of S
-            smaller = torch.min(rem_areas, areas[idx])
-            #print("IOS--areas[idx] ", areas[idx])
-            # find the IoU of every prediction in P with S
-            match_metric_value = inter / smaller
-            #print("IOS--inter ", inter)
-            #print("IOS--smaller", smaller)
-        else:
-            raise ValueError()
-
-        # print("keep",keep)
-        # print("idx : ",idx)
-        # print("match_metric_value : ",match_metric_value)
-
-
-        # keep the boxes with IoU less than thresh_iou
-        mask = match_metric_value < match_threshold
-        order = order[mask] #boolean indexing
-        print("idx와 mask", len(order), idx, "/", mask)
-        print(predictions[idx].tolist())
-        #print(order)
-
-    #order origin값 중복체크하여 없는것만 넣기
-
-    # print("original order---",original_order)
-    # print("before keep---",keep)
-
-    #original_order=original_order.tolist
+    return keep
 
-    for i in original_order.tolist():
-        if i not in keep:
-            keep.append(i)
 
-    print("keep---------------------------------------",keep)
-    return keep
+def _record_merge(debug_trace: Optional[List[dict]], function_name: str, keep_to_merge_list: Dict[int, List[int]]):
+    """Appends a copy of the keep to merge mapping of a merging to debug_trace."""
+    if debug_trace is None:
+        return
+    debug_trace.append(
+        {
+            "function": function_name,
+            "keep_to_merge_list": {keep: list(merge_list) for keep, merge_list in keep_to_merge_list.items()},
+        }
+    )
 
 
 def batched_greedy_nmm(
     object_predictions_as_tensor: torch.tensor,
     match_metric: str = "IOU",
     match_threshold: float = 0.5,
+    grid_cell_size: float = None,
+    debug_trace: Optional[List[dict]] = None,
 ):
     """
     Apply greedy version of non-maximum merging per category to avoid detecting
@@ -364,6 +416,8 @@ def batched_greedy_nmm(
         match_metric: (str) IOU or IOS
         match_threshold: (float) The overlap thresh for
             match metric.
+        grid_cell_size: (float) Cell size of the spatial index, see get_match_lists.
+        debug_trace: (List[dict]) If given, the keep to merge mapping is appended to it.
     Returns:
         keep_to_merge_list: (Dict[int:List[int]]) mapping from prediction indices
         to keep to a list of prediction indices to be merged.
@@ -372,12 +426,15 @@ def batched_greedy_nmm(
     keep_to_merge_list = {}
     for category_id in torch.unique(category_ids):
         curr_indices = torch.where(category_ids == category_id)[0]
-        curr_keep_to_merge_list = greedy_nmm(object_predictions_as_tensor[curr_indices], match_metric, match_threshold)
+        curr_keep_to_merge_list = greedy_nmm(
+            object_predictions_as_tensor[curr_indices], match_metric, match_threshold, grid_cell_size
+        )
         curr_indices_list = curr_indices.tolist()
         for curr_keep, curr_merge_list in curr_keep_to_merge_list.items():
             keep = curr_indices_list[curr_keep]
             merge_list = [curr_indices_list[curr_merge_ind] for curr_merge_ind in curr_merge_list]
             keep_to_merge_list[keep] = merge_list
+    _record_merge(debug_trace, "batched_greedy_nmm", keep_to_merge_list)
     return keep_to_merge_list
 
 
@@ -385,6 +442,8 @@ def greedy_nmm(
     object_predictions_as_tensor: torch.tensor,
     match_metric: str = "IOU",
     match_threshold: float = 0.5,
+    grid_cell_size: float = None,
+    debug_trace: Optional[List[dict]] = None,
 ):
     """
     Apply greedy version of non-maximum merging to avoid detecting too many
@@ -397,114 +456,47 @@ def greedy_nmm(
         match_metric: (str) IOU or IOS
         match_threshold: (float) The overlap thresh for
             match metric.
+        grid_cell_size: (float) Cell size of the spatial index, see get_match_lists.
+        debug_trace: (List[dict]) If given, the keep to merge mapping is appended to it.
     Returns:
         keep_to_merge_list: (Dict[int:List[int]]) mapping from prediction indices
         to keep to a list of prediction indices to be merged.
     """
     keep_to_merge_list = {}
 
-    # we extract coordinates for every
-    # prediction box present in P
-    x1 = object_predictions_as_tensor[:, 0]
-    y1 = object_predictions_as_tensor[:, 1]
-    x2 = object_predictions_as_tensor[:, 2]
-    y2 = object_predictions_as_tensor[:, 3]
-
     # we extract the confidence scores as well
     scores = object_predictions_as_tensor[:, 4]
 
-    # calculate area of every block in P
-    areas = (x2 - x1) * (y2 - y1)
-
     # sort the prediction boxes in P
     # according to their confidence scores
-    order = scores.argsort()
-
-    # initialise an empty list for
-    # filtered prediction boxes
-    keep = []
-
-    while len(order) > 0:
-        # extract the index of the
-        # prediction with highest score
-        # we call this prediction S
-        idx = order[-1]
-
-        # push S in filtered predictions list
-        keep.append(idx.tolist())
-
-        # remove S from P
-        order = order[:-1]
-
-        # sanity check
-        if len(order) == 0:
+    priority_order = scores.argsort().flip(dims=(0,))
+    match_lists = get_match_lists(
+        object_predictions_as_tensor[priority_order], match_metric, match_threshold, grid_cell_size
+    )
+    priority_order = priority_order.numpy()
+
+    num_predictions = len(priority_order)
+    merged = np.zeros(num_predictions, dtype=bool)
+    num_remaining = num_predictions
+    for pos in range(num_predictions):
+        if merged[pos]:
+            continue
+        # the last remaining prediction is not added to the mapping
+        num_remaining -= 1
+        if num_remaining == 0:
             break
 
-        # select coordinates of BBoxes according to
-        # the indices in order
-        xx1 = torch.index_select(x1, dim=0, index=order)
-        xx2 = torch.index_select(x2, dim=0, index=order)
-        yy1 = torch.index_select(y1, dim=0, index=order)
-        yy2 = torch.index_select(y2, dim=0, index=order)
-
-        # find the coordinates of the intersection boxes
-        xx1 = torch.max(xx1, x1[idx])
-        yy1 = torch.max(yy1, y1[idx])
-        xx2 = torch.min(xx2, x2[idx])
-        yy2 = torch.min(yy2, y2[idx])
-
-        # find height and width of the intersection boxes
-        w = xx2 - xx1
-        h = yy2 - yy1
-
-        # take max with 0.0 to avoid negative w and h
-        # due to non-overlapping boxes
-        w = torch.clamp(w, min=0.0)
-        h = torch.clamp(h, min=0.0)
-
-        # find the intersection area
-        inter = w * h
-
-        # find the areas of BBoxes according the indices in order
-        rem_areas = torch.index_select(areas, dim=0, index=order)
-
-        if match_metric == "IOU":
-            # find the union of every prediction T in P
-            # with the prediction S
-            # Note that areas[idx] represents area of S
-            union = (rem_areas - inter) + areas[idx]
-            # find the IoU of every prediction in P with S
-            match_metric_value = inter / union
-
-
-        elif match_metric == "IOS":
-            # find the smaller area of every prediction T in P
-            # with the prediction S
-            # Note that areas[idx] represents area of S
-            smaller = torch.min(rem_areas, areas[idx])
-            # find the IoS of every prediction in P with S
-            match_metric_value = inter / smaller
-
-        else:
-            raise ValueError()
-
-        # keep the boxes with IoU/IoS less than thresh_iou
-        mask = match_metric_value < match_threshold
-        matched_box_indices = order[(mask == False).nonzero().flatten()].flip(dims=(0,))
-        unmatched_indices = order[(mask == True).nonzero().flatten()]
-
-
-        # update box pool
-        print("unmatched_indices",unmatched_indices)
-
-        order = unmatched_indices[scores[unmatched_indices].argsort()]
+        # merge the remaining boxes with IoU/IoS over thresh_iou into S
+        matched_positions = match_lists[pos]
+        matched_positions = matched_positions[matched_positions > pos]
+        matched_positions = matched_positions[~merged[matched_positions]]
+        merged[matched_positions] = True
+        num_remaining -= len(matched_positions)
 
         # create keep_ind to merge_ind_list mapping
-        keep_to_merge_list[idx.tolist()] = []
+        keep_to_merge_list[priority_order[pos].item()] = priority_order[matched_positions].tolist()
 
-        for matched_box_ind in matched_box_indices.tolist():
-            keep_to_merge_list[idx.tolist()].append(matched_box_ind)
-            print(keep_to_merge_list)
+    _record_merge(debug_trace, "greedy_nmm", keep_to_merge_list)
     return keep_to_merge_list
 
 
@@ -512,6 +504,8 @@ def batched_nmm(
     object_predictions_as_tensor: torch.tensor,
     match_metric: str = "IOU",
     match_threshold: float = 0.5,
+    grid_cell_size: float = None,
+    debug_trace: Optional[List[dict]] = None,
 ):
     """
     Apply non-maximum merging per category to avoid detecting too many
@@ -522,6 +516,8 @@ def batched_nmm(
         match_metric: (str) IOU or IOS
         match_threshold: (float) The overlap thresh for
             match metric.
+        grid_cell_size: (float) Cell size of the spatial index, see get_match_lists.
+        debug_trace: (List[dict]) If given, the keep to merge mapping is appended to it.
     Returns:
         keep_to_merge_list: (Dict[int:List[int]]) mapping from prediction indices
         to keep to a list of prediction indices to be merged.
@@ -530,12 +526,15 @@ def batched_nmm(
     keep_to_merge_list = {}
     for category_id in torch.unique(category_ids):
         curr_indices = torch.where(category_ids == category_id)[0]
-        curr_keep_to_merge_list = nmm(object_predictions_as_tensor[curr_indices], match_metric, match_threshold)
+        curr_keep_to_merge_list = nmm(
+            object_predictions_as_tensor[curr_indices], match_metric, match_threshold, grid_cell_size
+        )
         curr_indices_list = curr_indices.tolist()
         for curr_keep, curr_merge_list in curr_keep_to_merge_list.items():
             keep = curr_indices_list[curr_keep]
             merge_list = [curr_indices_list[curr_merge_ind] for curr_merge_ind in curr_merge_list]
             keep_to_merge_list[keep] = merge_list
+    _record_merge(debug_trace, "batched_nmm", keep_to_merge_list)
     return keep_to_merge_list
 
 
@@ -543,6 +542,8 @@ def nmm(
     object_predictions_as_tensor: torch.tensor,
     match_metric: str = "IOU",
     match_threshold: float = 0.5,
+    grid_cell_size: float = None,
+    debug_trace: Optional[List[dict]] = None,
 ):
     """
     Apply non-maximum merging to avoid detecting too many
@@ -555,6 +556,8 @@ def nmm(
         match_metric: (str) IOU or IOS
         match_threshold: (float) The overlap thresh for
             match metric.
+        grid_cell_size: (float) Cell size of the spatial index, see get_match_lists.
+        debug_trace: (List[dict]) If given, the keep to merge mapping is appended to it.
     Returns:
         keep_to_merge_list: (Dict[int:List[int]]) mapping from prediction indices
         to keep to a list of prediction indices to be merged.
@@ -562,133 +565,109 @@ def nmm(
     keep_to_merge_list = {}
     merge_to_keep = {}
 
-    # we extract coordinates for every
-    # prediction box present in P
-    x1 = object_predictions_as_tensor[:, 0]
-    y1 = object_predictions_as_tensor[:, 1]
-    x2 = object_predictions_as_tensor[:, 2]
-    y2 = object_predictions_as_tensor[:, 3]
-
     # we extract the confidence scores as well
     scores = object_predictions_as_tensor[:, 4]
 
-    # calculate area of every block in P
-    areas = (x2 - x1) * (y2 - y1)
-
     # sort the prediction boxes in P
     # according to their confidence scores
     order = scores.argsort(descending=True)
+    match_lists = get_match_lists(object_predictions_as_tensor[order], match_metric, match_threshold, grid_cell_size)
+    order = order.tolist()
 
-    for ind in range(len(object_predictions_as_tensor)):
-        # extract the index of the
-        # prediction with highest score
-        # we call this prediction S
-        #내림차순 인덱스
-        pred_ind = order[ind]
-        pred_ind = pred_ind.tolist()
-
-
-        # remove selected pred
-        other_pred_inds = order[order != pred_ind]#**
-        # print(" order[order != pred_ind]", order[order != pred_ind])
-        # print("order",order)
-        # print("pred_ind",pred_ind)
-        # print("other_pred_inds",other_pred_inds)
-
-        # select coordinates of BBoxes according to
-        # the indices in order
-        xx1 = torch.index_select(x1, dim=0, index=other_pred_inds)
-        xx2 = torch.index_select(x2, dim=0, index=other_pred_inds)
-        yy1 = torch.index_select(y1, dim=0, index=other_pred_inds)
-        yy2 = torch.index_select(y2, dim=0, index=other_pred_inds)
-
-        # find the coordinates of the intersection boxes
-        xx1 = torch.max(xx1, x1[pred_ind])
-        yy1 = torch.max(yy1, y1[pred_ind])
-        xx2 = torch.min(xx2, x2[pred_ind])
-        yy2 = torch.min(yy2, y2[pred_ind])
-
-        # find height and width of the intersection boxes
-        w = xx2 - xx1
-        h = yy2 - yy1
-
-        # take max with 0.0 to avoid negative w and h
-        # due to non-overlapping boxes
-        w = torch.clamp(w, min=0.0)
-        h = torch.clamp(h, min=0.0)
-
-        # find the intersection area
-        inter = w * h
-
-        # find the areas of BBoxes according the indices in order
-        rem_areas = torch.index_select(areas, dim=0, index=other_pred_inds)
-
-        if match_metric == "IOU":
-            # find the union of every prediction T in P
-            # with the prediction S
-            # Note that areas[idx] represents area of S
-            union = (rem_areas - inter) + areas[pred_ind]
-            # find the IoU of every prediction in P with S
-            match_metric_value = inter / union
-
-        elif match_metric == "IOS":
-            # find the smaller area of every prediction T in P
-            # with the prediction S
-            # Note that areas[idx] represents area of S
-            smaller = torch.min(rem_areas, areas[pred_ind])
-            # find the IoS of every prediction in P with S
-            match_metric_value = inter / smaller
-        else:
-            raise ValueError()
-
-        # keep the boxes with IoU/IoS less than thresh_iou
-        mask = match_metric_value < match_threshold
-        matched_box_indices = other_pred_inds[(mask == False).nonzero().flatten()].flip(dims=(0,))
+    for pos, pred_ind in enumerate(order):
+        # matched predictions of the prediction S, lowest score first
+        matched_box_indices = [order[matched_pos] for matched_pos in match_lists[pos][::-1].tolist()]
 
         # create keep_ind to merge_ind_list mapping
-
-        print("matched_box_indices", matched_box_indices)
         if pred_ind not in merge_to_keep:
             keep_to_merge_list[pred_ind] = []
-
-
-
-            for matched_box_ind in matched_box_indices.tolist():
+            for matched_box_ind in matched_box_indices:
                 if matched_box_ind not in merge_to_keep:
                     keep_to_merge_list[pred_ind].append(matched_box_ind)
                     merge_to_keep[matched_box_ind] = pred_ind
-
-
         else:
             keep = merge_to_keep[pred_ind]
-            for matched_box_ind in matched_box_indices.tolist():
+            for matched_box_ind in matched_box_indices:
                 if matched_box_ind not in keep_to_merge_list and matched_box_ind not in merge_to_keep:
                     keep_to_merge_list[keep].append(matched_box_ind)
                     merge_to_keep[matched_box_ind] = keep
-                    print("if keep",keep_to_merge_list)
 
+    _record_merge(debug_trace, "nmm", keep_to_merge_list)
     return keep_to_merge_list
 
 
 class PostprocessPredictions:
-    """Utilities for calculating IOU/IOS based match for given ObjectPredictions"""
+    """
+    Utilities for calculating IOU/IOS based match for given ObjectPredictions
+
+    When the logger of this module is enabled for DEBUG level, the suppression/merging
+    decisions of the last call are recorded in debug_trace as a list of dicts, e.g.
+    {"function": "nms", "keep": [...], "suppressed_by": {suppressed index: kept index}},
+    indices refer to the given object predictions. Otherwise debug_trace is None and
+    nothing is recorded.
+    """
     def __init__(
         self,
         match_threshold: float = 0.5,
         match_metric: str = "IOU",
         class_agnostic: bool = True,
         len_original:int = 0,
+        grid_cell_size: float = None,
     ):
         self.len_original=len_original#for original sort
+        self.grid_cell_size = grid_cell_size
         self.match_threshold = match_threshold
         self.class_agnostic = class_agnostic
         self.match_metric = match_metric
+        self.debug_trace: Optional[List[dict]] = None
 
         check_requirements(["torch"])
 
     def __call__(self):
         raise NotImplementedError()
 
+    def _start_debug_trace(self) -> Optional[List[dict]]:
+        """Resets debug_trace, returns None unless debug logging is enabled."""
+        self.debug_trace = [] if logger.isEnabledFor(logging.DEBUG) else None
+        return self.debug_trace
+
+    def _merge_predictions(
+        self, object_prediction_list: ObjectPredictionList, keep_to_merge_list: Dict[int, List[int]]
+    ):
+        """Merges the matching predictions of keep_to_merge_list into the kept ones."""
+        debug_trace = self.debug_trace
+        merged = {}
+        rejected = {}
+        selected_object_predictions = []
+        for keep_ind, merge_ind_list in keep_to_merge_list.items():
+            for merge_ind in merge_ind_list:
+                if has_match(
+                    object_prediction_list[keep_ind].tolist(),
+                    object_prediction_list[merge_ind].tolist(),
+                    self.match_metric,
+                    self.match_threshold,
+                ):
+                    object_prediction_list[keep_ind] = merge_object_prediction_pair(
+                        object_prediction_list[keep_ind].tolist(), object_prediction_list[merge_ind].tolist()
+                    )
+                    if debug_trace is not None:
+                        merged.setdefault(keep_ind, []).append(merge_ind)
+                elif debug_trace is not None:
+                    # the grown kept box may not match the later ones anymore
+                    rejected.setdefault(keep_ind, []).append(merge_ind)
+            selected_object_predictions.append(object_prediction_list[keep_ind].tolist())
+
+        if debug_trace is not None:
+            debug_trace.append({"function": "merge_object_prediction_pair", "merged": merged, "rejected": rejected})
+        return selected_object_predictions
+
+    def _log_debug_summary(self, num_predictions: int, num_selected_predictions: int):
+        if self.debug_trace is not None:
+            logger.debug(
+                f"{type(self).__name__} selected {num_selected_predictions} of {num_predictions} predictions, "
+                "see its debug_trace for the decisions."
+            )
+
 
 class NMSPostprocess(PostprocessPredictions):
     def __call__(
@@ -696,45 +675,34 @@ class NMSPostprocess(PostprocessPredictions):
         object_predictions: List[ObjectPrediction],
         len_original: int=0,
     ):
+        debug_trace = self._start_debug_trace()
         object_prediction_list = ObjectPredictionList(object_predictions)
         object_predictions_as_torch = object_prediction_list.totensor()
 
+        self.len_original=len_original
 
-        self.len_original=len_original#값 지정
-
-
-        #임시
         if self.class_agnostic:
             keep = nms(
                 object_predictions_as_torch,
                 match_threshold=self.match_threshold,
-                match_metric=self.match_metric
+                match_metric=self.match_metric,
+                debug_trace=debug_trace,
             )
         else:
-            #이 구문 발생
-            #print("first object_predictions_as_torch",object_predictions_as_torch)
             keep = batched_nms(
-                object_predictions_as_torch, match_threshold=self.match_threshold, match_metric=self.match_metric,
+                object_predictions_as_torch,
+                match_threshold=self.match_threshold,
+                match_metric=self.match_metric,
                 len_original=self.len_original,
+                debug_trace=debug_trace,
             )
-            # print("Post_keep",keep)
-
-
-        #keep = list(range(input_len))
 
         selected_object_predictions = object_prediction_list[keep].tolist()
 
-        #print("post selected_object_predictions------",selected_object_predictions)
-
-
-        #한번더 nms태우기
-        # object_predictions_as_torch2 = ObjectPredictionList(selected_object_predictions).totensor()
-        # keep = batched_nms(object_predictions_as_torch2,match_threshold=0.2, match_metric=self.match_metric)
-        # selected_object_predictions = object_prediction_list[keep].tolist()
-
         if not isinstance(selected_object_predictions, list):
             selected_object_predictions = [selected_object_predictions]
 
+        self._log_debug_summary(len(object_predictions), len(selected_object_predictions))
         return selected_object_predictions
 
 
@@ -742,7 +710,9 @@ class NMMPostprocess(PostprocessPredictions):
     def __call__(
         self,
         object_predictions: List[ObjectPrediction],
+        len_original: int = 0,
     ):
+        debug_trace = self._start_debug_trace()
         object_prediction_list = ObjectPredictionList(object_predictions)
         object_predictions_as_torch = object_prediction_list.totensor()
         if self.class_agnostic:
@@ -750,30 +720,21 @@ class NMMPostprocess(PostprocessPredictions):
                 object_predictions_as_torch,
                 match_threshold=self.match_threshold,
                 match_metric=self.match_metric,
+                grid_cell_size=self.grid_cell_size,
+                debug_trace=debug_trace,
             )
         else:
             keep_to_merge_list = batched_nmm(
                 object_predictions_as_torch,
                 match_threshold=self.match_threshold,
                 match_metric=self.match_metric,
+                grid_cell_size=self.grid_cell_size,
+                debug_trace=debug_trace,
             )
 
-        selected_object_predictions = []
-        for keep_ind, merge_ind_list in keep_to_merge_list.items():
+        selected_object_predictions = self._merge_predictions(object_prediction_list, keep_to_merge_list)
 
-            for merge_ind in merge_ind_list:
-                if has_match(#매치 체크
-                    object_prediction_list[keep_ind].tolist(), #true
-                    object_prediction_list[merge_ind].tolist(), #false
-                    self.match_metric,
-                    self.match_threshold,
-                ):
-                    object_prediction_list[keep_ind] = merge_object_prediction_pair(
-                        object_prediction_list[keep_ind].tolist(), object_prediction_list[merge_ind].tolist()
-                    )
-            selected_object_predictions.append(object_prediction_list[keep_ind].tolist())
-
-#        print(selected_object_predictions)
+        self._log_debug_summary(len(object_predictions), len(selected_object_predictions))
         return selected_object_predictions
 
 
@@ -781,7 +742,9 @@ class GreedyNMMPostprocess(PostprocessPredictions):
     def __call__(
         self,
         object_predictions: List[ObjectPrediction],
+        len_original: int = 0,
     ):
+        debug_trace = self._start_debug_trace()
         object_prediction_list = ObjectPredictionList(object_predictions)
         object_predictions_as_torch = object_prediction_list.totensor()
         if self.class_agnostic:
@@ -789,30 +752,21 @@ class GreedyNMMPostprocess(PostprocessPredictions):
                 object_predictions_as_torch,
                 match_threshold=self.match_threshold,
                 match_metric=self.match_metric,
+                grid_cell_size=self.grid_cell_size,
+                debug_trace=debug_trace,
             )
         else:
             keep_to_merge_list = batched_greedy_nmm(
                 object_predictions_as_torch,
                 match_threshold=self.match_threshold,
                 match_metric=self.match_metric,
+                grid_cell_size=self.grid_cell_size,
+                debug_trace=debug_trace,
             )
 
-        selected_object_predictions = []
-        for keep_ind, merge_ind_list in keep_to_merge_list.items():
-            for merge_ind in merge_ind_list:
-                if has_match(
-                    object_prediction_list[keep_ind].tolist(),
-                    object_prediction_list[merge_ind].tolist(),
-                    self.match_metric,
-                    self.match_threshold,
-                ):
-                    object_prediction_list[keep_ind] = merge_object_prediction_pair(
-                        object_prediction_list[keep_ind].tolist(), object_prediction_list[merge_ind].tolist()
-                    )
-
-            selected_object_predictions.append(object_prediction_list[keep_ind].tolist())
+        selected_object_predictions = self._merge_predictions(object_prediction_list, keep_to_merge_list)
 
-       # print(selected_object_predictions)
+        self._log_debug_summary(len(object_predictions), len(selected_object_predictions))
         return selected_object_predictions
 
 
@@ -850,3 +804,120 @@ class LSNMSPostprocess(PostprocessPredictions):
             selected_object_predictions = [selected_object_predictions]
 
         return selected_object_predictions
+
+
+class WindowedPostprocess:
+    """
+    Merges the predictions of the slices of an image while the slices are predicted in the
+    raster order of get_slice_bboxes. Only the active predictions are postprocessed, a prediction
+    is finalized once no remaining slice overlaps it, since the predictions of a slice lie inside
+    the slice. So the merge cost and the active predictions are bounded by about one row of slices,
+    instead of growing with the predictions of the whole image.
+
+    Example:
+        windowed_postprocess = WindowedPostprocess(postprocess, slice_plan.slice_bboxes, merge_buffer_length=100)
+        for slice_object_prediction_list in slice_object_prediction_lists:
+            windowed_postprocess.add([slice_object_prediction_list])
+        object_prediction_list = windowed_postprocess.finish(standard_object_prediction_list)
+    """
+
+    def __init__(
+        self,
+        postprocess: PostprocessPredictions,
+        slice_bboxes: List[List[int]],
+        merge_buffer_length: int = 0,
+    ):
+        """
+        Args:
+            postprocess: PostprocessPredictions
+                Postprocess applied to the active predictions
+            slice_bboxes: List[List[int]]
+                Slices of the image in prediction order, as [xmin, ymin, xmax, ymax]
+            merge_buffer_length: int
+                Active predictions are merged and finalized once there are more than merge_buffer_length
+                of them, 0 merges after each added batch of slices.
+        """
+        self.postprocess = postprocess
+        self.slice_bboxes = np.asarray(slice_bboxes, dtype=np.float64).reshape(-1, 4)
+        self.merge_buffer_length = merge_buffer_length
+        self.num_added_slices = 0
+        self.active_object_predictions: List[ObjectPrediction] = []
+        self.final_object_predictions: List[ObjectPrediction] = []
+
+    def add(self, slice_object_prediction_lists: List[List[ObjectPrediction]]):
+        """Adds the shifted predictions of the next slices, in the order of slice_bboxes."""
+        for slice_object_prediction_list in slice_object_prediction_lists:
+            self.active_object_predictions.extend(slice_object_prediction_list)
+        self.num_added_slices += len(slice_object_prediction_lists)
+        if len(self.active_object_predictions) > self.merge_buffer_length:
+            self.active_object_predictions = self.postprocess(self.active_object_predictions)
+            self._finalize()
+
+    def _finalize(self):
+        # merged predictions that no remaining slice overlaps are not changed by the later merges
+        overlaps = self._overlaps_any(
+            self._get_boxes(self.active_object_predictions), self.slice_bboxes[self.num_added_slices :]
+        )
+        self.final_object_predictions.extend(
+            object_prediction
+            for object_prediction, is_active in zip(self.active_object_predictions, overlaps)
+            if not is_active
+        )
+        self.active_object_predictions = [
+            object_prediction
+            for object_prediction, is_active in zip(self.active_object_predictions, overlaps)
+            if is_active
+        ]
+
+    @staticmethod
+    def _get_boxes(object_predictions: List[ObjectPrediction]) -> np.ndarray:
+        boxes = [object_prediction.bbox.to_voc_bbox() for object_prediction in object_predictions]
+        return np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+
+    @staticmethod
+    def _overlaps_any(boxes: np.ndarray, other_boxes: np.ndarray) -> np.ndarray:
+        """Returns whether each of boxes overlaps any of other_boxes, touching boxes do not overlap."""
+        return (
+            (boxes[:, None, 0] < other_boxes[None, :, 2])
+            & (boxes[:, None, 1] < other_boxes[None, :, 3])
+            & (boxes[:, None, 2] > other_boxes[None, :, 0])
+            & (boxes[:, None, 3] > other_boxes[None, :, 1])
+        ).any(axis=1)
+
+    def finish(self, object_predictions: Optional[List[ObjectPrediction]] = None, len_original: int = 0):
+        """
+        Merges the active predictions with the given full image predictions (e.g. of the standard
+        prediction), and returns all predictions. The finalized predictions that overlap the given
+        ones are merged again, others are returned as is.
+
+        Args:
+            object_predictions: List[ObjectPrediction]
+                Predictions to be merged with the sliced predictions, placed at the end as in
+                get_sliced_prediction
+            len_original: int
+                Passed to the postprocess
+        """
+        object_predictions = object_predictions or []
+        final_object_predictions = self.final_object_predictions
+        merged_object_predictions = []
+        if object_predictions:
+            overlaps = self._overlaps_any(
+                self._get_boxes(final_object_predictions), self._get_boxes(object_predictions)
+            )
+            merged_object_predictions = [
+                object_prediction
+                for object_prediction, overlap in zip(final_object_predictions, overlaps)
+                if overlap
+            ]
+            final_object_predictions = [
+                object_prediction
+                for object_prediction, overlap in zip(final_object_predictions, overlaps)
+                if not overlap
+            ]
+        merged_object_predictions += self.active_object_predictions + object_predictions
+        if len(merged_object_predictions) > 1:
+            merged_object_predictions = self.postprocess(merged_object_predictions, len_original)
+
+        self.active_object_predictions = []
+        self.final_object_predictions = []
+        return final_object_predictions + merged_object_predictions
@@ -1,26 +1,79 @@
+from __future__ import annotations
+
 from collections.abc import Sequence
-from typing import List, Union
+from typing import List, Optional, Tuple, Union
 
 import numpy as np
-import torch
 
-from sahi.annotation import BoundingBox, Category, Mask
+from sahi.annotation import BoundingBox, Category, Mask, use_rle
 from sahi.prediction import ObjectPrediction
+from sahi.utils.import_utils import lazy_import
+
+if use_rle:
+    from pycocotools import mask as mask_utils
+
+torch = lazy_import("torch")
 
 
 class ObjectPredictionList(Sequence):
-    def __init__(self, list):
-        self.list = list
+    """
+    Columnar list of ObjectPredictions. Boxes, scores and category ids are stored in a single
+    contiguous N x [x1, y1, x2, y2, score, category_id] array, ObjectPrediction objects are
+    only created when an individual item is requested.
+    """
+
+    def __init__(self, list: Optional[List[ObjectPrediction]] = None, array: Optional[np.ndarray] = None):
+        """
+        Args:
+            list: List[ObjectPrediction]
+                Object predictions to be stored.
+            array: np.ndarray
+                N x [x1, y1, x2, y2, score, category_id] array of the predictions. Items that are
+                None in list are created from it on access. Computed from list if not given.
+        """
+        if list is None:
+            list = [None] * (0 if array is None else len(array))
+        if array is None:
+            array = object_predictions_to_array(list)
+        else:
+            array = np.ascontiguousarray(array, dtype=np.float32).reshape(-1, 6)
+        if len(list) != len(array):
+            raise ValueError(f"list and array lengths do not match: {len(list)} != {len(array)}")
+        self._list = list
+        self._array = array
         super().__init__()
 
+    @classmethod
+    def from_array(cls, array: np.ndarray):
+        """
+        Creates an ObjectPredictionList from a N x [x1, y1, x2, y2, score, category_id] array
+        without creating any ObjectPrediction.
+        """
+        return cls(array=array)
+
+    def _get_object_prediction(self, i: int) -> ObjectPrediction:
+        object_prediction = self._list[i]
+        if object_prediction is None:
+            x1, y1, x2, y2, score, category_id = self._array[i].tolist()
+            object_prediction = ObjectPrediction(
+                bbox=[x1, y1, x2, y2],
+                category_id=int(category_id),
+                score=score,
+            )
+            self._list[i] = object_prediction
+        return object_prediction
+
     def __getitem__(self, i):
         if torch.is_tensor(i) or isinstance(i, np.ndarray):
             i = i.tolist()
         if isinstance(i, int):
-            return ObjectPredictionList([self.list[i]])
+            # negative indices are normalized for the array slice
+            i = range(len(self))[i]
+            return ObjectPredictionList([self._get_object_prediction(i)], self._array[i : i + 1])
         elif isinstance(i, (tuple, list)):
-            accessed_mapping = map(self.list.__getitem__, i)
-            return ObjectPredictionList(list(accessed_mapping))
+            i = list(i)
+            accessed_mapping = map(self._list.__getitem__, i)
+            return ObjectPredictionList(list(accessed_mapping), self._array[i])
         else:
             raise NotImplementedError(f"{type(i)}")
 
@@ -28,53 +81,67 @@ class ObjectPredictionList(Sequence):
         if torch.is_tensor(i) or isinstance(i, np.ndarray):
             i = i.tolist()
         if isinstance(i, int):
-            self.list[i] = elem
-        elif isinstance(i, (tuple, list)):
-            if len(i) != len(elem):
-                raise ValueError()
-            if isinstance(elem, ObjectPredictionList):
-                for ind, el in enumerate(elem.list):
-                    self.list[i[ind]] = el
-            else:
-                for ind, el in enumerate(elem):
-                    self.list[i[ind]] = el
-        else:
+            i = [i]
+            elem = [elem]
+        elif not isinstance(i, (tuple, list)):
             raise NotImplementedError(f"{type(i)}")
+        if isinstance(elem, ObjectPredictionList):
+            elem = elem.list
+        if len(i) != len(elem):
+            raise ValueError()
+        for ind, el in zip(i, elem):
+            self._list[ind] = el
+        self._array[list(i)] = object_predictions_to_array(elem)
 
     def __len__(self):
-        return len(self.list)
+        return len(self._list)
 
     def __str__(self):
         return str(self.list)
 
+    @property
+    def list(self) -> List[ObjectPrediction]:
+        return [self._get_object_prediction(ind) for ind in range(len(self))]
+
     def extend(self, object_prediction_list):
-        self.list.extend(object_prediction_list.list)
+        self._list.extend(object_prediction_list._list)
+        self._array = np.concatenate([self._array, object_prediction_list._array])
 
-    def totensor(self):
-        return object_prediction_list_to_torch(self)
+    def totensor(self) -> torch.tensor:
+        """Returns the predictions as a N x 6 tensor sharing memory with the list"""
+        return torch.from_numpy(self._array)
 
-    def tonumpy(self):
-        return object_prediction_list_to_numpy(self)
+    def tonumpy(self) -> np.ndarray:
+        """Returns the predictions as a N x 6 array sharing memory with the list"""
+        return self._array
 
     def tolist(self):
-        if len(self.list) == 1:
-            return self.list[0]
+        if len(self) == 1:
+            return self._get_object_prediction(0)
         else:
             return self.list
 
 
+def object_predictions_to_array(object_predictions: List[ObjectPrediction]) -> np.ndarray:
+    """
+    Returns:
+        np.ndarray of size N x [x1, y1, x2, y2, score, category_id]
+    """
+    rows = [
+        [*object_prediction.bbox.to_voc_bbox(), object_prediction.score.value, object_prediction.category.id]
+        for object_prediction in object_predictions
+    ]
+    return np.array(rows, dtype=np.float32).reshape(-1, 6)
+
+
 def object_prediction_list_to_torch(object_prediction_list: ObjectPredictionList) -> torch.tensor:
     """
     Returns:
         torch.tensor of size N x [x1, y1, x2, y2, score, category_id]
     """
-    num_predictions = len(object_prediction_list)
-    torch_predictions = torch.zeros([num_predictions, 6], dtype=torch.float32)
-    for ind, object_prediction in enumerate(object_prediction_list):
-        torch_predictions[ind, :4] = torch.tensor(object_prediction.tolist().bbox.to_voc_bbox(), dtype=torch.int32)
-        torch_predictions[ind, 4] = object_prediction.tolist().score.value
-        torch_predictions[ind, 5] = object_prediction.tolist().category.id
-    return torch_predictions
+    if not isinstance(object_prediction_list, ObjectPredictionList):
+        object_prediction_list = ObjectPredictionList(object_prediction_list)
+    return object_prediction_list.totensor()
 
 
 def object_prediction_list_to_numpy(object_prediction_list: ObjectPredictionList) -> np.ndarray:
@@ -82,13 +149,9 @@ def object_prediction_list_to_numpy(object_prediction_list: ObjectPredictionList
     Returns:
         np.ndarray of size N x [x1, y1, x2, y2, score, category_id]
     """
-    num_predictions = len(object_prediction_list)
-    numpy_predictions = np.zeros([num_predictions, 6], dtype=np.float32)
-    for ind, object_prediction in enumerate(object_prediction_list):
-        numpy_predictions[ind, :4] = np.array(object_prediction.tolist().bbox.to_voc_bbox(), dtype=np.int32)
-        numpy_predictions[ind, 4] = object_prediction.tolist().score.value
-        numpy_predictions[ind, 5] = object_prediction.tolist().category.id
-    return numpy_predictions
+    if not isinstance(object_prediction_list, ObjectPredictionList):
+        object_prediction_list = ObjectPredictionList(object_prediction_list)
+    return object_prediction_list.tonumpy()
 
 
 def calculate_box_union(box1: Union[List[int], np.ndarray], box2: Union[List[int], np.ndarray]) -> List[int]:
@@ -124,6 +187,68 @@ def calculate_intersection_area(box1: np.ndarray, box2: np.ndarray) -> float:
     return width_height[0] * width_height[1]
 
 
+def get_overlapping_pairs(boxes: np.ndarray, cell_size: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Finds all box pairs with a positive intersection area using a uniform grid,
+    only boxes sharing a grid cell are compared.
+    Args:
+        boxes (np.ndarray): np.array of shape [num_boxes, 4] as [x1, y1, x2, y2]
+        cell_size (float): side length of the square grid cells, e.g. the slice size
+    Returns:
+        (first_indices, second_indices): index arrays of the overlapping pairs, first_indices < second_indices
+    """
+    boxes = np.asarray(boxes, dtype=np.float64)
+    num_boxes = len(boxes)
+    empty = np.zeros(0, dtype=np.int64)
+    if num_boxes < 2:
+        return empty, empty
+    if cell_size <= 0:
+        raise ValueError(f"cell_size should be positive but given as {cell_size}")
+
+    # find the grid cells covered by every box
+    cells = np.floor(boxes[:, :4] / cell_size).astype(np.int64)
+    num_cols = cells[:, 2] - cells[:, 0] + 1
+    num_rows = cells[:, 3] - cells[:, 1] + 1
+    num_cells = num_cols * num_rows
+
+    # expand to one (cell, box) entry per covered cell
+    box_ids = np.repeat(np.arange(num_boxes), num_cells)
+    offsets = np.arange(len(box_ids)) - np.repeat(np.cumsum(num_cells) - num_cells, num_cells)
+    cell_x = cells[box_ids, 0] + offsets % num_cols[box_ids]
+    cell_y = cells[box_ids, 1] + offsets // num_cols[box_ids]
+
+    # group the entries by cell, boxes are sorted by id inside a cell
+    order = np.lexsort((box_ids, cell_y, cell_x))
+    box_ids, cell_x, cell_y = box_ids[order], cell_x[order], cell_y[order]
+    num_entries = len(box_ids)
+    is_cell_start = np.ones(num_entries, dtype=bool)
+    is_cell_start[1:] = (cell_x[1:] != cell_x[:-1]) | (cell_y[1:] != cell_y[:-1])
+    cell_starts = np.flatnonzero(is_cell_start)
+    cell_ends = np.append(cell_starts[1:], num_entries)
+    entry_cell_ends = cell_ends[np.cumsum(is_cell_start) - 1]
+
+    # pair every entry with the following entries of the same cell
+    num_partners = entry_cell_ends - np.arange(num_entries) - 1
+    first_entries = np.repeat(np.arange(num_entries), num_partners)
+    partner_offsets = np.arange(len(first_entries)) - np.repeat(np.cumsum(num_partners) - num_partners, num_partners)
+    second_entries = first_entries + 1 + partner_offsets
+
+    # boxes sharing several cells are paired once
+    pair_keys = np.unique(box_ids[first_entries] * num_boxes + box_ids[second_entries])
+    first_indices = pair_keys // num_boxes
+    second_indices = pair_keys % num_boxes
+
+    # keep the pairs that actually intersect
+    inter_w = np.minimum(boxes[first_indices, 2], boxes[second_indices, 2]) - np.maximum(
+        boxes[first_indices, 0], boxes[second_indices, 0]
+    )
+    inter_h = np.minimum(boxes[first_indices, 3], boxes[second_indices, 3]) - np.maximum(
+        boxes[first_indices, 1], boxes[second_indices, 1]
+    )
+    overlapping = (inter_w > 0) & (inter_h > 0)
+    return first_indices[overlapping], second_indices[overlapping]
+
+
 def calculate_bbox_iou(pred1: ObjectPrediction, pred2: ObjectPrediction) -> float:
     """Returns the ratio of intersection area to the union"""
     box1 = np.array(pred1.bbox.to_voc_bbox())
@@ -160,9 +285,42 @@ def has_match(
 def get_merged_mask(pred1: ObjectPrediction, pred2: ObjectPrediction) -> Mask:
     mask1 = pred1.mask
     mask2 = pred2.mask
-    union_mask = np.logical_or(mask1.bool_mask, mask2.bool_mask)
-    return Mask(
-        bool_mask=union_mask,
+    if use_rle:
+        # union of the rles over the union of the crops, without decoding
+        masks = [mask for mask in (mask1, mask2) if mask.crop_shape[0] > 0]
+        if not masks:
+            return Mask.from_cropped_bool_mask(
+                np.zeros((0, 0), dtype=bool),
+                [0, 0],
+                shape=mask1.shape,
+                full_shape=mask1.full_shape,
+                shift_amount=mask1.shift_amount,
+            )
+        minx = min(mask.crop_offset[0] for mask in masks)
+        miny = min(mask.crop_offset[1] for mask in masks)
+        maxx = max(mask.crop_offset[0] + mask.crop_shape[1] for mask in masks)
+        maxy = max(mask.crop_offset[1] + mask.crop_shape[0] for mask in masks)
+        frame_offset, frame_shape = [minx, miny], [maxy - miny, maxx - minx]
+        union_rle = mask_utils.merge([mask.get_rle_in_frame(frame_offset, frame_shape) for mask in masks])
+        return Mask.from_rle(
+            union_rle, frame_offset, shape=mask1.shape, full_shape=mask1.full_shape, shift_amount=mask1.shift_amount
+        )
+    # union of the crops over their bounding region, clipped to the mask
+    crops = [(mask.cropped_bool_mask, mask.crop_offset) for mask in (mask1, mask2)]
+    crops = [(crop, crop_offset) for crop, crop_offset in crops if crop.size > 0]
+    height, width = mask1.shape
+    minx = min([crop_x for _, (crop_x, _) in crops], default=0)
+    miny = min([crop_y for _, (_, crop_y) in crops], default=0)
+    maxx = min(max([crop_x + crop.shape[1] for crop, (crop_x, _) in crops], default=0), width)
+    maxy = min(max([crop_y + crop.shape[0] for crop, (_, crop_y) in crops], default=0), height)
+    union_mask = np.zeros((max(maxy - miny, 0), max(maxx - minx, 0)), dtype=bool)
+    for crop, (crop_x, crop_y) in crops:
+        crop = crop[: maxy - crop_y, : maxx - crop_x]
+        union_mask[crop_y - miny : crop_y - miny + crop.shape[0], crop_x - minx : crop_x - minx + crop.shape[1]] |= crop
+    return Mask.from_cropped_bool_mask(
+        union_mask,
+        crop_offset=[minx, miny],
+        shape=mask1.shape,
         full_shape=mask1.full_shape,
         shift_amount=mask1.shift_amount,
     )
@@ -200,17 +358,16 @@ def merge_object_prediction_pair(
     merged_category: Category = get_merged_category(pred1, pred2)
     if pred1.mask and pred2.mask:
         merged_mask: Mask = get_merged_mask(pred1, pred2)
-        bool_mask = merged_mask.bool_mask
         full_shape = merged_mask.full_shape
     else:
-        bool_mask = None
+        merged_mask = None
         full_shape = None
     return ObjectPrediction(
         bbox=merged_bbox.to_voc_bbox(),
         score=merged_score,
         category_id=merged_category.id,
         category_name=merged_category.name,
-        bool_mask=bool_mask,
         shift_amount=shift_amount,
         full_shape=full_shape,
+        mask=merged_mask,
     )
@@ -1,16 +1,14 @@
 # OBSS SAHI Tool
 # Code written by Fatih C Akyon, 2020.
 
+import collections
+import hashlib
+import itertools
 import logging
 import os
 import time
-from typing import List, Optional
-
-from utils.import_utils import is_available
-
-# https://github.com/obss/sahi/issues/526
-if is_available("torch"):
-    import torch
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional
 
 import numpy as np
 from tqdm import tqdm
@@ -23,9 +21,10 @@ from postprocess.combine import (
     NMMPostprocess,
     NMSPostprocess,
     PostprocessPredictions,
+    WindowedPostprocess,
 )
 from prediction import ObjectPrediction, PredictionResult
-from slicing import slice_image
+from slicing import get_slice_plan, iter_slices, slice_image
 from utils.coco import Coco, CocoImage
 from utils.cv import (
     IMAGE_EXTENSIONS,
@@ -33,11 +32,13 @@ from utils.cv import (
     crop_object_predictions,
     cv2,
     get_video_reader,
+    open_image_window_reader,
     read_image_as_pil,
     visualize_object_predictions,
 )
-from utils.file import Path, increment_path, list_files, save_json, save_pickle
+from utils.file import DiskLRUCache, ExportWriter, Path, increment_path, list_files, save_json, save_pickle
 from utils.import_utils import check_requirements
+from utils.profiling import PIPELINE_STAGES, Profiler
 
 POSTPROCESS_NAME_TO_CLASS = {
     "GREEDYNMM": GreedyNMMPostprocess,
@@ -59,6 +60,7 @@ def get_prediction(
     full_shape=None,
     postprocess: Optional[PostprocessPredictions] = None,
     verbose: int = 0,
+    profiler: Optional[Profiler] = None,
 ) -> PredictionResult:
     """
     Function for performing prediction for given image using given detection_model.
@@ -76,37 +78,41 @@ def get_prediction(
         verbose: int
             0: no print (default)
             1: print prediction duration
+        profiler: sahi.utils.profiling.Profiler
+            If given, decode, infer, convert and merge spans are recorded in it.
 
     Returns:
         A dict with fields:
             object_prediction_list: a list of ObjectPrediction
             durations_in_seconds: a dict containing elapsed times for profiling
     """
+    if profiler is None:
+        profiler = Profiler()
     durations_in_seconds = dict()
 
     # read image as pil
-    image_as_pil = read_image_as_pil(image)
+    with profiler.span("decode"):
+        image_as_pil = read_image_as_pil(image)
     # get prediction
-    time_start = time.time()
-    detection_model.perform_inference(np.ascontiguousarray(image_as_pil))
-    time_end = time.time() - time_start
-    durations_in_seconds["prediction"] = time_end
+    with profiler.span("infer", batch_size=1) as infer_span:
+        detection_model.perform_inference(np.ascontiguousarray(image_as_pil))
+    durations_in_seconds["prediction"] = infer_span.duration
 
     # process prediction
-    time_start = time.time()
-    # works only with 1 batch
-    detection_model.convert_original_predictions(
-        shift_amount=shift_amount,
-        full_shape=full_shape,
-    )
+    with profiler.span("convert") as convert_span:
+        # works only with 1 batch
+        detection_model.convert_original_predictions(
+            shift_amount=shift_amount,
+            full_shape=full_shape,
+        )
     object_prediction_list: List[ObjectPrediction] = detection_model.object_prediction_list
+    durations_in_seconds["postprocess"] = convert_span.duration
 
     # postprocess matching predictions
     if postprocess is not None:
-        object_prediction_list = postprocess(object_prediction_list,len_original=len(object_prediction_list))
-
-    time_end = time.time() - time_start
-    durations_in_seconds["postprocess"] = time_end
+        with profiler.span("merge", num_predictions=len(object_prediction_list)) as merge_span:
+            object_prediction_list = postprocess(object_prediction_list,len_original=len(object_prediction_list))
+        durations_in_seconds["postprocess"] += merge_span.duration
 
     if verbose == 1:
         print(
@@ -120,6 +126,116 @@ def get_prediction(
     )
 
 
+def get_batch_prediction(
+    image_list: List,
+    detection_model,
+    shift_amount_list: List[List[int]],
+    full_shape_list: Optional[List[List[int]]] = None,
+    verbose: int = 0,
+    profiler: Optional[Profiler] = None,
+) -> List[PredictionResult]:
+    """
+    Function for performing prediction for a batch of images using given detection_model
+    in a single forward pass.
+
+    Arguments:
+        image_list: list of str or np.ndarray
+            Locations of images or numpy image matrices to be predicted
+        detection_model: model.DetectionModel
+            Detection model whose perform_inference supports list inputs
+        shift_amount_list: List[List]
+            To shift the box and mask predictions from sliced images to full
+            sized image, should be in the form of [[shift_x, shift_y], ...]
+        full_shape_list: List[List]
+            Size of the full image for each image, should be in the form of [[height, width], ...]
+        verbose: int
+            0: no print (default)
+            1: print prediction duration
+        profiler: sahi.utils.profiling.Profiler
+            If given, decode, infer and convert spans are recorded in it.
+
+    Returns:
+        A list of PredictionResult, one for each image in image_list
+    """
+    if profiler is None:
+        profiler = Profiler()
+    durations_in_seconds = dict()
+
+    # read images as pil
+    with profiler.span("decode"):
+        image_as_pil_list = [read_image_as_pil(image) for image in image_list]
+    # get prediction
+    with profiler.span("infer", batch_size=len(image_as_pil_list)) as infer_span:
+        detection_model.perform_inference([np.ascontiguousarray(image_as_pil) for image_as_pil in image_as_pil_list])
+    durations_in_seconds["prediction"] = infer_span.duration
+
+    # process prediction
+    with profiler.span("convert") as convert_span:
+        detection_model.convert_original_predictions(
+            shift_amount=shift_amount_list,
+            full_shape=full_shape_list,
+        )
+    object_prediction_list_per_image: List[List[ObjectPrediction]] = detection_model.object_prediction_list_per_image
+    durations_in_seconds["postprocess"] = convert_span.duration
+
+    if verbose == 1:
+        print(
+            "Batch prediction performed in",
+            durations_in_seconds["prediction"],
+            "seconds.",
+        )
+
+    return [
+        PredictionResult(
+            image=image_as_pil, object_prediction_list=object_prediction_list, durations_in_seconds=durations_in_seconds
+        )
+        for image_as_pil, object_prediction_list in zip(image_as_pil_list, object_prediction_list_per_image)
+    ]
+
+
+def _get_detection_model_identity(detection_model) -> str:
+    """Returns a description of the settings that change the predictions of a detection model."""
+    identity = [
+        type(detection_model).__module__,
+        type(detection_model).__qualname__,
+        getattr(detection_model, "model_path", None),
+        getattr(detection_model, "config_path", None),
+        getattr(detection_model, "confidence_threshold", None),
+        getattr(detection_model, "mask_threshold", None),
+        getattr(detection_model, "image_size", None),
+        getattr(detection_model, "category_mapping", None),
+        getattr(detection_model, "category_remapping", None),
+    ]
+    # retrained weights are often saved to the same path
+    model_path = getattr(detection_model, "model_path", None)
+    if isinstance(model_path, str) and os.path.isfile(model_path):
+        stat = os.stat(model_path)
+        identity.extend([stat.st_size, stat.st_mtime_ns])
+    return repr(identity)
+
+
+def get_prediction_cache_key(image: np.ndarray, detection_model, shift_amount: list = [0, 0], full_shape=None) -> str:
+    """
+    Returns the key of the predictions of an image or slice in a prediction cache. The key is a hash of
+    the image content, the position of the slice in the full image and the detection model settings.
+
+    Arguments:
+        image: np.ndarray
+            Image or slice given to the detection model
+        detection_model: model.DetectionModel
+        shift_amount: List
+            Position of the slice in the full image, in the form of [shift_x, shift_y]
+        full_shape: List
+            Size of the full image, in the form of [height, width]
+    """
+    image = np.ascontiguousarray(image)
+    key_hash = hashlib.sha1()
+    key_hash.update(repr([image.shape, image.dtype.str, list(shift_amount), full_shape]).encode())
+    key_hash.update(_get_detection_model_identity(detection_model).encode())
+    key_hash.update(image.data)
+    return key_hash.hexdigest()
+
+
 def get_sliced_prediction(
     image,
     detection_model=None,
@@ -135,14 +251,19 @@ def get_sliced_prediction(
     verbose: int = 1,
     merge_buffer_length: int = None,
     auto_slice_resolution: bool = True,
-    len_original:int=0#임시
+    batch_size: int = 1,
+    postprocess_spatial_index: bool = False,
+    stream_slices: bool = False,
+    prediction_cache: Optional[DiskLRUCache] = None,
+    len_original:int=0,
+    profiler: Optional[Profiler] = None,
 ) -> PredictionResult:
     """
     Function for slice image + get predicion for each slice + combine predictions in full image.
 
     Args:
-        image: str or np.ndarray
-            Location of image or numpy image matrix to slice
+        image: str, np.ndarray or utils.cv.ImageWindowReader
+            Location of image, numpy image matrix or an opened window reader to slice
         detection_model: model.DetectionModel
         slice_height: int
             Height of each slice.  Defaults to ``None``.
@@ -176,37 +297,99 @@ def get_sliced_prediction(
             2: print number of slices and slice/prediction durations
         merge_buffer_length: int
             The length of buffer for slices to be used during sliced prediction, which is suitable for low memory.
-            It may affect the AP if it is specified. The higher the amount, the closer results to the non-buffered.
-            scenario. See [the discussion](https://github.com/obss/sahi/pull/445).
+            Once there are more predictions than merge_buffer_length, they are merged and the ones that no
+            remaining slice overlaps are finalized, see postprocess.combine.WindowedPostprocess. So each merge
+            covers about one row of slices. It may affect the AP if it is specified. The higher the amount, the
+            closer results to the non-buffered scenario. See [the discussion](https://github.com/obss/sahi/pull/445).
         auto_slice_resolution: bool
             if slice parameters (slice_height, slice_width) are not given,
             it enables automatically calculate these params from image resolution and orientation.
+        batch_size: int
+            Number of slices to be predicted in a single forward pass. Values greater than 1 require
+            the detection model to accept a list of images in perform_inference. Default: 1.
+        postprocess_spatial_index: bool
+            If True, NMM/GREEDYNMM postprocess only compares predictions that share a cell of
+            a slice sized uniform grid, which speeds up merging of large prediction lists.
+        stream_slices: bool
+            If True, slices are read lazily with iter_slices instead of being created upfront, only
+            one batch of slices is held in memory. Memory mapped .npy and tiled/uncompressed TIFF
+            files are read from disk window by window. Note that perform_standard_pred reads the
+            full image. Default: False.
+        prediction_cache: utils.file.DiskLRUCache
+            If given, the shifted predictions of each slice and the standard prediction are cached
+            with get_prediction_cache_key, inference is skipped for the cached ones and only the
+            postprocess is performed. Default: None.
+        profiler: sahi.utils.profiling.Profiler
+            If given, slice, decode, infer, convert, shift and merge spans are recorded in it.
 
     Returns:
         A Dict with fields:
             object_prediction_list: a list of sahi.prediction.ObjectPrediction
-            durations_in_seconds: a dict containing elapsed times for profiling
+            durations_in_seconds: a dict containing elapsed times for profiling, 'slice' is
+                the slicing time and 'prediction' the rest of the elapsed time
     """
+    if batch_size < 1:
+        raise ValueError(f"batch_size should be a positive integer but given as {batch_size}")
 
     # for profiling
+    if profiler is None:
+        profiler = Profiler()
     durations_in_seconds = dict()
-
-    # currently only 1 batch supported
-    num_batch = 1
+    time_start = time.perf_counter()
 
     # create slices from full image
-    time_start = time.time()
-    slice_image_result = slice_image(
-        image=image,
-        slice_height=slice_height,
-        slice_width=slice_width,
-        overlap_height_ratio=overlap_height_ratio,
-        overlap_width_ratio=overlap_width_ratio,
-        auto_slice_resolution=auto_slice_resolution,
-    )
-    num_slices = len(slice_image_result)
-    time_end = time.time() - time_start
-    durations_in_seconds["slice"] = time_end
+    with profiler.span("slice") as slice_span:
+        if stream_slices:
+            # slices are read on demand during prediction
+            image_reader = open_image_window_reader(image)
+            image_height, image_width = image_reader.height, image_reader.width
+            # slice plans are cached, iter_slices reuses this one
+            slice_plan = get_slice_plan(
+                image_height=image_height,
+                image_width=image_width,
+                slice_height=slice_height,
+                slice_width=slice_width,
+                overlap_height_ratio=overlap_height_ratio,
+                overlap_width_ratio=overlap_width_ratio,
+                auto_slice_resolution=auto_slice_resolution,
+            )
+            num_slices = len(slice_plan)
+            slice_bbox = slice_plan.slice_bboxes[0]
+            slice_size = max(slice_bbox[2] - slice_bbox[0], slice_bbox[3] - slice_bbox[1])
+            sliced_images = iter_slices(
+                image=image_reader,
+                slice_height=slice_height,
+                slice_width=slice_width,
+                overlap_height_ratio=overlap_height_ratio,
+                overlap_width_ratio=overlap_width_ratio,
+                auto_slice_resolution=auto_slice_resolution,
+            )
+        else:
+            slice_image_result = slice_image(
+                image=image,
+                slice_height=slice_height,
+                slice_width=slice_width,
+                overlap_height_ratio=overlap_height_ratio,
+                overlap_width_ratio=overlap_width_ratio,
+                auto_slice_resolution=auto_slice_resolution,
+            )
+            image_height = slice_image_result.original_image_height
+            image_width = slice_image_result.original_image_width
+            # cached, slice_image used the same plan
+            slice_plan = get_slice_plan(
+                image_height=image_height,
+                image_width=image_width,
+                slice_height=slice_height,
+                slice_width=slice_width,
+                overlap_height_ratio=overlap_height_ratio,
+                overlap_width_ratio=overlap_width_ratio,
+                auto_slice_resolution=auto_slice_resolution,
+            )
+            num_slices = len(slice_image_result)
+            if num_slices > 0:
+                slice_size = max(slice_image_result.sliced_image_list[0].image.shape[:2])
+            sliced_images = slice_image_result.sliced_image_list
+    durations_in_seconds["slice"] = slice_span.duration
 
     # init match postprocess instance
     if postprocess_type not in POSTPROCESS_NAME_TO_CLASS.keys():
@@ -217,94 +400,137 @@ def get_sliced_prediction(
         # deprecated in v0.9.3
         raise ValueError("'UNIONMERGE' postprocess_type is deprecated, use 'GREEDYNMM' instead.")
 
-    # postprocess 객체생성
+    # index predictions with a grid of slice sized cells
+    grid_cell_size = None
+    if postprocess_spatial_index and num_slices > 0:
+        grid_cell_size = slice_size
+
     postprocess_constructor = POSTPROCESS_NAME_TO_CLASS[postprocess_type]
     postprocess = postprocess_constructor(
         match_threshold=postprocess_match_threshold,
         match_metric=postprocess_match_metric,
         class_agnostic=postprocess_class_agnostic,
-        #len_original=len_original,
+        grid_cell_size=grid_cell_size,
     )
 
+    # merge the predictions of the slices while predicting them
+    windowed_postprocess = None
+    if merge_buffer_length is not None:
+        windowed_postprocess = WindowedPostprocess(
+            postprocess, slice_plan.slice_bboxes, merge_buffer_length=merge_buffer_length
+        )
+
     # create prediction input
-    num_group = int(num_slices / num_batch)
+    num_group = (num_slices + batch_size - 1) // batch_size
+    full_shape = [image_height, image_width]
     if verbose == 1 or verbose == 2:
         tqdm.write(f"Performing prediction on {num_slices} number of slices.")
     object_prediction_list = []
+    sliced_image_iterator = iter(sliced_images)
     # perform sliced prediction
     for group_ind in range(num_group):
-        # prepare batch (currently supports only 1 batch)
-        image_list = []
-        shift_amount_list = []
-        for image_ind in range(num_batch):
-            image_list.append(slice_image_result.images[group_ind * num_batch + image_ind])
-            shift_amount_list.append(slice_image_result.starting_pixels[group_ind * num_batch + image_ind])
-        # perform batch prediction
-        prediction_result = get_prediction(
-            image=image_list[0],
-            detection_model=detection_model,
-            shift_amount=shift_amount_list[0],
-            full_shape=[
-                slice_image_result.original_image_height,
-                slice_image_result.original_image_width,
-            ],
-        )
+        # prepare batch, streamed slices are read here
+        with profiler.span("slice", group_ind=group_ind) as slice_span:
+            sliced_image_batch = list(itertools.islice(sliced_image_iterator, batch_size))
+        durations_in_seconds["slice"] += slice_span.duration
+        # slices are in the order of the slice plan
+        shift_amounts = slice_plan.shift_amounts[group_ind * batch_size : group_ind * batch_size + batch_size]
+        # predictions of the cached slices are not recalculated
+        cache_keys = [None] * len(sliced_image_batch)
+        slice_object_prediction_lists = [None] * len(sliced_image_batch)
+        if prediction_cache is not None:
+            for slice_ind, sliced_image in enumerate(sliced_image_batch):
+                cache_keys[slice_ind] = get_prediction_cache_key(
+                    sliced_image.image,
+                    detection_model,
+                    shift_amount=shift_amounts[slice_ind],
+                    full_shape=full_shape,
+                )
+                slice_object_prediction_lists[slice_ind] = prediction_cache.get(cache_keys[slice_ind])
+        uncached_slice_inds = [
+            slice_ind
+            for slice_ind, slice_object_prediction_list in enumerate(slice_object_prediction_lists)
+            if slice_object_prediction_list is None
+        ]
+        uncached_sliced_images = [sliced_image_batch[slice_ind] for slice_ind in uncached_slice_inds]
+        if not uncached_sliced_images:
+            prediction_result_list = []
+        elif batch_size == 1:
+            prediction_result = get_prediction(
+                image=uncached_sliced_images[0].image,
+                detection_model=detection_model,
+                shift_amount=shift_amounts[uncached_slice_inds[0]],
+                full_shape=full_shape,
+                profiler=profiler,
+            )
+            prediction_result_list = [prediction_result]
+        else:
+            # perform batch prediction
+            prediction_result_list = get_batch_prediction(
+                image_list=[sliced_image.image for sliced_image in uncached_sliced_images],
+                detection_model=detection_model,
+                shift_amount_list=[shift_amounts[slice_ind] for slice_ind in uncached_slice_inds],
+                full_shape_list=[full_shape] * len(uncached_sliced_images),
+                profiler=profiler,
+            )
         # convert sliced predictions to full predictions
-        for object_prediction in prediction_result.object_prediction_list:
-            if object_prediction:  # if not empty
-                object_prediction_list.append(object_prediction.get_shifted_object_prediction())
-
-        # merge matching predictions during sliced prediction
-        if merge_buffer_length is not None and len(object_prediction_list) > merge_buffer_length:
-            object_prediction_list = postprocess(object_prediction_list)
-            print("merge_buffer_length is not None and len(object_prediction_list) > merge_buffer_length:")
-
-        #print("object_prediction_list---predict",object_prediction_list)
+        for slice_ind, prediction_result in zip(uncached_slice_inds, prediction_result_list):
+            with profiler.span("shift"):
+                slice_object_prediction_lists[slice_ind] = [
+                    object_prediction.get_shifted_object_prediction()
+                    for object_prediction in prediction_result.object_prediction_list
+                    if object_prediction  # if not empty
+                ]
+            if prediction_cache is not None:
+                prediction_cache.set(cache_keys[slice_ind], slice_object_prediction_lists[slice_ind])
+        if windowed_postprocess is not None:
+            # merge matching predictions during sliced prediction
+            with profiler.span("merge", num_predictions=len(windowed_postprocess.active_object_predictions)):
+                windowed_postprocess.add(slice_object_prediction_lists)
+        else:
+            for slice_object_prediction_list in slice_object_prediction_lists:
+                object_prediction_list.extend(slice_object_prediction_list)
 
     # perform standard prediction
     if num_slices > 1 and perform_standard_pred:
-        prediction_result = get_prediction(
-            image=image,
-            detection_model=detection_model,
-            shift_amount=[0, 0],
-            full_shape=None,
-            postprocess=None,
+        with profiler.span("decode"):
+            standard_image = image_reader.read_window([0, 0, image_width, image_height]) if stream_slices else image
+            if prediction_cache is not None:
+                standard_image = np.ascontiguousarray(read_image_as_pil(standard_image))
+        standard_object_prediction_list = None
+        if prediction_cache is not None:
+            cache_key = get_prediction_cache_key(standard_image, detection_model)
+            standard_object_prediction_list = prediction_cache.get(cache_key)
+        if standard_object_prediction_list is None:
+            prediction_result = get_prediction(
+                image=standard_image,
+                detection_model=detection_model,
+                shift_amount=[0, 0],
+                full_shape=None,
+                postprocess=None,
+                profiler=profiler,
             )
-
-        len_original = len(prediction_result.object_prediction_list)
-        #print("prediction_result---",prediction_result)
-
-        print(len_original, "오리지널 길이")
-        #print(len(object_prediction_list),"전")
-        object_prediction_list.extend(prediction_result.object_prediction_list)
-
-        #print("박스개수",len(object_prediction_list))
-
-
-    #    object_prediction_list에 오리지널 이미지 추가
-    # no_slices_prediction_result = get_prediction(
-    #     image=image,
-    #     detection_model=detection_model,
-    #     shift_amount=[0, 0],
-    #     full_shape=None,
-    #     postprocess=None,
-    #     verbose=0,
-    # )
-    #
-    # object_no_slices_prediction_list = no_slices_prediction_result.object_prediction_list
-    #
-    # object_prediction_list = object_prediction_list + object_no_slices_prediction_list
-
-    # merge matching predictions**
-
-    if len(object_prediction_list) > 1:
-        object_prediction_list = postprocess(object_prediction_list,len_original)
-
-    #print("object_prediction_list---merging predict", object_prediction_list)
-
-
-    time_end = time.time() - time_start
-    durations_in_seconds["prediction"] = time_end
+            standard_object_prediction_list = prediction_result.object_prediction_list
+            if prediction_cache is not None:
+                prediction_cache.set(cache_key, standard_object_prediction_list)
+        len_original = len(standard_object_prediction_list)
+        logger.debug(f"Standard prediction has {len_original} predictions.")
+        object_prediction_list.extend(standard_object_prediction_list)
+
+    # close the reader only if it is opened here
+    if stream_slices and image_reader is not image:
+        image_reader.close()
+
+    # merge matching predictions
+    if windowed_postprocess is not None:
+        with profiler.span("merge", num_predictions=len(windowed_postprocess.active_object_predictions)):
+            object_prediction_list = windowed_postprocess.finish(object_prediction_list, len_original)
+    elif len(object_prediction_list) > 1:
+        with profiler.span("merge", num_predictions=len(object_prediction_list)):
+            object_prediction_list = postprocess(object_prediction_list,len_original)
+
+    # slicing is reported separately
+    durations_in_seconds["prediction"] = time.perf_counter() - time_start - durations_in_seconds["slice"]
 
     if verbose == 2:
         print(
@@ -323,6 +549,70 @@ def get_sliced_prediction(
     )
 
 
+def _map_bounded(
+    function: Callable, iterable: Iterable, executor: Optional[Executor] = None, queue_size: int = 1
+) -> Iterator:
+    """
+    Lazily applies function to the items of iterable in the given executor and yields the results
+    in order. At most queue_size items are in flight, so a slow consumer stalls the producer instead
+    of buffering the whole iterable. Items are processed on the calling thread if executor is None.
+    """
+    if executor is None:
+        for item in iterable:
+            yield function(item)
+        return
+
+    futures = collections.deque()
+    try:
+        for item in iterable:
+            futures.append(executor.submit(function, item))
+            if len(futures) >= queue_size:
+                yield futures.popleft().result()
+        while futures:
+            yield futures.popleft().result()
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def _export_visual_with_ground_truth(
+    image: np.ndarray,
+    object_prediction_gt_list: List[ObjectPrediction],
+    object_prediction_list: List[ObjectPrediction],
+    output_dir: str,
+    file_name: str,
+    export_format: str,
+    rect_th: int = None,
+    text_size: float = None,
+    text_th: int = None,
+):
+    """Exports ground truths in green and predictions in red on top of the image."""
+    color = (0, 255, 0)  # original annotations in green
+    result = visualize_object_predictions(
+        image,
+        object_prediction_list=object_prediction_gt_list,
+        rect_th=rect_th,
+        text_size=text_size,
+        text_th=text_th,
+        color=color,
+        output_dir=None,
+        file_name=None,
+        export_format=None,
+    )
+    color = (255, 0, 0)  # model predictions in red
+    visualize_object_predictions(
+        result["image"],
+        object_prediction_list=object_prediction_list,
+        rect_th=rect_th,
+        text_size=text_size,
+        text_th=text_th,
+        color=color,
+        output_dir=output_dir,
+        file_name=file_name,
+        export_format=export_format,
+    )
+
+
 def predict(
     detection_model: DetectionModel = None,
     model_type: str = "mmdet",
@@ -340,10 +630,12 @@ def predict(
     slice_width: int = 512,
     overlap_height_ratio: float = 0.2,
     overlap_width_ratio: float = 0.2,
+    batch_size: int = 1,
     postprocess_type: str = "GREEDYNMM",
     postprocess_match_metric: str = "IOS",
     postprocess_match_threshold: float = 0.5,
     postprocess_class_agnostic: bool = False,
+    postprocess_spatial_index: bool = False,
     novisual: bool = False,
     view_video: bool = False,
     frame_skip_interval: int = 0,
@@ -359,6 +651,14 @@ def predict(
     verbose: int = 1,
     return_dict: bool = False,
     force_postprocess_type: bool = False,
+    num_decode_workers: int = 0,
+    num_export_workers: int = 0,
+    pipeline_queue_size: int = 4,
+    export_worker_type: str = "thread",
+    prediction_cache_dir: str = None,
+    prediction_cache_size: int = 2**30,
+    export_profile: bool = False,
+    profiler: Optional[Profiler] = None,
 ):
     """
     Performs prediction for all present images in given folder.
@@ -402,6 +702,8 @@ def predict(
             Fractional overlap in width of each window (e.g. an overlap of 0.2 for a window
             of size 512 yields an overlap of 102 pixels).
             Default to ``0.2``.
+        batch_size: int
+            Number of slices to be predicted in a single forward pass. Default: 1.
         postprocess_type: str
             Type of the postprocess to be used after sliced inference while merging/eliminating predictions.
             Options are 'NMM', 'GRREDYNMM' or 'NMS'. Default is 'GRREDYNMM'.
@@ -413,6 +715,9 @@ def predict(
             postprocessed after sliced prediction.
         postprocess_class_agnostic: bool
             If True, postprocess will ignore category ids.
+        postprocess_spatial_index: bool
+            If True, NMM/GREEDYNMM postprocess only compares predictions that share a cell of
+            a slice sized uniform grid. Default: False.
         novisual: bool
             Dont export predicted video/image visuals.
         view_video: bool
@@ -437,11 +742,38 @@ def predict(
         verbose: int
             0: no print
             1: print slice/prediction durations, number of slices
-            2: print model loading/file exporting durations
+            2: print model loading/file exporting durations and percentiles of the pipeline stages
         return_dict: bool
-            If True, returns a dict with 'export_dir' field.
+            If True, returns a dict with 'export_dir', 'durations_in_seconds' and 'profile' fields,
+            'profile' is the percentile summary of the pipeline stages.
         force_postprocess_type: bool
             If True, auto postprocess check will e disabled
+        num_decode_workers: int
+            Number of threads decoding the next images while the model is running. 0 decodes
+            images on the main thread. Default: 0.
+        num_export_workers: int
+            Number of workers exporting crops, pickles and visuals while the model is running on the
+            next images. 0 exports on the main thread. Video frames are always written on the main thread. Default: 0.
+        pipeline_queue_size: int
+            Maximum number of decoded images waiting for the model and of export jobs in flight.
+            Default: 4.
+        export_worker_type: str
+            'thread' or 'process' export workers. Process workers avoid the GIL while encoding
+            visuals, at the cost of copying images to the workers. Default: 'thread'.
+        prediction_cache_dir: str
+            If given, raw predictions of each slice are cached in this directory, keyed by the slice content,
+            its position and the model settings. Runs on the same images with different postprocess settings
+            then skip inference. Default: None.
+        prediction_cache_size: int
+            Maximum size of the prediction cache in bytes, least recently used predictions are deleted
+            beyond it. Default: 1 GiB.
+        export_profile: bool
+            If True, the pipeline stage spans are exported to 'profile_trace.json' in Chrome trace format
+            (open in chrome://tracing or https://ui.perfetto.dev) and their percentiles to
+            'profile_summary.json' in the save directory. Default: False.
+        profiler: sahi.utils.profiling.Profiler
+            Optionally provide a profiler to collect the decode, slice, infer, convert, shift, merge,
+            visualize and export spans of the run in.
     """
     # assert prediction type
     if no_standard_prediction and no_sliced_prediction:
@@ -456,6 +788,8 @@ def predict(
         postprocess_match_metric = "IOU"
 
     # for profiling
+    if profiler is None:
+        profiler = Profiler()
     durations_in_seconds = dict()
 
     # init export directories
@@ -491,7 +825,7 @@ def predict(
         image_iterator = [source]
 
     # init model instance
-    time_start = time.time()
+    time_start = time.perf_counter()
     if detection_model is None:
         detection_model = AutoDetectionModel.from_pretrained(
             model_type=model_type,
@@ -505,190 +839,220 @@ def predict(
             image_size=image_size,
         )
         detection_model.load_model()
-    time_end = time.time() - time_start
+    time_end = time.perf_counter() - time_start
     durations_in_seconds["model_load"] = time_end
 
+    # cached slice predictions of previous runs are reused
+    prediction_cache = None
+    if prediction_cache_dir is not None:
+        prediction_cache = DiskLRUCache(prediction_cache_dir, max_size_bytes=prediction_cache_size)
+
     # iterate over source images
+    durations_in_seconds["decode"] = 0
+    durations_in_seconds["decode_wait"] = 0
     durations_in_seconds["prediction"] = 0
     durations_in_seconds["slice"] = 0
+    durations_in_seconds["export_files"] = 0
+    durations_in_seconds["export_wait"] = 0
 
-    input_type_str = "video frames" if source_is_video else "images"
-    for ind, image_path in enumerate(
-        tqdm(image_iterator, f"Performing inference on {input_type_str}", total=num_frames)
-    ):
-        # get filename
-        if source_is_video:
-            video_name = Path(source).stem
-            relative_filepath = video_name + "_frame_" + str(ind)
-        elif os.path.isdir(source):  # preserve source folder structure in export
-            relative_filepath = str(Path(image_path)).split(str(Path(source)))[-1]
-            relative_filepath = relative_filepath[1:] if relative_filepath[0] == os.sep else relative_filepath
-        else:  # no process if source is single file
-            relative_filepath = Path(image_path).name
+    def decode_image(image_path):
+        with profiler.span("decode") as decode_span:
+            image_as_pil = read_image_as_pil(image_path)
+        return image_path, image_as_pil, decode_span.duration
 
+    def export_files(relative_filepath, image_as_pil, object_prediction_list, object_prediction_gt_list):
         filename_without_extension = Path(relative_filepath).stem
-
-        # load image
-        image_as_pil = read_image_as_pil(image_path)
-
-        #둘다 진행하여 합쳐보자
-        # perform prediction
-        if not no_sliced_prediction:
-            # get sliced prediction
-            prediction_result = get_sliced_prediction(
-                image=image_as_pil,
-                detection_model=detection_model,
-                slice_height=slice_height,
-                slice_width=slice_width,
-                overlap_height_ratio=overlap_height_ratio,
-                overlap_width_ratio=overlap_width_ratio,
-                perform_standard_pred=not no_standard_prediction,
-                postprocess_type=postprocess_type,
-                postprocess_match_metric=postprocess_match_metric,
-                postprocess_match_threshold=postprocess_match_threshold,
-                postprocess_class_agnostic=postprocess_class_agnostic,
-                verbose=1 if verbose else 0,
-            )
-            object_prediction_list = prediction_result.object_prediction_list
-            durations_in_seconds["slice"] += prediction_result.durations_in_seconds["slice"]
-        else:
-            # get standard prediction
-            prediction_result = get_prediction(
-                image=image_as_pil,
-                detection_model=detection_model,
-                shift_amount=[0, 0],
-                full_shape=None,
-                postprocess=None,
-                verbose=0,
+        # export prediction list as pickle
+        if export_pickle:
+            save_path = str(pickle_dir / Path(relative_filepath).parent / (filename_without_extension + ".pickle"))
+            export_writer.submit(save_pickle, data=object_prediction_list, save_path=save_path)
+
+        if object_prediction_gt_list is None and not export_crop and novisual and not view_video:
+            return
+        image = np.ascontiguousarray(image_as_pil)
+
+        # export visualizations with ground truths
+        if object_prediction_gt_list is not None:
+            export_writer.submit_named(
+                "visualize",
+                _export_visual_with_ground_truth,
+                image,
+                object_prediction_gt_list=object_prediction_gt_list,
+                object_prediction_list=object_prediction_list,
+                rect_th=visual_bbox_thickness,
+                text_size=visual_text_size,
+                text_th=visual_text_thickness,
+                output_dir=str(visual_with_gt_dir / Path(relative_filepath).parent),
+                file_name=filename_without_extension,
+                export_format=visual_export_format,
             )
 
-            #print(type(prediction_result))
-
-
-            object_prediction_list = prediction_result.object_prediction_list
-
-            #print("object_prediction_list----no slices",object_prediction_list)
-            #print(type(object_prediction_list))
-
-
-       # no_sliced_prediction, sliced_prediction merge **
-
-        # no_slices_prediction_result = get_prediction(
-        #     image=image_as_pil,
-        #     detection_model=detection_model,
-        #     shift_amount=[0, 0],
-        #     full_shape=None,
-        #     postprocess=None,
-        #     verbose=0,
-        # )
-        #
-        # object_no_slices_prediction_list = no_slices_prediction_result.object_prediction_list
-        #
-        # object_prediction_list = object_prediction_list + object_no_slices_prediction_list
-        #
-        # print("object_prediction_list---------predict",object_prediction_list)
-
-        # object_prediction_list = prediction_result.object_prediction_list
-        # durations_in_seconds["slice"] += prediction_result.durations_in_seconds["slice"]
-
-        durations_in_seconds["prediction"] += prediction_result.durations_in_seconds["prediction"]
-        # Show prediction time
-        if verbose:
-            tqdm.write(
-                "Prediction time is: {:.2f} ms".format(prediction_result.durations_in_seconds["prediction"] * 1000)
+        # export prediction boxes
+        if export_crop:
+            export_writer.submit(
+                crop_object_predictions,
+                image=image,
+                object_prediction_list=object_prediction_list,
+                output_dir=str(crop_dir / Path(relative_filepath).parent),
+                file_name=filename_without_extension,
+                export_format=visual_export_format,
             )
 
-        if dataset_json_path:
-            if source_is_video is True:
-                raise NotImplementedError("Video input type not supported with coco formatted dataset json")
-
-            # append predictions in coco format
-            for object_prediction in object_prediction_list:
-                coco_prediction = object_prediction.to_coco_prediction()
-                coco_prediction.image_id = coco.images[ind].id
-                coco_prediction_json = coco_prediction.json
-                if coco_prediction_json["bbox"]:
-                    coco_json.append(coco_prediction_json)
-            if not novisual:
-                # convert ground truth annotations to object_prediction_list
-                coco_image: CocoImage = coco.images[ind]
-                object_prediction_gt_list: List[ObjectPrediction] = []
-                for coco_annotation in coco_image.annotations:
-                    coco_annotation_dict = coco_annotation.json
-                    category_name = coco_annotation.category_name
-                    full_shape = [coco_image.height, coco_image.width]
-                    object_prediction_gt = ObjectPrediction.from_coco_annotation_dict(
-                        annotation_dict=coco_annotation_dict, category_name=category_name, full_shape=full_shape
-                    )
-                    object_prediction_gt_list.append(object_prediction_gt)
-                # export visualizations with ground truths
-                output_dir = str(visual_with_gt_dir / Path(relative_filepath).parent)
-                color = (0, 255, 0)  # original annotations in green
+        # export visualization
+        if source_is_video and (not novisual or view_video):
+            # video frames have to be written and rendered in order, from the main thread
+            with profiler.span("visualize") as visualize_span:
                 result = visualize_object_predictions(
-                    np.ascontiguousarray(image_as_pil),
-                    object_prediction_list=object_prediction_gt_list,
-                    rect_th=visual_bbox_thickness,
-                    text_size=visual_text_size,
-                    text_th=visual_text_thickness,
-                    color=color,
-                    output_dir=None,
-                    file_name=None,
-                    export_format=None,
-                )
-                color = (255, 0, 0)  # model predictions in red
-                _ = visualize_object_predictions(
-                    result["image"],
+                    image,
                     object_prediction_list=object_prediction_list,
                     rect_th=visual_bbox_thickness,
                     text_size=visual_text_size,
                     text_th=visual_text_thickness,
-                    color=color,
-                    output_dir=output_dir,
+                    output_dir=None,
                     file_name=filename_without_extension,
                     export_format=visual_export_format,
                 )
-
-        time_start = time.time()
-        # export prediction boxes
-        if export_crop:
-            output_dir = str(crop_dir / Path(relative_filepath).parent)
-            crop_object_predictions(
-                image=np.ascontiguousarray(image_as_pil),
-                object_prediction_list=object_prediction_list,
-                output_dir=output_dir,
-                file_name=filename_without_extension,
-                export_format=visual_export_format,
-            )
-        # export prediction list as pickle
-        if export_pickle:
-            save_path = str(pickle_dir / Path(relative_filepath).parent / (filename_without_extension + ".pickle"))
-            save_pickle(data=object_prediction_list, save_path=save_path)
-
-        # export visualization
-        if not novisual or view_video:
-            #저장 경로
+            with profiler.span("export") as export_span:
+                if not novisual:  # export video
+                    output_video_writer.write(result["image"])
+                # render video inference
+                if view_video:
+                    cv2.imshow("Prediction of {}".format(str(video_file_name)), result["image"])
+                    cv2.waitKey(1)
+            durations_in_seconds["export_files"] += visualize_span.duration + export_span.duration
+        elif not novisual:
             #output_dir = str(visual_dir / Path(relative_filepath).parent)
             output_dir = str(Path(relative_filepath).parent)
-            result = visualize_object_predictions(
-                np.ascontiguousarray(image_as_pil),
+            export_writer.submit_named(
+                "visualize",
+                visualize_object_predictions,
+                image,
                 object_prediction_list=object_prediction_list,
                 rect_th=visual_bbox_thickness,
                 text_size=visual_text_size,
                 text_th=visual_text_thickness,
-                output_dir=output_dir if not source_is_video else None,
+                output_dir=output_dir,
                 file_name=filename_without_extension,
                 export_format=visual_export_format,
             )
-            if not novisual and source_is_video:  # export video
-                output_video_writer.write(result["image"])
 
-        # render video inference
-        if view_video:
-            cv2.imshow("Prediction of {}".format(str(video_file_name)), result["image"])
-            cv2.waitKey(1)
+    # init pipeline stages, stages without workers run on the main thread
+    decode_executor = ThreadPoolExecutor(max_workers=num_decode_workers) if num_decode_workers > 0 else None
+    export_writer = ExportWriter(
+        num_workers=num_export_workers,
+        max_queue_size=pipeline_queue_size,
+        worker_type=export_worker_type,
+        profiler=profiler,
+    )
 
-        time_end = time.time() - time_start
-        durations_in_seconds["export_files"] = time_end
+    input_type_str = "video frames" if source_is_video else "images"
+    decoded_image_iterator = _map_bounded(
+        decode_image, image_iterator, executor=decode_executor, queue_size=pipeline_queue_size
+    )
+    try:
+        time_start = time.perf_counter()
+        for ind, (image_path, image_as_pil, decode_duration) in enumerate(
+            tqdm(
+                decoded_image_iterator,
+                f"Performing inference on {input_type_str}",
+                total=num_frames if source_is_video else len(image_iterator),
+            )
+        ):
+            # time the main thread spent waiting for a decoded image
+            durations_in_seconds["decode_wait"] += time.perf_counter() - time_start
+            durations_in_seconds["decode"] += decode_duration
+
+            # get filename
+            if source_is_video:
+                video_name = Path(source).stem
+                relative_filepath = video_name + "_frame_" + str(ind)
+            elif os.path.isdir(source):  # preserve source folder structure in export
+                relative_filepath = str(Path(image_path)).split(str(Path(source)))[-1]
+                relative_filepath = relative_filepath[1:] if relative_filepath[0] == os.sep else relative_filepath
+            else:  # no process if source is single file
+                relative_filepath = Path(image_path).name
+
+            # perform prediction
+            if not no_sliced_prediction:
+                # get sliced prediction
+                prediction_result = get_sliced_prediction(
+                    image=image_as_pil,
+                    detection_model=detection_model,
+                    slice_height=slice_height,
+                    slice_width=slice_width,
+                    overlap_height_ratio=overlap_height_ratio,
+                    overlap_width_ratio=overlap_width_ratio,
+                    perform_standard_pred=not no_standard_prediction,
+                    postprocess_type=postprocess_type,
+                    postprocess_match_metric=postprocess_match_metric,
+                    postprocess_match_threshold=postprocess_match_threshold,
+                    postprocess_class_agnostic=postprocess_class_agnostic,
+                    verbose=1 if verbose else 0,
+                    batch_size=batch_size,
+                    postprocess_spatial_index=postprocess_spatial_index,
+                    prediction_cache=prediction_cache,
+                    profiler=profiler,
+                )
+                object_prediction_list = prediction_result.object_prediction_list
+                durations_in_seconds["slice"] += prediction_result.durations_in_seconds["slice"]
+            else:
+                # get standard prediction
+                prediction_result = get_prediction(
+                    image=image_as_pil,
+                    detection_model=detection_model,
+                    shift_amount=[0, 0],
+                    full_shape=None,
+                    postprocess=None,
+                    verbose=0,
+                    profiler=profiler,
+                )
+                object_prediction_list = prediction_result.object_prediction_list
+
+            durations_in_seconds["prediction"] += prediction_result.durations_in_seconds["prediction"]
+            # Show prediction time
+            if verbose:
+                tqdm.write(
+                    "Prediction time is: {:.2f} ms".format(prediction_result.durations_in_seconds["prediction"] * 1000)
+                )
+
+            object_prediction_gt_list: Optional[List[ObjectPrediction]] = None
+            if dataset_json_path:
+                if source_is_video is True:
+                    raise NotImplementedError("Video input type not supported with coco formatted dataset json")
+
+                # append predictions in coco format
+                for object_prediction in object_prediction_list:
+                    coco_prediction = object_prediction.to_coco_prediction()
+                    coco_prediction.image_id = coco.images[ind].id
+                    coco_prediction_json = coco_prediction.json
+                    if coco_prediction_json["bbox"]:
+                        coco_json.append(coco_prediction_json)
+                if not novisual:
+                    # convert ground truth annotations to object_prediction_list
+                    coco_image: CocoImage = coco.images[ind]
+                    object_prediction_gt_list = []
+                    for coco_annotation in coco_image.annotations:
+                        coco_annotation_dict = coco_annotation.json
+                        category_name = coco_annotation.category_name
+                        full_shape = [coco_image.height, coco_image.width]
+                        object_prediction_gt = ObjectPrediction.from_coco_annotation_dict(
+                            annotation_dict=coco_annotation_dict, category_name=category_name, full_shape=full_shape
+                        )
+                        object_prediction_gt_list.append(object_prediction_gt)
+
+            # export files, submitting blocks while the export queue is full
+            export_files(relative_filepath, image_as_pil, object_prediction_list, object_prediction_gt_list)
+
+            time_start = time.perf_counter()
+
+        export_writer.flush()
+    finally:
+        decoded_image_iterator.close()
+        if decode_executor is not None:
+            decode_executor.shutdown(wait=True)
+        export_writer.close()
+    durations_in_seconds["export_files"] += export_writer.export_duration
+    durations_in_seconds["export_wait"] = export_writer.wait_duration
 
     # export coco results
     if dataset_json_path:
@@ -705,6 +1069,11 @@ def predict(
             durations_in_seconds["model_load"],
             "seconds.",
         )
+        print(
+            "Decoding performed in",
+            durations_in_seconds["decode"],
+            "seconds.",
+        )
         print(
             "Slicing performed in",
             durations_in_seconds["slice"],
@@ -721,9 +1090,31 @@ def predict(
                 durations_in_seconds["export_files"],
                 "seconds.",
             )
+        print(
+            "Waited for decoding",
+            durations_in_seconds["decode_wait"],
+            "seconds and for exporting",
+            durations_in_seconds["export_wait"],
+            "seconds.",
+        )
+        profile_summary = profiler.summary()
+        for stage in PIPELINE_STAGES:
+            if stage in profile_summary:
+                stage_summary = profile_summary[stage]
+                print(
+                    f"{stage}: {stage_summary['count']} spans, "
+                    f"p50 {stage_summary['p50'] * 1000:.2f} ms, p99 {stage_summary['p99'] * 1000:.2f} ms, "
+                    f"max {stage_summary['max'] * 1000:.2f} ms"
+                )
+
+    # export pipeline stage spans
+    if export_profile:
+        profiler.export_chrome_trace(str(save_dir / "profile_trace.json"))
+        profiler.export_summary(str(save_dir / "profile_summary.json"))
+        print(f"Profile is exported to {save_dir}")
 
     if return_dict:
-        return {"export_dir": save_dir}
+        return {"export_dir": save_dir, "durations_in_seconds": durations_in_seconds, "profile": profiler.summary()}
 
 
 def predict_fiftyone(
@@ -820,7 +1211,7 @@ def predict_fiftyone(
     dataset = create_fiftyone_dataset_from_coco_file(image_dir, dataset_json_path)
 
     # init model instance
-    time_start = time.time()
+    time_start = time.perf_counter()
     detection_model = AutoDetectionModel.from_pretrained(
         model_type=model_type,
         model_path=model_path,
@@ -833,7 +1224,7 @@ def predict_fiftyone(
         image_size=image_size,
     )
     detection_model.load_model()
-    time_end = time.time() - time_start
+    time_end = time.perf_counter() - time_start
     durations_in_seconds["model_load"] = time_end
 
     # iterate over source images
@@ -918,57 +1309,58 @@ def predict_fiftyone(
         time.sleep(3)
 
 
-#
-#
-# predict(model_path="model/yolov5m.pt",
-#         model_type="yolov5",
-#         source="demo_data/hahaclip.mp4",
-#         postprocess_type= "NMS" ,
-#         postprocess_match_metric="IOS",
-#         slice_height= 640,
-#         slice_width = 640,
-#         model_device='cpu',
-#         overlap_height_ratio=0,
-#         overlap_width_ratio=0,
-# )
-
-
-
-path = "demo_data/people/"
-person_list = os.listdir(path)
-
-#
-# for i in person_list:
-#     source = path + i
-#     predict(model_path="model/yolov5m.pt",
-#             model_type="yolov5",
-#             source=source,
-#             slice_height=640,  # 고정
-#             slice_width=640,  # 고정
-#             postprocess_type="NMS",
-#             postprocess_match_metric="IOS",
-#             model_device='cpu',
-#             name="people",
-#             overlap_height_ratio=0,
-#             overlap_width_ratio=0,
-#             #no_sliced_prediction=True
-#             )
-
-#postprocess_class_agnostic
-
-# #demo_data/people/people
-
-predict(model_path="model/yolov5m.pt",
-            model_type="yolov5",
-           # source="demo_data/hahaclip.mp4",
-            source="demo_data/people/people1.jpg",
-            slice_height=640,  # 고정
-            slice_width=640,  # 고정
-            postprocess_type="NMS",
-            postprocess_match_metric="IOS",
-            model_device='cpu',
-            name="people",
-            overlap_height_ratio=0,
-            overlap_width_ratio=0,
-            #no_sliced_prediction=True
-            )
\ No newline at end of file
+if __name__ == "__main__":
+    #
+    #
+    # predict(model_path="model/yolov5m.pt",
+    #         model_type="yolov5",
+    #         source="demo_data/hahaclip.mp4",
+    #         postprocess_type= "NMS" ,
+    #         postprocess_match_metric="IOS",
+    #         slice_height= 640,
+    #         slice_width = 640,
+    #         model_device='cpu',
+    #         overlap_height_ratio=0,
+    #         overlap_width_ratio=0,
+    # )
+
+
+
+    path = "demo_data/people/"
+    person_list = os.listdir(path)
+
+    #
+    # for i in person_list:
+    #     source = path + i
+    #     predict(model_path="model/yolov5m.pt",
+    #             model_type="yolov5",
+    #             source=source,
+    #             slice_height=640,  # 고정
+    #             slice_width=640,  # 고정
+    #             postprocess_type="NMS",
+    #             postprocess_match_metric="IOS",
+    #             model_device='cpu',
+    #             name="people",
+    #             overlap_height_ratio=0,
+    #             overlap_width_ratio=0,
+    #             #no_sliced_prediction=True
+    #             )
+
+    #postprocess_class_agnostic
+
+    # #demo_data/people/people
+
+    predict(model_path="model/yolov5m.pt",
+                model_type="yolov5",
+               # source="demo_data/hahaclip.mp4",
+                source="demo_data/people/people1.jpg",
+                slice_height=640,  # 고정
+                slice_width=640,  # 고정
+                postprocess_type="NMS",
+                postprocess_match_metric="IOS",
+                model_device='cpu',
+                name="people",
+                overlap_height_ratio=0,
+                overlap_width_ratio=0,
+                #no_sliced_prediction=True
+                )
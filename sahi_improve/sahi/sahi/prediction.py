@@ -7,9 +7,9 @@ from typing import Dict, List, Optional, Union
 import numpy as np
 from PIL import Image
 
-from annotation import ObjectAnnotation
+from annotation import Mask, ObjectAnnotation
 from utils.coco import CocoAnnotation, CocoPrediction
-from utils.cv import read_image_as_pil, visualize_object_predictions
+from utils.cv import has_windowed_reader, open_image_window_reader, read_image_as_pil, visualize_object_predictions
 from utils.file import Path
 
 
@@ -49,6 +49,7 @@ class ObjectPrediction(ObjectAnnotation):
         score: Optional[float] = 0,
         shift_amount: Optional[List[int]] = [0, 0],
         full_shape: Optional[List[int]] = None,
+        mask: Optional[Mask] = None,
     ):
         """
         Creates ObjectPrediction from bbox, score, category_id, category_name, bool_mask.
@@ -70,6 +71,9 @@ class ObjectPrediction(ObjectAnnotation):
             full_shape: list
                 Size of the full image after shifting, should be in
                 the form of [height, width]
+            mask: sahi.annotation.Mask
+                Mask of object, can be given instead of bool_mask to avoid creating
+                a full sized bool_mask.
         """
         self.score = PredictionScore(score)
         super().__init__(
@@ -79,6 +83,7 @@ class ObjectPrediction(ObjectAnnotation):
             category_name=category_name,
             shift_amount=shift_amount,
             full_shape=full_shape,
+            mask=mask,
         )
 
     def get_shifted_object_prediction(self):
@@ -88,14 +93,15 @@ class ObjectPrediction(ObjectAnnotation):
         Used for mapping sliced predictions over full image.
         """
         if self.mask:
+            shifted_mask = self.mask.get_shifted_mask()
             return ObjectPrediction(
                 bbox=self.bbox.get_shifted_box().to_voc_bbox(),
                 category_id=self.category.id,
                 score=self.score.value,
-                bool_mask=self.mask.get_shifted_mask().bool_mask,
                 category_name=self.category.name,
                 shift_amount=[0, 0],
-                full_shape=self.mask.get_shifted_mask().full_shape,
+                full_shape=shifted_mask.full_shape,
+                mask=shifted_mask,
             )
         else:
             return ObjectPrediction(
@@ -156,14 +162,54 @@ class PredictionResult:
     def __init__(
         self,
         object_prediction_list: List[ObjectPrediction],
-        image: Union[Image.Image, str, np.ndarray],
+        image,
         durations_in_seconds: Optional[Dict] = None,
     ):
-        self.image: Image.Image = read_image_as_pil(image)
-        self.image_width, self.image_height = self.image.size
+        """
+        Arguments:
+            object_prediction_list: list of ObjectPrediction
+            image: PIL.Image, image path, numpy image or utils.cv.ImageWindowReader,
+                the full image is only read when it is accessed
+            durations_in_seconds: dict containing elapsed times for profiling
+        """
+        self._image = image
+        self._image_size = None
         self.object_prediction_list: List[ObjectPrediction] = object_prediction_list
         self.durations_in_seconds = durations_in_seconds
 
+    @property
+    def image(self) -> Image.Image:
+        if not isinstance(self._image, Image.Image):
+            if has_windowed_reader(self._image):
+                image_reader = open_image_window_reader(self._image)
+                image = Image.fromarray(np.ascontiguousarray(image_reader.read_image()))
+                if image_reader is not self._image:
+                    image_reader.close()
+            else:
+                image = read_image_as_pil(self._image)
+            self._image = image
+        return self._image
+
+    def _get_image_size(self):
+        """Returns [width, height] without reading the full image if possible"""
+        if self._image_size is None:
+            if isinstance(self._image, Image.Image) or not has_windowed_reader(self._image):
+                self._image_size = self.image.size
+            else:
+                image_reader = open_image_window_reader(self._image)
+                self._image_size = (image_reader.width, image_reader.height)
+                if image_reader is not self._image:
+                    image_reader.close()
+        return self._image_size
+
+    @property
+    def image_width(self) -> int:
+        return self._get_image_size()[0]
+
+    @property
+    def image_height(self) -> int:
+        return self._get_image_size()[1]
+
     def export_visuals(
         self, export_dir: str, text_size: float = None, rect_th: int = None, file_name: str = "prediction_visual"
     ):
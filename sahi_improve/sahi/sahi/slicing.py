@@ -2,11 +2,12 @@
 # Code written by Fatih C Akyon, 2020.
 
 import concurrent.futures
+import functools
 import logging
 import os
 import time
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Dict, Generator, List, Optional, Union
 
 import numpy as np
 from PIL import Image
@@ -14,7 +15,7 @@ from shapely.errors import TopologicalError
 from tqdm import tqdm
 
 from utils.coco import Coco, CocoAnnotation, CocoImage, create_coco_dict
-from utils.cv import read_image_as_pil
+from utils.cv import ImageWindowReader, open_image_window_reader, read_image_as_pil
 from utils.file import load_json, save_json
 
 logger = logging.getLogger(__name__)
@@ -25,6 +26,8 @@ logging.basicConfig(
 )
 
 MAX_WORKERS = 20
+# number of image size and slicing parameter combinations get_slice_plan keeps
+SLICE_PLAN_CACHE_SIZE = 32
 
 
 def get_slice_bboxes(
@@ -96,6 +99,63 @@ def get_slice_bboxes(
     return slice_bboxes
 
 
+class SlicePlan:
+    """
+    Slice grid of an image size, as created by `get_slice_plan`. Instances are shared
+    between the calls with the same image size and slicing parameters, so they should
+    not be modified.
+    """
+
+    def __init__(self, image_height: int, image_width: int, slice_bboxes: List[List[int]]):
+        """
+        Args:
+            image_height (int): Height of the original image.
+            image_width (int): Width of the original image.
+            slice_bboxes (List[List[int]]): Generated from `get_slice_bboxes`.
+                Format for each slice bbox: [x_min, y_min, x_max, y_max].
+        """
+        self.image_height = image_height
+        self.image_width = image_width
+        self.full_shape = [image_height, image_width]
+        self.slice_bboxes = slice_bboxes
+        self.shift_amounts = [[slice_bbox[0], slice_bbox[1]] for slice_bbox in slice_bboxes]
+
+    def __len__(self):
+        return len(self.slice_bboxes)
+
+    def __repr__(self):
+        return f"SlicePlan<full_shape: {self.full_shape}, num_slices: {len(self)}>"
+
+
+@functools.lru_cache(maxsize=SLICE_PLAN_CACHE_SIZE)
+def get_slice_plan(
+    image_height: int,
+    image_width: int,
+    slice_height: int = None,
+    slice_width: int = None,
+    auto_slice_resolution: bool = True,
+    overlap_height_ratio: float = 0.2,
+    overlap_width_ratio: float = 0.2,
+) -> SlicePlan:
+    """Returns the SlicePlan of an image size. Plans are kept in a least recently used cache
+    keyed by the image size and slicing parameters, so the frames of a video or a fixed camera
+    reuse the same plan. Arguments are the same as `get_slice_bboxes`.
+
+    Returns:
+        SlicePlan: Slice bboxes, shift amounts and full shape of the image.
+    """
+    slice_bboxes = get_slice_bboxes(
+        image_height=image_height,
+        image_width=image_width,
+        slice_height=slice_height,
+        slice_width=slice_width,
+        auto_slice_resolution=auto_slice_resolution,
+        overlap_height_ratio=overlap_height_ratio,
+        overlap_width_ratio=overlap_width_ratio,
+    )
+    return SlicePlan(image_height=image_height, image_width=image_width, slice_bboxes=slice_bboxes)
+
+
 def annotation_inside_slice(annotation: Dict, slice_bbox: List[int]) -> bool:
     """Check whether annotation coordinates lie inside slice coordinates.
 
@@ -124,7 +184,54 @@ def annotation_inside_slice(annotation: Dict, slice_bbox: List[int]) -> bool:
     return True
 
 
-def process_coco_annotations(coco_annotation_list: List[CocoAnnotation], slice_bbox: List[int], min_area_ratio) -> bool:
+def get_annotation_slice_overlaps(annotation_bboxes, slice_bboxes) -> np.ndarray:
+    """Checks every annotation against every slice at once, with the same rule
+    as `annotation_inside_slice`.
+
+    Args:
+        annotation_bboxes (np.ndarray or List[List[int]]): Annotation bboxes in
+            COCO format: [x_min, y_min, width, height].
+        slice_bboxes (np.ndarray or List[List[int]]): Generated from `get_slice_bboxes`.
+            Format for each slice bbox: [x_min, y_min, x_max, y_max].
+
+    Returns:
+        (np.ndarray): Boolean matrix of shape (num_annotations, num_slices), True where
+            the annotation lies inside the slice.
+    """
+    annotation_bboxes = np.asarray(annotation_bboxes, dtype=np.float64).reshape(-1, 4)
+    slice_bboxes = np.asarray(slice_bboxes, dtype=np.float64).reshape(-1, 4)
+
+    left = annotation_bboxes[:, 0:1]
+    top = annotation_bboxes[:, 1:2]
+    right = left + annotation_bboxes[:, 2:3]
+    bottom = top + annotation_bboxes[:, 3:4]
+
+    return (
+        (left < slice_bboxes[:, 2])
+        & (top < slice_bboxes[:, 3])
+        & (right > slice_bboxes[:, 0])
+        & (bottom > slice_bboxes[:, 1])
+    )
+
+
+def get_coco_annotation_bboxes(coco_annotation_list: List[CocoAnnotation]) -> np.ndarray:
+    """Returns the COCO formatted bboxes of given CocoAnnotation objects as a (N, 4) array.
+    Annotations with an empty bbox are given a zero sized box so that they overlap no slice.
+    """
+    annotation_bboxes = np.zeros((len(coco_annotation_list), 4), dtype=np.float64)
+    for ind, coco_annotation in enumerate(coco_annotation_list):
+        bbox = coco_annotation.bbox
+        if bbox:
+            annotation_bboxes[ind] = bbox
+    return annotation_bboxes
+
+
+def process_coco_annotations(
+    coco_annotation_list: List[CocoAnnotation],
+    slice_bbox: List[int],
+    min_area_ratio,
+    inside_slice: Optional[np.ndarray] = None,
+) -> bool:
     """Slices and filters given list of CocoAnnotation objects with given
     'slice_bbox' and 'min_area_ratio'.
 
@@ -135,17 +242,24 @@ def process_coco_annotations(coco_annotation_list: List[CocoAnnotation], slice_b
         min_area_ratio (float): If the cropped annotation area to original
             annotation ratio is smaller than this value, the annotation is
             filtered out. Default 0.1.
+        inside_slice (np.ndarray, optional): Boolean mask of the annotations that
+            lie inside the slice, as returned by `get_annotation_slice_overlaps`.
+            Calculated from the annotation bboxes if not given.
 
     Returns:
         (List[CocoAnnotation]): Sliced annotations.
     """
+    if inside_slice is None:
+        annotation_bboxes = get_coco_annotation_bboxes(coco_annotation_list)
+        inside_slice = get_annotation_slice_overlaps(annotation_bboxes, [slice_bbox])[:, 0]
 
     sliced_coco_annotation_list: List[CocoAnnotation] = []
-    for coco_annotation in coco_annotation_list:
-        if annotation_inside_slice(coco_annotation.json, slice_bbox):
-            sliced_coco_annotation = coco_annotation.get_sliced_coco_annotation(slice_bbox)
-            if sliced_coco_annotation.area / coco_annotation.area >= min_area_ratio:
-                sliced_coco_annotation_list.append(sliced_coco_annotation)
+    # exact intersections are only calculated for the annotations that overlap the slice
+    for ind in np.flatnonzero(inside_slice):
+        coco_annotation = coco_annotation_list[ind]
+        sliced_coco_annotation = coco_annotation.get_sliced_coco_annotation(slice_bbox)
+        if sliced_coco_annotation.area / coco_annotation.area >= min_area_ratio:
+            sliced_coco_annotation_list.append(sliced_coco_annotation)
     return sliced_coco_annotation_list
 
 
@@ -242,7 +356,7 @@ class SliceImageResult:
 
 
 def slice_image(
-    image: Union[str, Image.Image],
+    image: Union[str, Image.Image, np.ndarray, ImageWindowReader],
     coco_annotation_list: Optional[CocoAnnotation] = None,
     output_file_name: Optional[str] = None,
     output_dir: Optional[str] = None,
@@ -259,7 +373,9 @@ def slice_image(
     sliced images.
 
     Args:
-        image (str or PIL.Image): File path of image or Pillow Image to be sliced.
+        image (str, PIL.Image, np.ndarray or ImageWindowReader): File path of image, image
+            or an opened ImageWindowReader to be sliced. Memory mapped .npy/.raw and TIFF files
+            are read window by window.
         coco_annotation_list (CocoAnnotation): List of CocoAnnotation objects.
         output_file_name (str, optional): Root name of output files (coordinates will
             be appended to this)
@@ -307,14 +423,14 @@ def slice_image(
     if output_dir is not None:
         Path(output_dir).mkdir(parents=True, exist_ok=True)
 
-    # read image
-    image_pil = read_image_as_pil(image)
-    verboselog("image.shape: " + str(image_pil.size))
+    # open image, windowed formats are read slice by slice
+    image_reader = open_image_window_reader(image)
+    image_width, image_height = image_reader.width, image_reader.height
+    verboselog("image.shape: " + str((image_width, image_height)))
 
-    image_width, image_height = image_pil.size
     if not (image_width != 0 and image_height != 0):
-        raise RuntimeError(f"invalid image size: {image_pil.size} for 'slice_image'.")
-    slice_bboxes = get_slice_bboxes(
+        raise RuntimeError(f"invalid image size: {(image_width, image_height)} for 'slice_image'.")
+    slice_bboxes = get_slice_plan(
         image_height=image_height,
         image_width=image_width,
         auto_slice_resolution=auto_slice_resolution,
@@ -322,7 +438,7 @@ def slice_image(
         slice_width=slice_width,
         overlap_height_ratio=overlap_height_ratio,
         overlap_width_ratio=overlap_width_ratio,
-    )
+    ).slice_bboxes
 
     t0 = time.time()
     n_ims = 0
@@ -330,9 +446,14 @@ def slice_image(
     # init images and annotations lists
     sliced_image_result = SliceImageResult(original_image_size=[image_height, image_width], image_dir=output_dir)
 
-    image_pil_arr = np.asarray(image_pil)
+    # find the annotations inside each slice at once
+    if coco_annotation_list is not None:
+        annotation_slice_overlaps = get_annotation_slice_overlaps(
+            get_coco_annotation_bboxes(coco_annotation_list), slice_bboxes
+        )
+
     # iterate over slices
-    for slice_bbox in slice_bboxes:
+    for slice_ind, slice_bbox in enumerate(slice_bboxes):
         n_ims += 1
 
         # extract image
@@ -340,11 +461,16 @@ def slice_image(
         tly = slice_bbox[1]
         brx = slice_bbox[2]
         bry = slice_bbox[3]
-        image_pil_slice = image_pil_arr[tly:bry, tlx:brx]
+        image_pil_slice = image_reader.read_window([tlx, tly, brx, bry])
 
         # process annotations if coco_annotations is given
         if coco_annotation_list is not None:
-            sliced_coco_annotation_list = process_coco_annotations(coco_annotation_list, slice_bbox, min_area_ratio)
+            sliced_coco_annotation_list = process_coco_annotations(
+                coco_annotation_list,
+                slice_bbox,
+                min_area_ratio,
+                inside_slice=annotation_slice_overlaps[:, slice_ind],
+            )
 
         # set image file suffixes
         slice_suffixes = "_".join(map(str, slice_bbox))
@@ -352,7 +478,7 @@ def slice_image(
             suffix = out_ext
         else:
             try:
-                suffix = Path(image_pil.filename).suffix
+                suffix = Path(image.filename).suffix
             except AttributeError:
                 suffix = ".jpg"
 
@@ -375,21 +501,87 @@ def slice_image(
         )
         sliced_image_result.add_sliced_image(sliced_image)
 
+    # close the reader only if it is opened here
+    if image_reader is not image:
+        image_reader.close()
+
     # export slices if output directory is provided
     if output_file_name and output_dir:
-        conc_exec = concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS)
-        conc_exec.map(
-            _export_single_slice,
-            sliced_image_result.images,
-            [output_dir] * len(sliced_image_result),
-            sliced_image_result.filenames,
-        )
+        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as conc_exec:
+            # consume the results so that export errors are raised instead of dropped
+            list(
+                conc_exec.map(
+                    _export_single_slice,
+                    sliced_image_result.images,
+                    [output_dir] * len(sliced_image_result),
+                    sliced_image_result.filenames,
+                )
+            )
 
     verboselog(
         "Num slices: " + str(n_ims) + " slice_height: " + str(slice_height) + " slice_width: " + str(slice_width)
     )
 
     return sliced_image_result
+
+
+def iter_slices(
+    image: Union[str, Image.Image, np.ndarray, ImageWindowReader],
+    slice_height: int = None,
+    slice_width: int = None,
+    overlap_height_ratio: float = 0.2,
+    overlap_width_ratio: float = 0.2,
+    auto_slice_resolution: bool = True,
+) -> Generator[SlicedImage, None, None]:
+    """Lazily slice a large image into smaller windows. Each slice is read when it is
+    requested, so only the yielded slices are kept in memory. Memory mapped .npy and
+    tiled/uncompressed TIFF files are read from disk window by window.
+
+    Args:
+        image (str, PIL.Image, np.ndarray or ImageWindowReader): File path of image,
+            image or an opened ImageWindowReader (e.g. RawWindowReader) to be sliced.
+        slice_height (int): Height of each slice. Default None.
+        slice_width (int): Width of each slice. Default None.
+        overlap_height_ratio (float): Fractional overlap in height of each
+            slice (e.g. an overlap of 0.2 for a slice of size 100 yields an
+            overlap of 20 pixels). Default 0.2.
+        overlap_width_ratio (float): Fractional overlap in width of each
+            slice (e.g. an overlap of 0.2 for a slice of size 100 yields an
+            overlap of 20 pixels). Default 0.2.
+        auto_slice_resolution (bool): if not set slice parameters such as slice_height and slice_width,
+            it enables automatically calculate these params from image resolution and orientation.
+
+    Yields:
+        sliced_image: SlicedImage
+    """
+    image_reader = open_image_window_reader(image)
+    try:
+        slice_bboxes = get_slice_plan(
+            image_height=image_reader.height,
+            image_width=image_reader.width,
+            auto_slice_resolution=auto_slice_resolution,
+            slice_height=slice_height,
+            slice_width=slice_width,
+            overlap_height_ratio=overlap_height_ratio,
+            overlap_width_ratio=overlap_width_ratio,
+        ).slice_bboxes
+        for slice_bbox in slice_bboxes:
+            coco_image = CocoImage(
+                file_name="_".join(map(str, slice_bbox)),
+                height=slice_bbox[3] - slice_bbox[1],
+                width=slice_bbox[2] - slice_bbox[0],
+            )
+            yield SlicedImage(
+                image=image_reader.read_window(slice_bbox),
+                coco_image=coco_image,
+                starting_pixel=[slice_bbox[0], slice_bbox[1]],
+            )
+    finally:
+        # close the reader only if it is opened here
+        if image_reader is not image:
+            image_reader.close()
+
+
 # slice_image(image="demo_data/test_car2.jpg",
 #             output_file_name="test_car.jpg",
 #             output_dir="demo_data/sliced/",
@@ -402,6 +594,24 @@ def slice_image(
 #             )
 
 
+def _slice_coco_image(
+    image_path: str, coco_annotation_list: List[CocoAnnotation], slice_kwargs: Dict
+) -> Optional[List[CocoImage]]:
+    """Slices a single image of `slice_coco` and returns the CocoImage of each slice,
+    None if the image has an invalid annotation. Runs in the worker processes of `slice_coco`.
+    """
+    try:
+        slice_image_result = slice_image(
+            image=image_path,
+            coco_annotation_list=coco_annotation_list,
+            output_file_name=Path(image_path).stem,
+            **slice_kwargs,
+        )
+    except TopologicalError:
+        return None
+    return slice_image_result.coco_images
+
+
 def slice_coco(
     coco_annotation_file_path: str,
     image_dir: str,
@@ -415,6 +625,7 @@ def slice_coco(
     min_area_ratio: float = 0.1,
     out_ext: Optional[str] = None,
     verbose: bool = False,
+    num_workers: int = 0,
 ) -> List[Union[Dict, str]]:
     """
     Slice large images given in a directory, into smaller windows. If out_name is given export sliced images and coco file.
@@ -441,6 +652,9 @@ def slice_coco(
             original suffix.
         verbose (bool, optional): Switch to print relevant values to screen.
             Default 'False'.
+        num_workers (int, optional): Number of processes the images are sliced in.
+            Images are sliced in the main process if 0. The output is the same
+            for any number of workers. Default 0.
 
     Returns:
         coco_dict: dict
@@ -456,30 +670,38 @@ def slice_coco(
     # init sliced coco_utils.CocoImage list
     sliced_coco_images: List = []
 
-    # iterate over images and slice
-    for coco_image in tqdm(coco.images):
-        # get image path
-        image_path: str = os.path.join(image_dir, coco_image.file_name)
-        # get annotation json list corresponding to selected coco image
-        # slice image
-        try:
-            slice_image_result = slice_image(
-                image=image_path,
-                coco_annotation_list=coco_image.annotations,
-                output_file_name=Path(coco_image.file_name).stem,
-                output_dir=output_dir,
-                slice_height=slice_height,
-                slice_width=slice_width,
-                overlap_height_ratio=overlap_height_ratio,
-                overlap_width_ratio=overlap_width_ratio,
-                min_area_ratio=min_area_ratio,
-                out_ext=out_ext,
-                verbose=verbose,
-            )
+    slice_kwargs = dict(
+        output_dir=output_dir,
+        slice_height=slice_height,
+        slice_width=slice_width,
+        overlap_height_ratio=overlap_height_ratio,
+        overlap_width_ratio=overlap_width_ratio,
+        min_area_ratio=min_area_ratio,
+        out_ext=out_ext,
+        verbose=verbose,
+    )
+    image_paths = [os.path.join(image_dir, coco_image.file_name) for coco_image in coco.images]
+
+    # results are returned in image order, so the output does not depend on the number of workers
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=num_workers) if num_workers > 0 else None
+    map_function = executor.map if executor is not None else map
+    try:
+        slice_results = map_function(
+            _slice_coco_image,
+            image_paths,
+            (coco_image.annotations for coco_image in coco.images),
+            [slice_kwargs] * len(image_paths),
+        )
+        # iterate over images and slice
+        for image_path, coco_images in tqdm(zip(image_paths, slice_results), total=len(image_paths)):
+            if coco_images is None:
+                logger.warning(f"Invalid annotation found, skipping this image: {image_path}")
+                continue
             # append slice outputs
-            sliced_coco_images.extend(slice_image_result.coco_images)
-        except TopologicalError:
-            logger.warning(f"Invalid annotation found, skipping this image: {image_path}")
+            sliced_coco_images.extend(coco_images)
+    finally:
+        if executor is not None:
+            executor.shutdown()
 
     # create and save coco dict
     coco_dict = create_coco_dict(
@@ -13,6 +13,7 @@ import requests
 from PIL import Image
 
 from sahi.utils.file import Path
+from sahi.utils.import_utils import is_available
 
 IMAGE_EXTENSIONS = [".jpg", ".jpeg", ".png", ".tiff", ".bmp"]
 VIDEO_EXTENSIONS = [".mp4", ".mkv", ".flv", ".avi", ".ts", ".mpg", ".mov", "wmv"]
@@ -56,7 +57,7 @@ class Colors:
 
 
 def crop_object_predictions(
-    image: np.ndarray,
+    image,
     object_prediction_list,
     output_dir: str = "",
     file_name: str = "prediction_visual",
@@ -65,6 +66,8 @@ def crop_object_predictions(
     """
     Crops bounding boxes over the source image and exports it to output folder.
     Arguments:
+        image: np.ndarray, image path or ImageWindowReader, only the cropped
+            regions are read for windowed formats such as .npy and TIFF
         object_predictions: a list of prediction.ObjectPrediction
         output_dir: directory for resulting visualization to be exported
         file_name: exported file will be saved as: output_dir+file_name+".png"
@@ -72,26 +75,20 @@ def crop_object_predictions(
     """
     # create output folder if not present
     Path(output_dir).mkdir(parents=True, exist_ok=True)
+    image_reader = open_image_window_reader(image)
     # add bbox and mask to image if present
     for ind, object_prediction in enumerate(object_prediction_list):
-        # deepcopy object_prediction_list so that original is not altered
-        object_prediction = object_prediction.deepcopy()
         bbox = object_prediction.bbox.to_voc_bbox()
         category_id = object_prediction.category.id
         # crop detections
-        # deepcopy crops so that original is not altered
-        cropped_img = copy.deepcopy(
-            image[
-                int(bbox[1]) : int(bbox[3]),
-                int(bbox[0]) : int(bbox[2]),
-                :,
-            ]
-        )
+        cropped_img = np.ascontiguousarray(image_reader.read_window(bbox))
         save_path = os.path.join(
             output_dir,
             file_name + "_box" + str(ind) + "_class" + str(category_id) + "." + export_format,
         )
         cv2.imwrite(save_path, cv2.cvtColor(cropped_img, cv2.COLOR_RGB2BGR))
+    if image_reader is not image:
+        image_reader.close()
 
 
 def convert_image_to(read_path, extension: str = "jpg", grayscale: bool = False):
@@ -180,6 +177,263 @@ def read_image_as_pil(image: Union[Image.Image, str, np.ndarray], exif_fix: bool
     return image_pil
 
 
+def to_rgb_array(image: np.ndarray) -> np.ndarray:
+    """
+    Converts a grayscale (H x W or H x W x 1) or RGBA (H x W x 4) numpy image to H x W x 3,
+    RGB images are returned as is (views are not copied).
+    """
+    if image.ndim == 3 and image.shape[2] == 1:
+        image = image[:, :, 0]
+    if image.ndim == 2:
+        image = np.stack([image] * 3, axis=2)
+    elif image.shape[2] == 4:
+        image = image[:, :, :3]
+    return image
+
+
+class ImageWindowReader:
+    """
+    Base class of the windowed image readers, reads rectangular regions of an image
+    as RGB numpy arrays so that only the requested regions have to be held in memory.
+
+    Subclasses set height and width and implement _read_window, use
+    register_image_window_reader to open a file suffix with a custom reader.
+    """
+
+    height: int
+    width: int
+
+    def _read_window(self, bbox: List[int]) -> np.ndarray:
+        raise NotImplementedError()
+
+    def read_window(self, bbox: List[int]) -> np.ndarray:
+        """
+        Reads the window [x1, y1, x2, y2] of the image as a H x W x 3 array,
+        the window is clipped to the image borders.
+        """
+        x1, y1 = max(int(bbox[0]), 0), max(int(bbox[1]), 0)
+        x2, y2 = min(int(bbox[2]), self.width), min(int(bbox[3]), self.height)
+        return to_rgb_array(self._read_window([x1, y1, max(x1, x2), max(y1, y2)]))
+
+    def read_image(self) -> np.ndarray:
+        """
+        Reads the whole image as a H x W x 3 array.
+        """
+        return self.read_window([0, 0, self.width, self.height])
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ArrayWindowReader(ImageWindowReader):
+    """
+    Reads windows of a H x W (x C) numpy array or np.memmap as views.
+    """
+
+    def __init__(self, array: np.ndarray):
+        self._array = array
+        self.height, self.width = array.shape[:2]
+
+    def _read_window(self, bbox: List[int]) -> np.ndarray:
+        return self._array[bbox[1] : bbox[3], bbox[0] : bbox[2]]
+
+
+class NpyWindowReader(ArrayWindowReader):
+    """
+    Reads windows of a .npy file through a read-only memory map.
+    """
+
+    def __init__(self, image_path: str):
+        super().__init__(np.load(image_path, mmap_mode="r"))
+
+
+class RawWindowReader(ArrayWindowReader):
+    """
+    Reads windows of a header-less raw raster file through a read-only memory map.
+    """
+
+    def __init__(
+        self, image_path: str, height: int, width: int, channels: int = 3, dtype: str = "uint8", offset: int = 0
+    ):
+        """
+        Args:
+            image_path: path of the raw file with pixels stored in H x W x C order
+            height: image height in pixels
+            width: image width in pixels
+            channels: number of channels
+            dtype: numpy dtype of the pixels
+            offset: number of header bytes to be skipped
+        """
+        super().__init__(np.memmap(image_path, dtype=dtype, mode="r", offset=offset, shape=(height, width, channels)))
+
+
+class TiffWindowReader(ImageWindowReader):
+    """
+    Reads windows of TIFF files with tifffile. Uncompressed contiguous images are memory mapped,
+    tiled images are read tile by tile, other images (or without tifffile) are decoded as a whole.
+    Images that are not 8-bit are decoded with read_image_as_pil, so that they are converted to
+    uint8 RGB as the other readers return them.
+    """
+
+    def __init__(self, image_path: str):
+        self._array = None
+        self._tiff_file = None
+        self._tiff_page = None
+
+        if is_available("tifffile"):
+            self._open_tiff(image_path)
+        else:
+            self._array = np.asarray(read_image_as_pil(image_path))
+
+        shape = self._array.shape if self._array is not None else self._tiff_page.shape
+        self.height, self.width = shape[:2]
+
+    def _open_tiff(self, image_path: str):
+        import tifffile
+
+        self._tiff_file = tifffile.TiffFile(image_path)
+        page = self._tiff_file.pages[0]
+        if page.dtype != np.uint8:
+            # e.g. 16-bit images
+            self.close()
+            self._array = np.asarray(read_image_as_pil(image_path))
+            return
+
+        try:
+            # uncompressed contiguous image data
+            self._array = tifffile.memmap(image_path, mode="r")
+            self.close()
+            return
+        except ValueError:
+            pass
+
+        if page.is_tiled and page.planarconfig == 1 and page.imagedepth == 1:
+            self._tiff_page = page
+        else:
+            # striped or planar compressed images can not be read per window
+            self._array = page.asarray()
+            self.close()
+
+    def _read_window(self, bbox: List[int]) -> np.ndarray:
+        if self._tiff_page is None:
+            return self._array[bbox[1] : bbox[3], bbox[0] : bbox[2]]
+
+        page = self._tiff_page
+        file_handle = self._tiff_file.filehandle
+        x1, y1, x2, y2 = bbox
+        tile_height, tile_width = page.tilelength, page.tilewidth
+        num_tile_cols = (page.imagewidth + tile_width - 1) // tile_width
+
+        window = np.zeros((y2 - y1, x2 - x1, page.samplesperpixel), dtype=page.dtype)
+        for tile_row in range(y1 // tile_height, (y2 - 1) // tile_height + 1):
+            for tile_col in range(x1 // tile_width, (x2 - 1) // tile_width + 1):
+                tile_ind = tile_row * num_tile_cols + tile_col
+                if page.databytecounts[tile_ind] == 0:
+                    # empty tiles are left as zeros
+                    continue
+                file_handle.seek(page.dataoffsets[tile_ind])
+                data = file_handle.read(page.databytecounts[tile_ind])
+                tile = page.decode(data, tile_ind, jpegtables=page.jpegtables)[0]
+                tile = tile.reshape(tile_height, tile_width, page.samplesperpixel)
+
+                # intersection of the tile and the window in image coordinates
+                tile_x1, tile_y1 = tile_col * tile_width, tile_row * tile_height
+                inter_x1, inter_y1 = max(x1, tile_x1), max(y1, tile_y1)
+                inter_x2, inter_y2 = min(x2, tile_x1 + tile_width), min(y2, tile_y1 + tile_height)
+                window[inter_y1 - y1 : inter_y2 - y1, inter_x1 - x1 : inter_x2 - x1] = tile[
+                    inter_y1 - tile_y1 : inter_y2 - tile_y1, inter_x1 - tile_x1 : inter_x2 - tile_x1
+                ]
+        return window
+
+    def close(self):
+        if self._tiff_file is not None:
+            self._tiff_file.close()
+            self._tiff_file = None
+
+
+class PilWindowReader(ImageWindowReader):
+    """
+    Fallback reader for the formats without windowed access, the image is decoded
+    with read_image_as_pil on the first read and kept in memory.
+    """
+
+    def __init__(self, image: Union[Image.Image, str, np.ndarray]):
+        self._image = image
+        self._array = None
+        if isinstance(image, Image.Image):
+            self.width, self.height = image.size
+            return
+        if isinstance(image, str) and not image.startswith("http"):
+            try:
+                # only the header is read
+                with Image.open(image) as image_pil:
+                    self.width, self.height = image_pil.size
+                return
+            except Exception:
+                pass
+        self._decode()
+
+    def _decode(self):
+        self._array = np.asarray(read_image_as_pil(self._image))
+        self.height, self.width = self._array.shape[:2]
+
+    def _read_window(self, bbox: List[int]) -> np.ndarray:
+        if self._array is None:
+            self._decode()
+        return self._array[bbox[1] : bbox[3], bbox[0] : bbox[2]]
+
+
+IMAGE_WINDOW_READERS = {
+    ".npy": NpyWindowReader,
+    ".raw": RawWindowReader,
+    ".tif": TiffWindowReader,
+    ".tiff": TiffWindowReader,
+}
+
+
+def register_image_window_reader(suffix: str, reader_class: type):
+    """
+    Registers an ImageWindowReader subclass to open the files with given suffix (e.g. ".vrt").
+    """
+    IMAGE_WINDOW_READERS[suffix.lower()] = reader_class
+
+
+def has_windowed_reader(image) -> bool:
+    """
+    Returns True if the image can be read window by window without decoding it as a whole.
+    """
+    return isinstance(image, ImageWindowReader) or (
+        isinstance(image, str) and Path(image).suffix.lower() in IMAGE_WINDOW_READERS
+    )
+
+
+def open_image_window_reader(image: Union[Image.Image, str, np.ndarray, ImageWindowReader], **kwargs):
+    """
+    Opens an ImageWindowReader for given image, readers are returned as is.
+
+    Args:
+        image : Can be image path or url (str), numpy image (np.ndarray), PIL.Image or ImageWindowReader
+        kwargs : Passed to the reader of the file suffix, e.g. height/width for RawWindowReader
+    Returns:
+        ImageWindowReader
+    """
+    if isinstance(image, ImageWindowReader):
+        return image
+    if isinstance(image, np.ndarray):
+        return ArrayWindowReader(image)
+    if isinstance(image, str):
+        reader_class = IMAGE_WINDOW_READERS.get(Path(image).suffix.lower())
+        if reader_class is not None:
+            return reader_class(image, **kwargs)
+    return PilWindowReader(image)
+
+
 def select_random_color():
     """
     Selects random color.
@@ -499,11 +753,14 @@ def get_coco_segmentation_from_bool_mask(bool_mask):
         ...
     ]
     """
-    # Generate polygons from mask
-    mask = np.squeeze(bool_mask)
-    mask = mask.astype(np.uint8)
-    mask = cv2.copyMakeBorder(mask, 1, 1, 1, 1, cv2.BORDER_CONSTANT, value=0)
-    polygons = cv2.findContours(mask, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE, offset=(-1, -1))
+    # Generate polygons from the nonzero region of the mask, masks of shape (height, width, 1) are accepted
+    bool_mask = np.asarray(bool_mask)
+    bool_mask = np.squeeze(bool_mask, axis=tuple(range(2, bool_mask.ndim)))
+    cropped_bool_mask, (crop_x, crop_y) = get_cropped_bool_mask(bool_mask)
+    if cropped_bool_mask.size == 0:
+        return []
+    mask = np.pad(cropped_bool_mask.astype(np.uint8), 1)
+    polygons = cv2.findContours(mask, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE, offset=(crop_x - 1, crop_y - 1))
     polygons = polygons[0] if len(polygons) == 2 else polygons[1]
     # Convert polygon to coco segmentation
     coco_segmentation = []
@@ -515,18 +772,51 @@ def get_coco_segmentation_from_bool_mask(bool_mask):
     return coco_segmentation
 
 
+def get_cropped_bool_mask_from_coco_segmentation(coco_segmentation, width, height):
+    """
+    Convert coco segmentation to the crop of the 2D boolean mask of given height and width, only
+    the bounding box region of the polygons is filled. Returns the crop and its position in the
+    mask as [x, y], the crop of polygons outside the mask has a shape of (0, 0).
+    """
+    points = [np.array(point).reshape(-1, 2).round().astype(np.int32) for point in coco_segmentation]
+    points = [point for point in points if len(point) > 0]
+    if len(points) == 0:
+        return np.zeros((0, 0), dtype=bool), [0, 0]
+    all_points = np.concatenate(points)
+    xmin, ymin = np.maximum(all_points.min(axis=0), 0)
+    xmax, ymax = np.minimum(all_points.max(axis=0), [width - 1, height - 1])
+    if xmax < xmin or ymax < ymin:
+        return np.zeros((0, 0), dtype=bool), [0, 0]
+    crop = np.zeros((ymax - ymin + 1, xmax - xmin + 1), dtype=np.uint8)
+    crop = cv2.fillPoly(crop, points, 1, offset=(-int(xmin), -int(ymin)))
+    return crop.astype(bool), [int(xmin), int(ymin)]
+
+
 def get_bool_mask_from_coco_segmentation(coco_segmentation, width, height):
     """
     Convert coco segmentation to 2D boolean mask of given height and width
     """
-    size = [height, width]
-    points = [np.array(point).reshape(-1, 2).round().astype(int) for point in coco_segmentation]
-    bool_mask = np.zeros(size)
-    bool_mask = cv2.fillPoly(bool_mask, points, 1)
-    bool_mask.astype(bool)
+    bool_mask = np.zeros((height, width), dtype=bool)
+    crop, (crop_x, crop_y) = get_cropped_bool_mask_from_coco_segmentation(coco_segmentation, width, height)
+    bool_mask[crop_y : crop_y + crop.shape[0], crop_x : crop_x + crop.shape[1]] = crop
     return bool_mask
 
 
+def get_cropped_bool_mask(bool_mask):
+    """
+    Crops given bool_mask (2D np.ndarray) to its nonzero region, returns the crop as a new bool
+    array and its position in bool_mask as [x, y]. The crop of an empty mask has a shape of (0, 0).
+    """
+    rows = np.flatnonzero(np.any(bool_mask, axis=1))
+    if len(rows) == 0:
+        return np.zeros((0, 0), dtype=bool), [0, 0]
+    cols = np.flatnonzero(np.any(bool_mask, axis=0))
+    ymin, ymax = rows[[0, -1]]
+    xmin, xmax = cols[[0, -1]]
+    cropped_bool_mask = np.array(bool_mask[ymin : ymax + 1, xmin : xmax + 1], dtype=bool)
+    return cropped_bool_mask, [int(xmin), int(ymin)]
+
+
 def get_bbox_from_bool_mask(bool_mask):
     """
     Generate voc bbox ([xmin, ymin, xmax, ymax]) from given bool_mask (2D np.ndarray)
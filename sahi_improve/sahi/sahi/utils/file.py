@@ -1,18 +1,24 @@
 # OBSS SAHI Tool
 # Code written by Fatih C Akyon, 2020.
 
+import collections
 import glob
 import json
 import ntpath
 import os
 import pickle
 import re
+import time
 import urllib.request
 import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from pathlib import Path
+from typing import Optional, Tuple
 
 import numpy as np
 
+from sahi.utils.profiling import Profiler
+
 
 def unzip(file_path: str, dest_dir: str):
     """
@@ -69,6 +75,22 @@ def load_json(load_path: str, encoding: str = "utf-8"):
     return data
 
 
+def iter_json_array(load_path: str, key: str):
+    """
+    Iterates over the items of the top level array field "key" of a json file,
+    parsing them incrementally without loading the whole file. Requires ijson.
+    The whole file is parsed for each call, wherever the array is placed.
+
+    Example inputs:
+        load_path: "dirname/coco.json"
+        key: "annotations"
+    """
+    import ijson
+
+    with open(load_path, "rb") as json_file:
+        yield from ijson.items(json_file, f"{key}.item", use_float=True)
+
+
 def list_files(
     directory: str,
     contains: list = [".json"],
@@ -175,7 +197,7 @@ def load_pickle(load_path):
         load_path: "dirname/coco.pickle"
     """
     # read from path
-    with open(load_path) as json_file:
+    with open(load_path, "rb") as json_file:
         data = pickle.load(json_file)
     return data
 
@@ -232,3 +254,213 @@ def download_from_url(from_url: str, to_path: str):
             from_url,
             to_path,
         )
+
+
+def _call_timed(function, args, kwargs) -> Tuple[float, float]:
+    """Calls function and returns its time.perf_counter() start and duration in seconds, dropping the result."""
+    time_start = time.perf_counter()
+    function(*args, **kwargs)
+    return time_start, time.perf_counter() - time_start
+
+
+class ExportWriter:
+    """
+    Runs file export jobs on a thread or process pool behind the caller.
+
+    At most max_queue_size jobs are in flight, submit() blocks until a job finishes
+    once the queue is full, so slow exports stall the caller instead of piling up
+    images in memory. Errors of the jobs are raised from submit(), flush() or close().
+
+    Example:
+        with ExportWriter(num_workers=2) as export_writer:
+            export_writer.submit(save_pickle, data=data, save_path="dirname/data.pickle")
+            export_writer.flush()
+    """
+
+    def __init__(
+        self,
+        num_workers: int = 1,
+        max_queue_size: int = 4,
+        worker_type: str = "thread",
+        profiler: Optional[Profiler] = None,
+    ):
+        """
+        Args:
+            num_workers: int
+                Number of export workers. 0 runs the jobs on the calling thread.
+            max_queue_size: int
+                Maximum number of submitted jobs that are not finished yet.
+            worker_type: str
+                'thread' or 'process'. Jobs submitted to process workers should be picklable.
+            profiler: sahi.utils.profiling.Profiler
+                If given, each finished job is recorded as a span.
+        """
+        if worker_type not in ["thread", "process"]:
+            raise ValueError(f"worker_type should be 'thread' or 'process', not '{worker_type}'")
+        if max_queue_size < 1:
+            raise ValueError(f"max_queue_size should be positive, not {max_queue_size}")
+        self.max_queue_size = max_queue_size
+        if num_workers > 0:
+            executor_class = ThreadPoolExecutor if worker_type == "thread" else ProcessPoolExecutor
+            self._executor = executor_class(max_workers=num_workers)
+        else:
+            self._executor = None
+        self.profiler = profiler
+        self._futures = {}
+        # total time spent in export jobs and time the caller was blocked on them, in seconds
+        self.export_duration = 0
+        self.wait_duration = 0
+
+    def submit(self, function, *args, **kwargs):
+        """Schedules function(*args, **kwargs), blocking while max_queue_size jobs are in flight."""
+        self.submit_named("export", function, *args, **kwargs)
+
+    def submit_named(self, span_name: str, function, *args, **kwargs):
+        """Same as submit(), the job is recorded in the profiler as a span named span_name."""
+        if self._executor is None:
+            self._record(span_name, function, _call_timed(function, args, kwargs))
+            return
+        self._wait(max_queue_size=self.max_queue_size - 1)
+        self._futures[self._executor.submit(_call_timed, function, args, kwargs)] = (span_name, function)
+
+    def _record(self, span_name: str, function, timing: Tuple[float, float]):
+        start, duration = timing
+        self.export_duration += duration
+        if self.profiler is not None:
+            self.profiler.add_span(span_name, start, duration, function=getattr(function, "__name__", str(function)))
+
+    def flush(self):
+        """Blocks until all submitted jobs are finished."""
+        self._wait(max_queue_size=0)
+
+    def close(self):
+        """Flushes the queue and shuts the workers down."""
+        try:
+            self.flush()
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def _wait(self, max_queue_size: int):
+        time_start = time.perf_counter()
+        while len(self._futures) > max_queue_size:
+            done, _ = wait(self._futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                span_name, function = self._futures.pop(future)
+                self._record(span_name, function, future.result())
+        self.wait_duration += time.perf_counter() - time_start
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class DiskLRUCache:
+    """
+    Pickles values into a directory, one file per key, and deletes the least recently used
+    files once their total size exceeds max_size_bytes. Reading a value touches its file, so
+    the usage order is kept across runs.
+
+    Example:
+        cache = DiskLRUCache("runs/cache", max_size_bytes=2**30)
+        value = cache.get(key)
+        if value is None:
+            value = calculate_value()
+            cache.set(key, value)
+    """
+
+    suffix = ".pickle"
+
+    def __init__(self, cache_dir: str, max_size_bytes: int = 2**30):
+        """
+        Args:
+            cache_dir: str
+                Directory of the cached files, created if not present. Files of a previous run are reused.
+            max_size_bytes: int
+                Maximum total size of the cached files.
+        """
+        if max_size_bytes < 0:
+            raise ValueError(f"max_size_bytes should not be negative, not {max_size_bytes}")
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        self.cache_dir = str(cache_dir)
+        self.max_size_bytes = max_size_bytes
+        # file sizes per key, from the least to the most recently used
+        self._file_sizes = collections.OrderedDict()
+        entries = []
+        for path in Path(cache_dir).glob("*" + self.suffix):
+            stat = path.stat()
+            entries.append((stat.st_mtime_ns, path.name[: -len(self.suffix)], stat.st_size))
+        for _, key, file_size in sorted(entries):
+            self._file_sizes[key] = file_size
+        self._last_mtime_ns = max([entry[0] for entry in entries], default=0)
+        self.size_bytes = sum(self._file_sizes.values())
+        self.num_hits = 0
+        self.num_misses = 0
+        self._evict()
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + self.suffix)
+
+    def get(self, key: str, default=None):
+        """Returns the value of key, default if key is not cached."""
+        if key not in self._file_sizes:
+            self.num_misses += 1
+            return default
+        path = self._get_path(key)
+        try:
+            value = load_pickle(path)
+            self._touch(path)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            # deleted or corrupted by another process
+            self._remove(key)
+            self.num_misses += 1
+            return default
+        self._file_sizes.move_to_end(key)
+        self.num_hits += 1
+        return value
+
+    def set(self, key: str, value):
+        """Caches value under key, which should be usable as a file name (e.g. a hash digest)."""
+        path = self._get_path(key)
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as outfile:
+            pickle.dump(value, outfile)
+        # replaced at once so that readers never see a partially written file
+        os.replace(temp_path, path)
+        self._touch(path)
+        file_size = os.path.getsize(path)
+        self.size_bytes += file_size - self._file_sizes.pop(key, 0)
+        self._file_sizes[key] = file_size
+        self._evict()
+
+    def _touch(self, path: str):
+        # modification times keep the usage order for the next runs, they are kept increasing
+        # since the file system clock may be coarser than consecutive accesses
+        mtime_ns = max(int(time.time() * 1e9), self._last_mtime_ns + 1)
+        self._last_mtime_ns = mtime_ns
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+    def clear(self):
+        """Deletes all cached files."""
+        for key in list(self._file_sizes):
+            self._remove(key)
+
+    def _remove(self, key: str):
+        self.size_bytes -= self._file_sizes.pop(key)
+        try:
+            os.remove(self._get_path(key))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        while self.size_bytes > self.max_size_bytes:
+            self._remove(next(iter(self._file_sizes)))
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._file_sizes
+
+    def __len__(self) -> int:
+        return len(self._file_sizes)
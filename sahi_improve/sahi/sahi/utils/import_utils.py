@@ -1,7 +1,10 @@
 import contextlib
+import importlib
 import importlib.util
 import logging
 import os
+import sys
+import types
 
 # adapted from https://github.com/huggingface/transformers/blob/main/src/transformers/utils/import_utils.py
 
@@ -53,6 +56,44 @@ def print_enviroment_info():
     _norfair_available, _norfair_version = get_package_info("norfair")
 
 
+class LazyModule(types.ModuleType):
+    """
+    Module placeholder that imports the actual module on first attribute access,
+    heavy frameworks are only loaded once they are used.
+    """
+
+    def __init__(self, module_name: str):
+        super().__init__(module_name)
+        self._module = None
+
+    def _load(self) -> types.ModuleType:
+        if self._module is None:
+            self._module = importlib.import_module(self.__name__)
+            # later attribute lookups are served from __dict__ without __getattr__
+            self.__dict__.update(self._module.__dict__)
+        return self._module
+
+    def __getattr__(self, name: str):
+        return getattr(self._load(), name)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(module_name: str) -> types.ModuleType:
+    """
+    Returns the module if it is already imported, otherwise a LazyModule
+    that imports it on first attribute access.
+    """
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    return LazyModule(module_name)
+
+
 def is_available(module_name: str):
     return importlib.util.find_spec(module_name) is not None
 
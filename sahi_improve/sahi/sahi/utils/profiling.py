@@ -0,0 +1,152 @@
+# OBSS SAHI Tool
+# Code written by Fatih C Akyon, 2020.
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+# stages of the prediction pipeline that are recorded as spans
+PIPELINE_STAGES = ["decode", "slice", "infer", "convert", "shift", "merge", "visualize", "export"]
+
+
+class Span:
+    """
+    A named, timed section of the pipeline. Times are in seconds of time.perf_counter(),
+    a monotonic clock.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        start: float,
+        duration: float = 0,
+        thread_id: Optional[int] = None,
+        process_id: Optional[int] = None,
+        args: Optional[Dict] = None,
+    ):
+        self.name = name
+        self.start = start
+        self.duration = duration
+        self.thread_id = threading.get_ident() if thread_id is None else thread_id
+        self.process_id = os.getpid() if process_id is None else process_id
+        self.args = args or {}
+
+    def __repr__(self):
+        return f"Span<name: {self.name}, start: {self.start}, duration: {self.duration}>"
+
+
+class Profiler:
+    """
+    Collects spans of the pipeline stages from any thread and summarizes them as percentiles
+    or exports them as a Chrome trace (open in chrome://tracing or https://ui.perfetto.dev).
+
+    Example:
+        profiler = Profiler()
+        with profiler.span("infer", batch_size=4):
+            detection_model.perform_inference(images)
+        profiler.summary()["infer"]["p99"]
+        profiler.export_chrome_trace("trace.json")
+    """
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+        # trace timestamps are relative to the creation of the profiler
+        self._origin = time.perf_counter()
+
+    @contextmanager
+    def span(self, name: str, **args) -> Iterator[Span]:
+        """Records the duration of the with block as a span, the span is yielded to read its duration."""
+        span = Span(name=name, start=time.perf_counter(), args=args)
+        try:
+            yield span
+        finally:
+            span.duration = time.perf_counter() - span.start
+            self._append(span)
+
+    def add_span(self, name: str, start: float, duration: float, **args) -> Span:
+        """
+        Records a span that is timed elsewhere, e.g. in a worker process. start should be a
+        time.perf_counter() value, which is comparable across processes on most platforms.
+        """
+        span = Span(name=name, start=start, duration=duration, args=args)
+        self._append(span)
+        return span
+
+    def _append(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def get_durations(self, name: str) -> List[float]:
+        """Returns the durations of the spans with given name in seconds."""
+        with self._lock:
+            return [span.duration for span in self.spans if span.name == name]
+
+    def get_total_duration(self, name: str) -> float:
+        """Returns the total duration of the spans with given name in seconds."""
+        return sum(self.get_durations(name))
+
+    def summary(self, percentiles: Sequence[float] = (50, 90, 95, 99)) -> Dict[str, Dict[str, float]]:
+        """
+        Returns count, total, mean, min, max and given percentiles of the span durations per name, in seconds.
+        """
+        with self._lock:
+            durations_per_name: Dict[str, List[float]] = {}
+            for span in self.spans:
+                durations_per_name.setdefault(span.name, []).append(span.duration)
+
+        summary = {}
+        for name, durations in durations_per_name.items():
+            durations = np.asarray(durations)
+            summary[name] = {
+                "count": len(durations),
+                "total": float(durations.sum()),
+                "mean": float(durations.mean()),
+                "min": float(durations.min()),
+                "max": float(durations.max()),
+            }
+            for percentile, value in zip(percentiles, np.percentile(durations, percentiles)):
+                summary[name][f"p{percentile:g}"] = float(value)
+        return summary
+
+    def to_chrome_trace(self) -> Dict:
+        """Returns the spans in Chrome trace event format."""
+        with self._lock:
+            spans = list(self.spans)
+        trace_events = [
+            {
+                "name": span.name,
+                "cat": "sahi",
+                "ph": "X",
+                "ts": (span.start - self._origin) * 1e6,
+                "dur": span.duration * 1e6,
+                "pid": span.process_id,
+                "tid": span.thread_id,
+                "args": span.args,
+            }
+            for span in spans
+        ]
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, save_path: str):
+        """Exports the spans as a Chrome trace json file."""
+        Path(save_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(save_path, "w") as outfile:
+            json.dump(self.to_chrome_trace(), outfile, default=str)
+
+    def export_summary(self, save_path: str):
+        """Exports the percentile summary of the spans as a json file."""
+        Path(save_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(save_path, "w") as outfile:
+            json.dump(self.summary(), outfile, indent=4)
+
+    def clear(self):
+        """Removes the recorded spans."""
+        with self._lock:
+            self.spans = []
@@ -0,0 +1,119 @@
+# OBSS SAHI Tool
+# Code written by Fatih C Akyon, 2020.
+
+from typing import Tuple, Union
+
+import numpy as np
+
+# Run-length encoding of masks in COCO format: the pixels are ordered column by column (fortran order)
+# and the counts alternate between background and foreground runs, starting with a background run.
+# Foreground runs are also handled as column runs (cols, row_starts, row_ends), which are runs that are
+# split at the column boundaries, so that masks can be shifted, clipped and merged without decoding.
+
+
+def get_rle_counts_from_string(counts_string: Union[bytes, str]) -> np.ndarray:
+    """
+    Decodes the compressed counts string of a COCO RLE (as in pycocotools rleFrString), which
+    pycocotools does not expose. RLEs are encoded with pycocotools.mask.frPyObjects.
+    """
+    if isinstance(counts_string, str):
+        counts_string = counts_string.encode()
+    chars = np.frombuffer(counts_string, dtype=np.uint8).astype(np.int64) - 48
+    if len(chars) == 0:
+        return np.zeros(0, dtype=np.int64)
+    # each value is stored in 5 bit groups, the last char of a value has no continuation bit
+    value_ends = np.flatnonzero((chars & 0x20) == 0)
+    value_starts = np.concatenate([[0], value_ends[:-1] + 1])
+    value_inds = np.repeat(np.arange(len(value_starts)), value_ends - value_starts + 1)
+    shifts = 5 * (np.arange(len(chars)) - value_starts[value_inds])
+    values = np.add.reduceat((chars & 0x1F) << shifts, value_starts)
+    # sign extension
+    num_chars = value_ends - value_starts + 1
+    is_negative = (chars[value_ends] & 0x10) != 0
+    values[is_negative] -= np.left_shift(1, 5 * num_chars[is_negative])
+    # counts after the third one are stored as the difference to the count two before
+    values[1::2] = np.cumsum(values[1::2])
+    values[2::2] = np.cumsum(values[2::2])
+    return values
+
+
+def get_rle_counts_from_bool_mask(bool_mask: np.ndarray) -> np.ndarray:
+    """
+    Returns the RLE counts of given bool_mask (2D np.ndarray).
+    """
+    pixels = np.asarray(bool_mask, dtype=bool).ravel(order="F")
+    if len(pixels) == 0:
+        return np.zeros(1, dtype=np.int64)
+    boundaries = np.concatenate([[0], np.flatnonzero(pixels[1:] != pixels[:-1]) + 1, [len(pixels)]])
+    counts = np.diff(boundaries)
+    # counts start with a background run
+    if pixels[0]:
+        counts = np.concatenate([[0], counts])
+    return counts.astype(np.int64)
+
+
+def get_bool_mask_from_rle_counts(counts, height: int, width: int) -> np.ndarray:
+    """
+    Returns the bool mask of given height and width from RLE counts.
+    """
+    pixels = np.repeat(np.arange(len(counts)) % 2 == 1, counts)
+    return pixels.reshape(width, height).T
+
+
+def get_rle_column_runs(counts, height: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns the foreground runs of RLE counts of a mask with given height as column runs.
+
+    Returns:
+        cols, row_starts, row_ends: np.ndarray
+            Column, first row and end row (exclusive) of each run
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    ends = np.cumsum(counts)
+    starts = ends - counts
+    starts, ends = starts[1::2], ends[1::2]
+    nonempty = ends > starts
+    starts, ends = starts[nonempty], ends[nonempty]
+
+    # split the runs at the column boundaries
+    first_cols = starts // height
+    num_cols = (ends - 1) // height - first_cols + 1
+    run_inds = np.repeat(np.arange(len(starts)), num_cols)
+    cols = first_cols[run_inds] + np.arange(len(run_inds)) - np.repeat(np.cumsum(num_cols) - num_cols, num_cols)
+    col_starts = cols * height
+    row_starts = np.maximum(starts[run_inds], col_starts) - col_starts
+    row_ends = np.minimum(ends[run_inds], col_starts + height) - col_starts
+    return cols, row_starts, row_ends
+
+
+def get_rle_counts_from_column_runs(cols, row_starts, row_ends, height: int, width: int) -> np.ndarray:
+    """
+    Returns the RLE counts of a mask with given height and width from its column runs, runs can
+    overlap so the union of masks is the concatenation of their column runs.
+    """
+    starts = np.asarray(cols, dtype=np.int64) * height + row_starts
+    ends = np.asarray(cols, dtype=np.int64) * height + row_ends
+    nonempty = ends > starts
+    starts, ends = starts[nonempty], ends[nonempty]
+    if len(starts) == 0:
+        return np.array([height * width], dtype=np.int64)
+
+    # merge the overlapping and touching runs
+    order = np.argsort(starts, kind="stable")
+    starts, ends = starts[order], ends[order]
+    max_ends = np.maximum.accumulate(ends)
+    is_first = np.ones(len(starts), dtype=bool)
+    is_first[1:] = starts[1:] > max_ends[:-1]
+    first_inds = np.flatnonzero(is_first)
+    starts = starts[first_inds]
+    ends = np.maximum.reduceat(ends, first_inds)
+
+    counts = np.empty(2 * len(starts) + 1, dtype=np.int64)
+    counts[0] = starts[0]
+    counts[1::2] = ends - starts
+    counts[2:-1:2] = starts[1:] - ends[:-1]
+    counts[-1] = height * width - ends[-1]
+    # there is no trailing empty background run, as in pycocotools
+    if counts[-1] == 0:
+        counts = counts[:-1]
+    return counts
@@ -37,7 +37,14 @@ def get_bbox_from_shapely(shapely_object):
     """
     Accepts shapely box/poly object and returns its bounding box in coco and voc formats
     """
-    minx, miny, maxx, maxy = shapely_object.bounds
+    return get_bbox_from_bounds(shapely_object.bounds)
+
+
+def get_bbox_from_bounds(bounds):
+    """
+    Accepts (minx, miny, maxx, maxy) bounds and returns the bounding box in coco and voc formats
+    """
+    minx, miny, maxx, maxy = bounds
     width = maxx - minx
     height = maxy - miny
     coco_bbox = [minx, miny, width, height]
@@ -65,8 +72,10 @@ class ShapelyAnnotation:
             Should have the same format as the output of the get_bbox_from_shapely function.
             Is used to calculate sliced coco coordinates.
         """
-        shapely_multipolygon = get_shapely_multipolygon(segmentation)
-        return cls(multipolygon=shapely_multipolygon, slice_bbox=slice_bbox)
+        shapely_annotation = cls(multipolygon=None, slice_bbox=slice_bbox)
+        # multipolygon is created on first access
+        shapely_annotation._coco_segmentation = segmentation
+        return shapely_annotation
 
     @classmethod
     def from_coco_bbox(cls, bbox: List[int], slice_bbox: List[int] = None):
@@ -77,25 +86,40 @@ class ShapelyAnnotation:
         slice_bbox (List[int]): [x_min, y_min, x_max, y_max] Is used
             to calculate sliced coco coordinates.
         """
-        shapely_polygon = get_shapely_box(x=bbox[0], y=bbox[1], width=bbox[2], height=bbox[3])
-        shapely_multipolygon = MultiPolygon([shapely_polygon])
-        return cls(multipolygon=shapely_multipolygon, slice_bbox=slice_bbox)
+        shapely_annotation = cls(multipolygon=None, slice_bbox=slice_bbox)
+        # multipolygon is created on first access, area and bbox are calculated without it
+        shapely_annotation._coco_bbox = bbox
+        return shapely_annotation
 
     def __init__(self, multipolygon: MultiPolygon, slice_bbox=None):
-        self.multipolygon = multipolygon
+        self._coco_segmentation = None
+        self._coco_bbox = None
+        self.__multipolygon = None
+        self.__area = None
+        if multipolygon is not None:
+            self.multipolygon = multipolygon
         self.slice_bbox = slice_bbox
 
     @property
     def multipolygon(self):
+        if self.__multipolygon is None:
+            if self._coco_segmentation is not None:
+                self.multipolygon = get_shapely_multipolygon(self._coco_segmentation)
+            elif self._coco_bbox is not None:
+                bbox = self._coco_bbox
+                shapely_polygon = get_shapely_box(x=bbox[0], y=bbox[1], width=bbox[2], height=bbox[3])
+                self.multipolygon = MultiPolygon([shapely_polygon])
         return self.__multipolygon
 
     @property
     def area(self):
-        return int(self.__area)
+        return int(self._get_area())
 
     @multipolygon.setter
     def multipolygon(self, multipolygon: MultiPolygon):
         self.__multipolygon = multipolygon
+        self._coco_segmentation = None
+        self._coco_bbox = None
         # calculate areas of all polygons
         area = 0
         for shapely_polygon in multipolygon.geoms:
@@ -103,6 +127,20 @@ class ShapelyAnnotation:
         # set instance area
         self.__area = area
 
+    def _get_area(self) -> float:
+        if self.__multipolygon is None and self._coco_bbox is not None:
+            return abs(self._coco_bbox[2] * self._coco_bbox[3])
+        if self.__area is None:
+            # creating the multipolygon sets its area
+            _ = self.multipolygon
+        return self.__area
+
+    def _get_bounds(self):
+        if self.__multipolygon is None and self._coco_bbox is not None:
+            x, y, width, height = self._coco_bbox
+            return min(x, x + width), min(y, y + height), max(x, x + width), max(y, y + height)
+        return self.multipolygon.bounds
+
     def to_list(self):
         """
         [
@@ -196,8 +234,8 @@ class ShapelyAnnotation:
         """
         [xmin, ymin, width, height]
         """
-        if self.multipolygon.area != 0:
-            coco_bbox, _ = get_bbox_from_shapely(self.multipolygon)
+        if self._get_area() != 0:
+            coco_bbox, _ = get_bbox_from_bounds(self._get_bounds())
             # fix coord by slice box
             if self.slice_bbox:
                 minx = round(self.slice_bbox[0])
@@ -212,8 +250,8 @@ class ShapelyAnnotation:
         """
         [xmin, ymin, xmax, ymax]
         """
-        if self.multipolygon.area != 0:
-            _, voc_bbox = get_bbox_from_shapely(self.multipolygon)
+        if self._get_area() != 0:
+            _, voc_bbox = get_bbox_from_bounds(self._get_bounds())
             # fix coord by slice box
             if self.slice_bbox:
                 minx = self.slice_bbox[0]
@@ -0,0 +1,352 @@
+"""
+Benchmarks of the slicing, inference glue and postprocess hot paths on synthetic, seeded workloads.
+No network, GPU or model weights are needed. Results are written as json, so that the runs of
+different commits can be compared:
+
+    PYTHONPATH=sahi python -m scripts.benchmark --output_path=benchmark_main.json
+    PYTHONPATH=sahi python -m scripts.benchmark --output_path=benchmark_new.json --baseline_path=benchmark_main.json
+"""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+import fire
+import numpy as np
+
+from scripts.utils import print_console_centered
+
+SEED = 0
+
+# name -> function(scale, tmp_dir) that prepares the workload and returns the function to be timed
+BENCHMARKS: Dict[str, Callable] = {}
+
+
+def benchmark(name: str):
+    """Registers a benchmark under name."""
+
+    def register(function):
+        BENCHMARKS[name] = function
+        return function
+
+    return register
+
+
+def get_random_voc_bboxes(num_bboxes: int, image_size: int, max_bbox_size: int, rng) -> np.ndarray:
+    """Returns num_bboxes random [x1, y1, x2, y2] boxes, grouped around num_bboxes / 4 centers like the
+    predictions of overlapping slices."""
+    centers = rng.uniform(0, image_size - max_bbox_size, size=(max(1, num_bboxes // 4), 2))
+    top_lefts = centers[rng.integers(0, len(centers), size=num_bboxes)] + rng.normal(0, 4, size=(num_bboxes, 2))
+    sizes = rng.uniform(8, max_bbox_size, size=(num_bboxes, 2))
+    bboxes = np.concatenate([top_lefts, top_lefts + sizes], axis=1)
+    return np.clip(bboxes, 0, image_size).round()
+
+
+def get_random_object_predictions(num_predictions: int, rng, image_size: int = 4096) -> List:
+    from sahi.prediction import ObjectPrediction
+
+    bboxes = get_random_voc_bboxes(num_predictions, image_size=image_size, max_bbox_size=64, rng=rng)
+    category_ids = rng.integers(0, 3, size=num_predictions)
+    scores = rng.uniform(0.3, 1, size=num_predictions)
+    return [
+        ObjectPrediction(bbox=bbox.tolist(), category_id=int(category_id), category_name=str(category_id), score=score)
+        for bbox, category_id, score in zip(bboxes, category_ids, scores)
+    ]
+
+
+def get_random_coco_dict(num_images: int, num_annotations_per_image: int, rng, image_size: int = 2048) -> Dict:
+    categories = [{"id": category_id, "name": f"category{category_id}"} for category_id in range(1, 4)]
+    images = [
+        {"id": image_id, "file_name": f"image{image_id}.jpg", "height": image_size, "width": image_size}
+        for image_id in range(1, num_images + 1)
+    ]
+    annotations = []
+    for image in images:
+        bboxes = get_random_voc_bboxes(num_annotations_per_image, image_size=image_size, max_bbox_size=128, rng=rng)
+        for x1, y1, x2, y2 in bboxes.tolist():
+            annotations.append(
+                {
+                    "id": len(annotations) + 1,
+                    "image_id": image["id"],
+                    "category_id": int(rng.integers(1, 4)),
+                    "bbox": [x1, y1, x2 - x1, y2 - y1],
+                    # diamond shaped polygons, so that segmentations are processed
+                    "segmentation": [[(x1 + x2) / 2, y1, x2, (y1 + y2) / 2, (x1 + x2) / 2, y2, x1, (y1 + y2) / 2]],
+                    "area": (x2 - x1) * (y2 - y1) / 2,
+                    "iscrowd": 0,
+                }
+            )
+    return {"images": images, "annotations": annotations, "categories": categories}
+
+
+@benchmark("slicing/get_slice_bboxes")
+def benchmark_get_slice_bboxes(scale: float, tmp_dir: str):
+    from sahi.slicing import get_slice_bboxes
+
+    image_size = int(8192 * scale**0.5)
+
+    def run():
+        get_slice_bboxes(
+            image_height=image_size,
+            image_width=image_size,
+            slice_height=128,
+            slice_width=128,
+            overlap_height_ratio=0.2,
+            overlap_width_ratio=0.2,
+        )
+
+    return run
+
+
+@benchmark("slicing/slice_image")
+def benchmark_slice_image(scale: float, tmp_dir: str):
+    # the Coco class slicing uses, annotations of other import paths fail its type checks
+    from sahi.slicing import Coco, slice_image
+
+    rng = np.random.default_rng(SEED)
+    image_size = int(4096 * scale**0.5)
+    image = rng.integers(0, 256, size=(image_size, image_size, 3), dtype=np.uint8)
+    coco_dict = get_random_coco_dict(1, int(500 * scale), rng, image_size=image_size)
+    coco_annotation_list = Coco.from_coco_dict_or_path(coco_dict).images[0].annotations
+
+    def run():
+        slice_image(
+            image=image,
+            coco_annotation_list=coco_annotation_list,
+            slice_height=512,
+            slice_width=512,
+            overlap_height_ratio=0.2,
+            overlap_width_ratio=0.2,
+        )
+
+    return run
+
+
+@benchmark("inference/object_prediction_list_to_torch")
+def benchmark_object_prediction_list_to_torch(scale: float, tmp_dir: str):
+    from sahi.postprocess.utils import object_prediction_list_to_torch
+
+    object_predictions = get_random_object_predictions(int(20000 * scale), np.random.default_rng(SEED))
+
+    def run():
+        object_prediction_list_to_torch(object_predictions)
+
+    return run
+
+
+@benchmark("inference/get_sliced_prediction_mock")
+def benchmark_get_sliced_prediction(scale: float, tmp_dir: str):
+    from sahi.model import MockDetectionModel
+    from sahi.predict import get_sliced_prediction
+
+    image_size = int(4096 * scale**0.5)
+    image = np.random.default_rng(SEED).integers(0, 256, size=(image_size, image_size, 3), dtype=np.uint8)
+    detection_model = MockDetectionModel(num_predictions_per_megapixel=200, seed=SEED)
+
+    def run():
+        get_sliced_prediction(image, detection_model, slice_height=512, slice_width=512, verbose=0)
+
+    return run
+
+
+def get_postprocess_benchmark(postprocess_type: str, match_metric: str):
+    def benchmark_postprocess(scale: float, tmp_dir: str):
+        from sahi.predict import POSTPROCESS_NAME_TO_CLASS
+
+        object_predictions = get_random_object_predictions(int(2000 * scale), np.random.default_rng(SEED))
+        postprocess = POSTPROCESS_NAME_TO_CLASS[postprocess_type](
+            match_threshold=0.5, match_metric=match_metric, class_agnostic=False
+        )
+
+        def run():
+            postprocess(object_predictions)
+
+        return run
+
+    return benchmark_postprocess
+
+
+def register_postprocess_benchmarks():
+    from sahi.predict import POSTPROCESS_NAME_TO_CLASS
+
+    for postprocess_type in POSTPROCESS_NAME_TO_CLASS:
+        for match_metric in ["IOU", "IOS"]:
+            benchmark(f"postprocess/{postprocess_type}_{match_metric}")(
+                get_postprocess_benchmark(postprocess_type, match_metric)
+            )
+
+
+@benchmark("coco/from_coco_dict_or_path")
+def benchmark_coco_from_path(scale: float, tmp_dir: str):
+    from sahi.utils.coco import Coco
+    from sahi.utils.file import save_json
+
+    coco_path = os.path.join(tmp_dir, "coco.json")
+    save_json(get_random_coco_dict(int(1000 * scale), 20, np.random.default_rng(SEED)), coco_path)
+
+    def run():
+        Coco.from_coco_dict_or_path(coco_path)
+
+    return run
+
+
+@benchmark("coco/export_yolov5_images_and_txts_from_coco_object")
+def benchmark_export_yolov5(scale: float, tmp_dir: str):
+    from sahi.utils.coco import Coco, export_yolov5_images_and_txts_from_coco_object
+
+    image_dir = os.path.join(tmp_dir, "images")
+    os.makedirs(image_dir, exist_ok=True)
+    coco = Coco.from_coco_dict_or_path(
+        get_random_coco_dict(int(500 * scale), 20, np.random.default_rng(SEED)), image_dir=image_dir
+    )
+    # images are only symlinked, empty files are enough
+    for coco_image in coco.images:
+        open(os.path.join(image_dir, coco_image.file_name), "w").close()
+    run_ind = [0]
+
+    def run():
+        output_dir = os.path.join(tmp_dir, f"yolov5_{run_ind[0]}")
+        os.makedirs(output_dir)
+        run_ind[0] += 1
+        export_yolov5_images_and_txts_from_coco_object(output_dir=output_dir, coco=coco)
+
+    return run
+
+
+def time_function(function: Callable, repeat: int) -> Dict:
+    """Calls function once to warm up, then repeat times, and returns the durations in seconds."""
+    function()
+    durations = []
+    for _ in range(repeat):
+        time_start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - time_start)
+    return {
+        "min": min(durations),
+        "median": statistics.median(durations),
+        "mean": statistics.mean(durations),
+        "durations": durations,
+    }
+
+
+def get_metadata() -> Dict:
+    import torch
+
+    from sahi import __version__ as sahi_version
+
+    try:
+        git_commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        git_commit = None
+    return {
+        "sahi_version": sahi_version,
+        "git_commit": git_commit,
+        "python_version": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "numpy_version": np.__version__,
+        "torch_version": torch.__version__,
+        "torch_num_threads": torch.get_num_threads(),
+    }
+
+
+def run_benchmarks(scale: float = 1.0, repeat: int = 5, filter: Optional[str] = None, verbose: int = 1) -> Dict:
+    """
+    Runs the registered benchmarks and returns their results.
+
+    Args:
+        scale: float
+            Multiplier of the workload sizes, smaller values give faster but noisier runs.
+        repeat: int
+            Number of timed runs of each benchmark, after a warm up run.
+        filter: str
+            Only the benchmarks whose name contains this string are run.
+        verbose: int
+            0: no print
+            1: print the median duration of each benchmark
+    """
+    # one benchmark per class in POSTPROCESS_NAME_TO_CLASS
+    register_postprocess_benchmarks()
+
+    results = {"metadata": dict(get_metadata(), scale=scale, repeat=repeat), "benchmarks": {}}
+    for name, benchmark_function in BENCHMARKS.items():
+        if filter and filter not in name:
+            continue
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            try:
+                result = time_function(benchmark_function(scale=scale, tmp_dir=tmp_dir), repeat=repeat)
+            except ModuleNotFoundError as e:
+                # optional dependencies, e.g. lsnms for LSNMS
+                result = {"skipped": str(e)}
+        results["benchmarks"][name] = result
+        if verbose:
+            if "skipped" in result:
+                print(f"{name}: skipped, {result['skipped']}")
+            else:
+                print(f"{name}: {result['median'] * 1000:.2f} ms")
+    return results
+
+
+def compare_results(results: Dict, baseline_results: Dict, threshold: float = 1.1) -> List[str]:
+    """Prints the median duration ratios to the baseline, returns the names of the benchmarks slower than threshold."""
+    print_console_centered("Comparison to baseline")
+    regressions = []
+    for name, result in results["benchmarks"].items():
+        baseline_result = baseline_results["benchmarks"].get(name)
+        if "median" not in result or baseline_result is None or "median" not in baseline_result:
+            continue
+        ratio = result["median"] / baseline_result["median"]
+        if ratio > threshold:
+            regressions.append(name)
+        print(f"{name}: {ratio:.2f}x{' (slower)' if ratio > threshold else ''}")
+    return regressions
+
+
+def main(
+    output_path: str = "benchmark.json",
+    baseline_path: Optional[str] = None,
+    scale: float = 1.0,
+    repeat: int = 5,
+    filter: Optional[str] = None,
+    threshold: float = 1.1,
+):
+    """
+    Runs the benchmarks and saves the results as json.
+
+    Args:
+        output_path: str
+            Path of the exported results.
+        baseline_path: str
+            Results of a previous run to compare to. Exits with status 1 if a benchmark is
+            slower than threshold times its baseline.
+        scale: float
+            Multiplier of the workload sizes.
+        repeat: int
+            Number of timed runs of each benchmark.
+        filter: str
+            Only the benchmarks whose name contains this string are run.
+        threshold: float
+            Median duration ratio to the baseline over which a benchmark is reported as slower.
+    """
+    results = run_benchmarks(scale=scale, repeat=repeat, filter=filter)
+    with open(output_path, "w") as outfile:
+        json.dump(results, outfile, indent=4)
+    print(f"Results are saved to {output_path}")
+
+    if baseline_path is not None:
+        with open(baseline_path) as infile:
+            baseline_results = json.load(infile)
+        if compare_results(results, baseline_results, threshold=threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    fire.Fire(main)
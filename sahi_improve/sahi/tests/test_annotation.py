@@ -44,6 +44,89 @@ class TestAnnotation(unittest.TestCase):
         self.assertEqual(mask.full_shape_width, full_shape_width)
         self.assertEqual(mask.bool_mask[11, 2], True)
 
+    def test_cropped_mask(self):
+        import numpy as np
+
+        from sahi.annotation import Mask
+        from sahi.prediction import ObjectPrediction
+
+        bool_mask = np.zeros((100, 120), dtype=bool)
+        bool_mask[20:30, 40:55] = True
+        mask = Mask(bool_mask=bool_mask, full_shape=[400, 500], shift_amount=[450, 10])
+        # only the nonzero region is stored
+        self.assertEqual(mask.cropped_bool_mask.shape, (10, 15))
+        self.assertEqual(mask.crop_offset, [40, 20])
+        self.assertEqual(mask.shape, [100, 120])
+        self.assertEqual(mask.get_bbox(), [40, 20, 54, 29])
+        np.testing.assert_array_equal(mask.bool_mask, bool_mask)
+
+        # shifting moves the crop and clips it to the full image
+        shifted_mask = mask.get_shifted_mask()
+        self.assertEqual(shifted_mask.crop_offset, [490, 30])
+        self.assertEqual(shifted_mask.cropped_bool_mask.shape, (10, 10))
+        self.assertEqual(shifted_mask.shape, [400, 500])
+        self.assertEqual(shifted_mask.to_coco_segmentation(), [[490, 30, 490, 39, 499, 39, 499, 30]])
+
+        object_prediction = ObjectPrediction(
+            category_id=0, bool_mask=bool_mask, score=0.5, shift_amount=[450, 10], full_shape=[400, 500]
+        )
+        shifted_object_prediction = object_prediction.get_shifted_object_prediction()
+        self.assertEqual(shifted_object_prediction.bbox.to_voc_bbox(), [490, 30, 499, 39])
+        self.assertEqual(shifted_object_prediction.mask.bool_mask.sum(), 100)
+
+    def test_mask_column_runs(self):
+        import numpy as np
+
+        from sahi.annotation import Mask
+
+        bool_mask = np.zeros((30, 40), dtype=bool)
+        bool_mask[5:12, 8:20] = True
+        bool_mask[10:25, 15:18] = True
+        mask = Mask(bool_mask=bool_mask)
+        self.assertEqual(mask.area, bool_mask.sum())
+
+        cols, row_starts, row_ends = mask.get_column_runs()
+        self.assertEqual(cols.min(), 8)
+        restored_mask = Mask.from_column_runs(cols, row_starts, row_ends, shape=[30, 40])
+        np.testing.assert_array_equal(restored_mask.bool_mask, bool_mask)
+
+        # runs outside the mask are dropped
+        shifted_mask = Mask.from_column_runs(cols + 30, row_starts + 20, row_ends + 20, shape=[30, 40])
+        self.assertEqual(shifted_mask.crop_offset, [38, 25])
+        np.testing.assert_array_equal(shifted_mask.cropped_bool_mask, bool_mask[5:10, 8:10])
+
+    def test_mask_decode_cache(self):
+        import numpy as np
+
+        from sahi.annotation import Mask, _MaskDecodeCache, use_rle
+
+        bool_mask = np.zeros((30, 40), dtype=bool)
+        bool_mask[5:12, 8:20] = True
+        mask = Mask(bool_mask=bool_mask, full_shape=[60, 80], shift_amount=[10, 20])
+        shifted_mask = mask.get_shifted_mask()
+        # the crop is decoded once and shared with the shifted mask
+        self.assertIs(mask.cropped_bool_mask, mask.cropped_bool_mask)
+        self.assertIs(shifted_mask.cropped_bool_mask, mask.cropped_bool_mask)
+        self.assertEqual(shifted_mask.shape, [60, 80])
+        np.testing.assert_array_equal(shifted_mask.bool_mask[25:32, 18:30], bool_mask[5:12, 8:20])
+
+        if use_rle:
+            # the least recently used crops are dropped once the cache is full
+            crops = [np.ones((7, 12), dtype=bool) for _ in range(3)]
+            for ind, crop in enumerate(crops):
+                crop[ind, 0] = False
+            rles = [mask.encode_bool_mask(crop) for crop in crops]
+            decode_cache = _MaskDecodeCache(max_size_bytes=2 * 7 * 12)
+            for rle in [rles[0], rles[1], rles[0], rles[2]]:
+                decoded_crop = decode_cache.decode(rle)
+            self.assertFalse(decoded_crop.flags.writeable)
+            np.testing.assert_array_equal(decoded_crop, crops[2])
+            self.assertEqual((decode_cache.num_hits, decode_cache.num_misses), (1, 3))
+            self.assertEqual(decode_cache.size_bytes, 2 * 7 * 12)
+            decode_cache.decode(rles[0])
+            decode_cache.decode(rles[1])
+            self.assertEqual((decode_cache.num_hits, decode_cache.num_misses), (2, 4))
+
     def test_object_annotation(self):
         from sahi.annotation import ObjectAnnotation
 
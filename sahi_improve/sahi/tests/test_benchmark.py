@@ -0,0 +1,30 @@
+# OBSS SAHI Tool
+# Code written by Fatih C Akyon, 2020.
+
+import json
+import unittest
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_run_benchmarks(self):
+        from sahi.predict import POSTPROCESS_NAME_TO_CLASS
+        from scripts.benchmark import compare_results, run_benchmarks
+
+        results = run_benchmarks(scale=0.01, repeat=1, verbose=0)
+        for postprocess_type in POSTPROCESS_NAME_TO_CLASS:
+            self.assertIn(f"postprocess/{postprocess_type}_IOU", results["benchmarks"])
+        for name in ["slicing/slice_image", "coco/from_coco_dict_or_path", "postprocess/NMS_IOS"]:
+            self.assertEqual(len(results["benchmarks"][name]["durations"]), 1)
+        # results are json serializable
+        results = json.loads(json.dumps(results))
+        self.assertEqual(results["metadata"]["repeat"], 1)
+
+        baseline_results = {"benchmarks": {"postprocess/NMS_IOS": {"median": 1e-9}}}
+        self.assertEqual(compare_results(results, baseline_results), ["postprocess/NMS_IOS"])
+
+        results = run_benchmarks(scale=0.01, repeat=1, filter="slicing/", verbose=0)
+        self.assertEqual(list(results["benchmarks"]), ["slicing/get_slice_bboxes", "slicing/slice_image"])
+
+
+if __name__ == "__main__":
+    unittest.main()
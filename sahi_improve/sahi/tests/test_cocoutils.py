@@ -337,6 +337,81 @@ class TestCocoUtils(unittest.TestCase):
             len(coco1.json["annotations"]),
         )
 
+    def test_coco_annotation_table(self):
+        from sahi.utils.coco import Coco, CocoAnnotationTable
+
+        annotation_dicts = [
+            {"id": 1, "image_id": 1, "category_id": 2, "bbox": [10.4, 20, 30, 40.6], "segmentation": []},
+            {
+                "id": 2,
+                "image_id": 2,
+                "category_id": 1,
+                "segmentation": [[0, 0, 10, 0, 10, 10], [20, 20, 24, 20, 24, 25]],
+            },
+            # rle segmentations are skipped
+            {"id": 3, "image_id": 1, "category_id": 1, "bbox": [0, 0, 5, 5], "segmentation": {"counts": ""}},
+        ]
+        annotation_table = CocoAnnotationTable.from_coco_annotation_dicts(
+            annotation_dicts, category_mapping={1: "car", 2: "bus"}
+        )
+        self.assertEqual(len(annotation_table), 3)
+        self.assertEqual(annotation_table.bboxes.tolist(), [[10, 20, 30, 41], [0, 0, 24, 25], [0, 0, 5, 5]])
+        self.assertEqual(annotation_table.areas.tolist(), [1230, 60, 25])
+        rows_per_image_id = annotation_table.get_rows_per_image_id()
+        self.assertEqual({image_id: rows.tolist() for image_id, rows in rows_per_image_id.items()}, {1: [0, 2], 2: [1]})
+        coco_annotation = annotation_table.get_coco_annotation(1)
+        self.assertEqual(coco_annotation.category_name, "car")
+        self.assertEqual(coco_annotation.bbox, [0, 0, 24, 25])
+        self.assertEqual(coco_annotation.area, 60)
+
+        # annotations are created on access
+        coco_dict_path = "tests/data/coco_utils/combined_coco.json"
+        coco = Coco.from_coco_dict_or_path(coco_dict_path)
+        self.assertEqual(len(coco.annotation_table), len(load_json(coco_dict_path)["annotations"]))
+        self.assertIsNotNone(coco.images[0].get_annotation_table_rows()[0])
+        stats = coco.stats
+        self.assertIsNotNone(coco.images[0].get_annotation_table_rows()[0])
+        self.assertEqual(coco.images[0].annotations[0].area, coco.annotation_table.areas[0])
+        self.assertIsNone(coco.images[0].get_annotation_table_rows()[0])
+        coco.calculate_stats()
+        self.assertEqual(coco.stats, stats)
+
+    def test_coco_stats(self):
+        import copy
+
+        from sahi.utils.coco import Coco, CocoAnnotation, CocoCategory, CocoImage
+
+        coco = Coco()
+        coco.add_category(CocoCategory(id=0, name="car", supercategory="vehicle"))
+        coco.add_category(CocoCategory(id=1, name="bus", supercategory="vehicle"))
+        self.assertEqual(coco.stats["num_images_per_category"], {"car": 0, "bus": 0})
+
+        coco_image = CocoImage(file_name="image1.jpg", height=100, width=100)
+        coco_image.add_annotation(CocoAnnotation(bbox=[0, 0, 10, 10], category_id=0, category_name="car"))
+        coco.add_image(coco_image)
+        coco.add_image(CocoImage(file_name="image2.jpg", height=100, width=100))
+        self.assertEqual(coco.stats["num_images"], 2)
+        self.assertEqual(coco.stats["num_negative_images"], 1)
+        self.assertEqual(coco.stats["num_images_per_category"], {"car": 1})
+        self.assertEqual(coco.stats["max_annotation_area_per_category"], {"car": 100, "bus": 0})
+
+        # annotations of added images update the stats
+        coco_image.add_annotation(CocoAnnotation(bbox=[0, 0, 5, 4], category_id=1, category_name="bus"))
+        coco.images[1].add_annotation(CocoAnnotation(bbox=[0, 0, 20, 20], category_id=0, category_name="car"))
+        stats = coco.stats
+        self.assertEqual(stats["num_annotations"], 3)
+        self.assertEqual(stats["num_negative_images"], 0)
+        self.assertEqual(stats["num_images_per_category"], {"car": 2, "bus": 1})
+        self.assertEqual(stats["min_num_annotations_in_image"], 1)
+        self.assertEqual(stats["max_num_annotations_in_image"], 2)
+        self.assertEqual(stats["min_annotation_area"], 20)
+        coco.calculate_stats()
+        self.assertEqual(coco.stats, stats)
+
+        # copies of the images do not update the stats
+        copy.deepcopy(coco_image).add_annotation(CocoAnnotation(bbox=[0, 0, 5, 4], category_id=1, category_name="bus"))
+        self.assertEqual(coco.stats, stats)
+
     def test_split_coco_as_train_val(self):
         from sahi.utils.coco import Coco
 
@@ -0,0 +1,117 @@
+# OBSS SAHI Tool
+# Code written by Fatih C Akyon, 2020.
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from sahi.utils.cv import (
+    IMAGE_WINDOW_READERS,
+    ArrayWindowReader,
+    NpyWindowReader,
+    PilWindowReader,
+    RawWindowReader,
+    crop_object_predictions,
+    get_bool_mask_from_coco_segmentation,
+    get_coco_segmentation_from_bool_mask,
+    get_cropped_bool_mask_from_coco_segmentation,
+    open_image_window_reader,
+    read_image,
+    register_image_window_reader,
+)
+
+IMAGE_PATH = "tests/data/small-vehicles1.jpeg"
+
+
+class TestCvUtils(unittest.TestCase):
+    def test_open_image_window_reader(self):
+        image = read_image(IMAGE_PATH)
+
+        image_reader = open_image_window_reader(IMAGE_PATH)
+        self.assertIsInstance(image_reader, PilWindowReader)
+        self.assertEqual((image_reader.height, image_reader.width), (580, 1068))
+        np.testing.assert_array_equal(image_reader.read_window([10, 20, 110, 70]), image[20:70, 10:110])
+        self.assertIs(open_image_window_reader(image_reader), image_reader)
+
+        image_reader = open_image_window_reader(image[:, :, 0])
+        self.assertIsInstance(image_reader, ArrayWindowReader)
+        # windows are clipped to the image and grayscale images are read as rgb
+        window = image_reader.read_window([1000, 500, 1100, 600])
+        self.assertEqual(window.shape, (80, 68, 3))
+        np.testing.assert_array_equal(window[:, :, 1], image[500:, 1000:, 0])
+
+    def test_memory_mapped_readers(self):
+        image = read_image(IMAGE_PATH)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            npy_path = os.path.join(tmp_dir, "image.npy")
+            np.save(npy_path, image)
+            with open_image_window_reader(npy_path) as image_reader:
+                self.assertIsInstance(image_reader, NpyWindowReader)
+                np.testing.assert_array_equal(image_reader.read_window([5, 6, 300, 200]), image[6:200, 5:300])
+
+            raw_path = os.path.join(tmp_dir, "image.raw")
+            with open(raw_path, "wb") as raw_file:
+                raw_file.write(b"header")
+                raw_file.write(image.tobytes())
+            image_reader = RawWindowReader(raw_path, height=580, width=1068, offset=6)
+            np.testing.assert_array_equal(image_reader.read_image(), image)
+
+            # custom suffixes
+            register_image_window_reader(".bin", NpyWindowReader)
+            bin_path = os.path.join(tmp_dir, "image.bin")
+            os.rename(npy_path, bin_path)
+            self.assertIsInstance(open_image_window_reader(bin_path), NpyWindowReader)
+            IMAGE_WINDOW_READERS.pop(".bin")
+
+    def test_crop_object_predictions(self):
+        from sahi.prediction import ObjectPrediction
+
+        image = read_image(IMAGE_PATH)
+        object_prediction_list = [
+            ObjectPrediction(bbox=[10, 20, 110, 70], category_id=1, category_name="car", score=0.9),
+            ObjectPrediction(bbox=[1000, 500, 1100, 600], category_id=2, category_name="bus", score=0.8),
+        ]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            npy_path = os.path.join(tmp_dir, "image.npy")
+            np.save(npy_path, image)
+            crop_object_predictions(npy_path, object_prediction_list, output_dir=tmp_dir, file_name="crop")
+            cropped_image = read_image(os.path.join(tmp_dir, "crop_box0_class1.png"))
+            np.testing.assert_array_equal(cropped_image, image[20:70, 10:110])
+            cropped_image = read_image(os.path.join(tmp_dir, "crop_box1_class2.png"))
+            self.assertEqual(cropped_image.shape, (80, 68, 3))
+
+    def test_coco_segmentation_conversions(self):
+        # the parts of the polygon outside the mask are clipped
+        coco_segmentation = [[1, 1, 325, 125, 250, 200, 5, 200], [-10, -10, 3, -10, 3, 3]]
+        cropped_bool_mask, crop_offset = get_cropped_bool_mask_from_coco_segmentation(
+            coco_segmentation, width=300, height=150
+        )
+        self.assertEqual(crop_offset, [0, 0])
+        self.assertEqual(cropped_bool_mask.shape, (150, 300))
+        bool_mask = get_bool_mask_from_coco_segmentation(coco_segmentation, width=300, height=150)
+        self.assertEqual(bool_mask.dtype, bool)
+        np.testing.assert_array_equal(bool_mask, cropped_bool_mask)
+        self.assertFalse(bool_mask[0, 4])
+
+        cropped_bool_mask, crop_offset = get_cropped_bool_mask_from_coco_segmentation(
+            [[100, 50, 120, 50, 120, 60, 100, 60]], width=400, height=300
+        )
+        self.assertEqual(crop_offset, [100, 50])
+        self.assertTrue(cropped_bool_mask.all())
+        self.assertEqual(cropped_bool_mask.shape, (11, 21))
+        cropped_bool_mask, _ = get_cropped_bool_mask_from_coco_segmentation(
+            [[500, 50, 520, 50, 520, 60]], width=400, height=300
+        )
+        self.assertEqual(cropped_bool_mask.shape, (0, 0))
+
+        # polygons are extracted from the nonzero region, in mask coordinates
+        bool_mask = np.zeros((300, 400, 1), dtype=bool)
+        bool_mask[50:61, 100:121] = True
+        self.assertEqual(get_coco_segmentation_from_bool_mask(bool_mask), [[100, 50, 100, 60, 120, 60, 120, 50]])
+        self.assertEqual(get_coco_segmentation_from_bool_mask(np.zeros((300, 400), dtype=bool)), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
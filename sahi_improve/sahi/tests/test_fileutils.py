@@ -1,6 +1,7 @@
 # OBSS SAHI Tool
 # Code written by Fatih C Akyon, 2020.
 
+import os
 import unittest
 
 
@@ -22,6 +23,73 @@ class TestFileUtils(unittest.TestCase):
         self.assertEqual(len(relative_filepath_list), 7)
         self.assertEqual(len(abs_filepath_list), 7)
 
+    def test_export_writer(self):
+        import tempfile
+        import threading
+
+        from sahi.utils.file import ExportWriter, load_pickle, save_pickle
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for num_workers, worker_type in [(0, "thread"), (2, "thread"), (2, "process")]:
+                with ExportWriter(num_workers=num_workers, max_queue_size=2, worker_type=worker_type) as export_writer:
+                    for ind in range(5):
+                        save_path = os.path.join(tmp_dir, worker_type + str(num_workers), f"{ind}.pickle")
+                        export_writer.submit(save_pickle, data={"image_id": ind}, save_path=save_path)
+                    export_writer.flush()
+                    self.assertEqual(load_pickle(save_path), {"image_id": 4})
+
+            # submit blocks while the queue is full
+            event = threading.Event()
+            export_writer = ExportWriter(num_workers=1, max_queue_size=1)
+            export_writer.submit(event.wait)
+            timer = threading.Timer(0.2, event.set)
+            timer.start()
+            export_writer.submit(event.wait)
+            self.assertGreater(export_writer.wait_duration, 0.1)
+            export_writer.close()
+
+            # job errors are raised on flush
+            export_writer = ExportWriter(num_workers=1)
+            export_writer.submit(load_pickle, os.path.join(tmp_dir, "missing.pickle"))
+            with self.assertRaises(FileNotFoundError):
+                export_writer.flush()
+            export_writer.close()
+
+            with self.assertRaises(ValueError):
+                ExportWriter(worker_type="fiber")
+
+    def test_disk_lru_cache(self):
+        import tempfile
+
+        from sahi.utils.file import DiskLRUCache
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = DiskLRUCache(tmp_dir)
+            self.assertIsNone(cache.get("a"))
+            cache.set("a", [1, 2])
+            self.assertEqual(cache.get("a"), [1, 2])
+            self.assertEqual((cache.num_hits, cache.num_misses), (1, 1))
+            file_size = cache.size_bytes
+
+            # least recently used files are deleted beyond max_size_bytes
+            cache = DiskLRUCache(tmp_dir, max_size_bytes=2 * file_size)
+            self.assertIn("a", cache)
+            cache.set("b", [3, 4])
+            cache.get("a")
+            cache.set("c", [5, 6])
+            self.assertEqual(sorted(os.listdir(tmp_dir)), ["a.pickle", "c.pickle"])
+
+            # usage order is kept across runs
+            cache.get("a")
+            cache = DiskLRUCache(tmp_dir, max_size_bytes=file_size)
+            self.assertEqual(len(cache), 1)
+            self.assertEqual(cache.get("a"), [1, 2])
+
+            cache.clear()
+            self.assertEqual(os.listdir(tmp_dir), [])
+            with self.assertRaises(ValueError):
+                DiskLRUCache(tmp_dir, max_size_bytes=-1)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,52 @@
+# OBSS SAHI Tool
+# Code written by Fatih C Akyon, 2020.
+
+import subprocess
+import sys
+import unittest
+
+# cold start budget for importing the cli app, in seconds
+CLI_IMPORT_TIME_LIMIT = 1.0
+# frameworks that should only be imported once they are used
+HEAVY_MODULES = ["torch", "torchvision", "tensorflow", "keras", "mmdet", "yolov5", "detectron2", "transformers"]
+
+
+def get_cli_import_time() -> float:
+    """Returns the cumulative import time of sahi.cli in a fresh interpreter, in seconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "from sahi.cli import app"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == "sahi.cli":
+            return int(fields[1]) / 1e6
+    raise RuntimeError(f"sahi.cli import time not found in:\n{result.stderr}")
+
+
+class TestImportTime(unittest.TestCase):
+    def test_cli_import_does_not_load_frameworks(self):
+        code = f"import sys; from sahi.cli import app; print(','.join(m for m in {HEAVY_MODULES} if m in sys.modules))"
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), "")
+
+    def test_cli_import_time(self):
+        # best of a few runs to smooth out file system cache effects
+        import_time = min(get_cli_import_time() for _ in range(3))
+        self.assertLess(import_time, CLI_IMPORT_TIME_LIMIT)
+
+    def test_lazy_import(self):
+        from sahi.utils.import_utils import LazyModule, lazy_import
+
+        self.assertIs(lazy_import("sys"), sys)
+
+        json_module = LazyModule("json")
+        self.assertEqual(json_module.dumps([1]), "[1]")
+        self.assertIn("loads", dir(json_module))
+
+
+if __name__ == "__main__":
+    unittest.main()
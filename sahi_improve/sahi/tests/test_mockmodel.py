@@ -0,0 +1,127 @@
+# OBSS SAHI Tool
+# Code written by Fatih C Akyon, 2020.
+
+import time
+import unittest
+
+import numpy as np
+
+CONFIDENCE_THRESHOLD = 0.5
+
+
+class TestMockDetectionModel(unittest.TestCase):
+    def test_load_model(self):
+        from sahi.auto_model import AutoDetectionModel
+
+        mock_detection_model = AutoDetectionModel.from_pretrained(model_type="mock", num_categories=2)
+        self.assertEqual(type(mock_detection_model).__name__, "MockDetectionModel")
+        self.assertEqual(mock_detection_model.category_mapping, {"0": "mock0", "1": "mock1"})
+        self.assertEqual(mock_detection_model.device, "cpu")
+
+    def test_perform_inference(self):
+        from sahi.model import MockDetectionModel
+
+        image = np.zeros((600, 800, 3), dtype=np.uint8)
+        mock_detection_model = MockDetectionModel(
+            confidence_threshold=CONFIDENCE_THRESHOLD, num_predictions_per_megapixel=200, with_mask=True
+        )
+        mock_detection_model.perform_inference(image)
+        mock_detection_model.convert_original_predictions()
+        object_prediction_list = mock_detection_model.object_prediction_list
+        self.assertGreater(len(object_prediction_list), 0)
+        for object_prediction in object_prediction_list:
+            self.assertGreaterEqual(object_prediction.score.value, CONFIDENCE_THRESHOLD)
+            self.assertEqual(object_prediction.mask.bool_mask.shape, (600, 800))
+            xmin, ymin, xmax, ymax = object_prediction.bbox.to_voc_bbox()
+            self.assertTrue(0 <= xmin < xmax <= 800 and 0 <= ymin < ymax <= 600)
+
+        # predictions are deterministic, the objects of a slice are the objects of the full image in it
+        mock_detection_model = MockDetectionModel(
+            confidence_threshold=CONFIDENCE_THRESHOLD, num_predictions_per_megapixel=200
+        )
+        mock_detection_model.perform_inference(image)
+        mock_detection_model.convert_original_predictions()
+        full_voc_bboxes = [
+            object_prediction.bbox.to_voc_bbox() for object_prediction in mock_detection_model.object_prediction_list
+        ]
+        mock_detection_model.perform_inference(image[100:400, 200:500])
+        mock_detection_model.convert_original_predictions(shift_amount=[200, 100], full_shape=[600, 800])
+        slice_voc_bboxes = [
+            object_prediction.get_shifted_object_prediction().bbox.to_voc_bbox()
+            for object_prediction in mock_detection_model.object_prediction_list
+        ]
+        self.assertGreater(len(slice_voc_bboxes), 0)
+        for voc_bbox in slice_voc_bboxes:
+            if voc_bbox[0] > 200 and voc_bbox[1] > 100 and voc_bbox[2] < 500 and voc_bbox[3] < 400:
+                self.assertIn(voc_bbox, full_voc_bboxes)
+
+        # density and latency are configurable
+        mock_detection_model = MockDetectionModel(
+            confidence_threshold=0, num_predictions_per_megapixel=1000, latency_per_batch=0.05, seed=1
+        )
+        time_start = time.time()
+        mock_detection_model.perform_inference([image, image])
+        self.assertGreaterEqual(time.time() - time_start, 0.05)
+        mock_detection_model.convert_original_predictions(shift_amount=[[0, 0], [0, 0]])
+        self.assertEqual(len(mock_detection_model.object_prediction_list_per_image), 2)
+        self.assertGreater(len(mock_detection_model.object_prediction_list_per_image[0]), 300)
+
+        # categories are taken from category_mapping
+        category_mapping = {"3": "car", "7": "bus"}
+        mock_detection_model = MockDetectionModel(confidence_threshold=0, category_mapping=category_mapping)
+        mock_detection_model.perform_inference(image)
+        mock_detection_model.convert_original_predictions()
+        self.assertEqual(
+            {
+                (object_prediction.category.id, object_prediction.category.name)
+                for object_prediction in mock_detection_model.object_prediction_list
+            },
+            {(3, "car"), (7, "bus")},
+        )
+
+        with self.assertRaises(ValueError):
+            MockDetectionModel(min_object_size=10, max_object_size=5)
+
+    def test_sliced_prediction(self):
+        from sahi.model import MockDetectionModel
+        from sahi.predict import get_sliced_prediction
+
+        image = np.zeros((600, 800, 3), dtype=np.uint8)
+        prediction_result = get_sliced_prediction(
+            image,
+            MockDetectionModel(confidence_threshold=CONFIDENCE_THRESHOLD),
+            slice_height=256,
+            slice_width=256,
+            postprocess_type="NMS",
+            postprocess_match_metric="IOU",
+            verbose=0,
+        )
+        self.assertGreater(len(prediction_result.object_prediction_list), 0)
+
+    def test_sliced_prediction_with_merge_buffer(self):
+        from sahi.model import MockDetectionModel
+        from sahi.predict import get_sliced_prediction
+
+        image = np.zeros((600, 800, 3), dtype=np.uint8)
+        voc_bboxes_per_run = {}
+        for stream_slices in [False, True]:
+            prediction_result = get_sliced_prediction(
+                image,
+                MockDetectionModel(confidence_threshold=CONFIDENCE_THRESHOLD),
+                slice_height=256,
+                slice_width=256,
+                postprocess_type="GREEDYNMM",
+                merge_buffer_length=0,
+                batch_size=2,
+                stream_slices=stream_slices,
+                verbose=0,
+            )
+            voc_bboxes_per_run[stream_slices] = sorted(
+                object_prediction.bbox.to_voc_bbox() for object_prediction in prediction_result.object_prediction_list
+            )
+        self.assertGreater(len(voc_bboxes_per_run[False]), 0)
+        self.assertEqual(voc_bboxes_per_run[False], voc_bboxes_per_run[True])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,208 @@
+# OBSS SAHI Tool
+# Code written by Fatih C Akyon, 2020.
+
+import unittest
+
+import numpy as np
+import torch
+
+from sahi.postprocess.combine import (
+    NMSPostprocess,
+    WindowedPostprocess,
+    batched_nms,
+    get_match_lists,
+    get_match_matrix,
+    greedy_nmm,
+    nmm,
+    nms,
+    origin_nms,
+)
+from sahi.postprocess.utils import ObjectPredictionList, get_overlapping_pairs
+from sahi.prediction import ObjectPrediction
+
+# [x1, y1, x2, y2, score, category_id]
+PREDICTIONS = torch.tensor(
+    [
+        [0, 0, 100, 100, 0.9, 0],
+        [10, 10, 110, 110, 0.8, 0],
+        [0, 0, 50, 50, 0.7, 0],
+        [200, 200, 260, 260, 0.6, 1],
+        [205, 205, 260, 260, 0.95, 0],
+    ],
+    dtype=torch.float32,
+)
+
+
+class TestPostprocess(unittest.TestCase):
+    def test_get_match_matrix(self):
+        match_matrix = get_match_matrix(PREDICTIONS, match_metric="IOU", match_threshold=0.5)
+        self.assertEqual(match_matrix.shape, (5, 5))
+        self.assertTrue(match_matrix[0, 1])
+        self.assertFalse(match_matrix[0, 2])
+        self.assertTrue(match_matrix[4, 3])
+
+        match_matrix = get_match_matrix(PREDICTIONS, match_metric="IOS", match_threshold=0.5)
+        self.assertTrue(match_matrix[0, 2])
+
+        match_matrix = get_match_matrix(
+            PREDICTIONS, match_metric="IOU", match_threshold=0.5, category_ids=PREDICTIONS[:, 5]
+        )
+        self.assertFalse(match_matrix[4, 3])
+
+        with self.assertRaises(ValueError):
+            get_match_matrix(PREDICTIONS, match_metric="IOA")
+
+    def test_nms(self):
+        self.assertEqual(nms(PREDICTIONS, match_metric="IOU", match_threshold=0.5), [4, 0, 2])
+        self.assertEqual(nms(PREDICTIONS, match_metric="IOS", match_threshold=0.5), [4, 0])
+        self.assertEqual(nms(PREDICTIONS[:0], match_metric="IOU", match_threshold=0.5), [])
+
+    def test_batched_nms(self):
+        keep = batched_nms(PREDICTIONS, match_metric="IOU", match_threshold=0.5, len_original=0)
+        self.assertEqual(keep, [4, 0, 2, 3])
+        keep = batched_nms(PREDICTIONS, match_metric="IOS", match_threshold=0.5, len_original=0)
+        self.assertEqual(keep, [4, 0, 3])
+
+    def test_origin_nms(self):
+        predictions = torch.tensor([[0, 0, 100, 100, 0.9, 0], [5, 5, 100, 100, 0.5, 0]], dtype=torch.float32)
+        self.assertEqual(origin_nms(predictions, match_metric="IOU", match_threshold=0.5, len_original=2), [0])
+        # predictions after len_original are selected first
+        self.assertEqual(origin_nms(predictions, match_metric="IOU", match_threshold=0.5, len_original=1), [1])
+        # and are always kept
+        keep = origin_nms(PREDICTIONS, match_metric="IOU", match_threshold=0.5, len_original=3)
+        self.assertEqual(keep, [4, 0, 2, 3])
+
+    def test_greedy_nmm(self):
+        keep_to_merge_list = greedy_nmm(PREDICTIONS, match_metric="IOS", match_threshold=0.5)
+        self.assertEqual(keep_to_merge_list, {4: [3], 0: [1, 2]})
+        for grid_cell_size in [16, 64, 1000]:
+            self.assertEqual(
+                greedy_nmm(PREDICTIONS, match_metric="IOS", match_threshold=0.5, grid_cell_size=grid_cell_size),
+                keep_to_merge_list,
+            )
+
+    def test_nmm(self):
+        keep_to_merge_list = nmm(PREDICTIONS, match_metric="IOS", match_threshold=0.5)
+        self.assertEqual(keep_to_merge_list, {4: [3], 0: [2, 1]})
+        for grid_cell_size in [16, 64, 1000]:
+            self.assertEqual(
+                nmm(PREDICTIONS, match_metric="IOS", match_threshold=0.5, grid_cell_size=grid_cell_size),
+                keep_to_merge_list,
+            )
+
+    def test_debug_trace(self):
+        import logging
+
+        from sahi.postprocess.combine import GreedyNMMPostprocess, NMSPostprocess, logger
+
+        debug_trace = []
+        nms(PREDICTIONS, match_metric="IOU", match_threshold=0.5, debug_trace=debug_trace)
+        greedy_nmm(PREDICTIONS, match_metric="IOS", match_threshold=0.5, debug_trace=debug_trace)
+        self.assertEqual(debug_trace[0], {"function": "nms", "keep": [4, 0, 2], "suppressed_by": {3: 4, 1: 0}})
+        self.assertEqual(debug_trace[1], {"function": "greedy_nmm", "keep_to_merge_list": {4: [3], 0: [1, 2]}})
+
+        object_predictions = ObjectPredictionList.from_array(PREDICTIONS.numpy())[list(range(5))].tolist()
+        postprocess = NMSPostprocess(match_threshold=0.5, match_metric="IOU", class_agnostic=True)
+        postprocess(object_predictions)
+        # decisions are only recorded at debug log level
+        self.assertIsNone(postprocess.debug_trace)
+        logger.setLevel(logging.DEBUG)
+        try:
+            postprocess(object_predictions)
+            self.assertEqual(postprocess.debug_trace[0]["keep"], [4, 0, 2])
+            postprocess = GreedyNMMPostprocess(match_threshold=0.5, match_metric="IOS", class_agnostic=False)
+            postprocess(object_predictions)
+        finally:
+            logger.setLevel(logging.NOTSET)
+        self.assertEqual(postprocess.debug_trace[0]["function"], "batched_greedy_nmm")
+        self.assertEqual(postprocess.debug_trace[1]["function"], "merge_object_prediction_pair")
+        self.assertEqual(postprocess.debug_trace[1]["merged"], {0: [1, 2]})
+
+    def test_get_merged_mask(self):
+        from sahi.postprocess.utils import get_merged_mask
+
+        bool_masks = [np.zeros((50, 60), dtype=bool) for _ in range(2)]
+        bool_masks[0][5:20, 10:30] = True
+        bool_masks[1][15:40, 25:58] = True
+        object_predictions = [
+            ObjectPrediction(bbox=None, category_id=0, bool_mask=bool_mask, score=0.5) for bool_mask in bool_masks
+        ]
+        merged_mask = get_merged_mask(*object_predictions)
+        self.assertEqual(merged_mask.crop_offset, [10, 5])
+        self.assertEqual(merged_mask.crop_shape, [35, 48])
+        np.testing.assert_array_equal(merged_mask.bool_mask, bool_masks[0] | bool_masks[1])
+
+    def test_get_overlapping_pairs(self):
+        first_indices, second_indices = get_overlapping_pairs(PREDICTIONS[:, :4].numpy(), cell_size=64)
+        self.assertEqual(list(zip(first_indices.tolist(), second_indices.tolist())), [(0, 1), (0, 2), (1, 2), (3, 4)])
+        # touching boxes do not overlap
+        boxes = [[0, 0, 64, 64], [64, 0, 128, 64]]
+        self.assertEqual(len(get_overlapping_pairs(boxes, cell_size=64)[0]), 0)
+        with self.assertRaises(ValueError):
+            get_overlapping_pairs(boxes, cell_size=0)
+
+    def test_get_match_lists(self):
+        match_lists = get_match_lists(PREDICTIONS, match_metric="IOS", match_threshold=0.5)
+        self.assertEqual([matched.tolist() for matched in match_lists], [[1, 2], [0, 2], [0, 1], [4], [3]])
+        match_lists = get_match_lists(PREDICTIONS, match_metric="IOS", match_threshold=0.5, grid_cell_size=64)
+        self.assertEqual([matched.tolist() for matched in match_lists], [[1, 2], [0, 2], [0, 1], [4], [3]])
+
+    def test_object_prediction_list(self):
+        object_predictions = [
+            ObjectPrediction(bbox=[0, 0, 10, 20], category_id=1, category_name="car", score=0.9),
+            ObjectPrediction(bbox=[5, 5, 15, 25], category_id=2, category_name="bus", score=0.4),
+        ]
+        object_prediction_list = ObjectPredictionList(object_predictions)
+        np.testing.assert_allclose(object_prediction_list.tonumpy(), [[0, 0, 10, 20, 0.9, 1], [5, 5, 15, 25, 0.4, 2]])
+        self.assertEqual(object_prediction_list.tonumpy().dtype.name, "float32")
+
+        # tensor and numpy views share memory with the list
+        object_prediction_list.totensor()[0, 4] = 0.5
+        self.assertEqual(float(object_prediction_list.tonumpy()[0, 4]), 0.5)
+
+        self.assertIs(object_prediction_list[1].tolist(), object_predictions[1])
+        self.assertIs(object_prediction_list[-1].tolist(), object_predictions[1])
+        np.testing.assert_allclose(object_prediction_list[-2].tonumpy(), [[0, 0, 10, 20, 0.5, 1]])
+        with self.assertRaises(IndexError):
+            object_prediction_list[2]
+        self.assertEqual(object_prediction_list[[1, 0]].tolist(), object_predictions[::-1])
+        self.assertEqual(object_prediction_list[[]].tolist(), [])
+
+        object_prediction_list[0] = object_predictions[1]
+        self.assertEqual(object_prediction_list.tonumpy()[0].tolist(), object_prediction_list.tonumpy()[1].tolist())
+
+        # object predictions are created on access
+        object_prediction_list = ObjectPredictionList.from_array(PREDICTIONS.numpy())
+        self.assertEqual(len(object_prediction_list), 5)
+        object_prediction = object_prediction_list[3].tolist()
+        self.assertEqual(object_prediction.bbox.to_voc_bbox(), [200, 200, 260, 260])
+        self.assertEqual(object_prediction.category.id, 1)
+        self.assertAlmostEqual(object_prediction.score.value, 0.6, places=5)
+
+    def test_windowed_postprocess(self):
+        # 2x2 slices
+        slice_bboxes = [[0, 0, 60, 60], [40, 0, 100, 60], [0, 40, 60, 100], [40, 40, 100, 100]]
+        postprocess = NMSPostprocess(match_threshold=0.5, match_metric="IOU", class_agnostic=True)
+        windowed_postprocess = WindowedPostprocess(postprocess, slice_bboxes, merge_buffer_length=0)
+        object_prediction_1 = ObjectPrediction(bbox=[10, 10, 30, 30], category_id=1, score=0.9)
+        object_prediction_2 = ObjectPrediction(bbox=[42, 5, 58, 20], category_id=1, score=0.8)
+        object_prediction_3 = ObjectPrediction(bbox=[42, 5, 58, 21], category_id=1, score=0.7)
+
+        # predictions are finalized once no remaining slice overlaps them
+        windowed_postprocess.add([[object_prediction_1, object_prediction_2]])
+        self.assertEqual(windowed_postprocess.final_object_predictions, [object_prediction_1])
+        self.assertEqual(windowed_postprocess.active_object_predictions, [object_prediction_2])
+        windowed_postprocess.add([[object_prediction_3]])
+        self.assertEqual(windowed_postprocess.final_object_predictions, [object_prediction_1, object_prediction_2])
+        self.assertEqual(windowed_postprocess.active_object_predictions, [])
+        windowed_postprocess.add([[], []])
+
+        # finalized predictions are merged with the overlapping full image predictions
+        object_prediction_4 = ObjectPrediction(bbox=[10, 10, 30, 31], category_id=1, score=0.95)
+        object_prediction_list = windowed_postprocess.finish([object_prediction_4])
+        self.assertEqual(object_prediction_list, [object_prediction_2, object_prediction_4])
+        self.assertEqual(windowed_postprocess.final_object_predictions, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,9 +4,12 @@
 import os
 import shutil
 import unittest
+from pathlib import Path
 
 import numpy as np
 
+from sahi.model import DetectionModel
+from sahi.prediction import ObjectPrediction
 from sahi.utils.cv import read_image
 
 MODEL_DEVICE = "cpu"
@@ -14,6 +17,41 @@ CONFIDENCE_THRESHOLD = 0.5
 IMAGE_SIZE = 320
 
 
+class StaticDetectionModel(DetectionModel):
+    """Predicts a single fixed box per image and records batch sizes."""
+
+    def load_model(self):
+        self.model = "static"
+        self.category_mapping = {"0": "car"}
+        self.batch_sizes = []
+
+    def perform_inference(self, image):
+        image_list = image if isinstance(image, list) else [image]
+        self.batch_sizes.append(len(image_list))
+        self._original_predictions = [[10, 10, 50, 40] for _ in image_list]
+
+    def _create_object_prediction_list_from_original_predictions(
+        self, shift_amount_list=[[0, 0]], full_shape_list=None
+    ):
+        if isinstance(shift_amount_list[0], int):
+            shift_amount_list = [shift_amount_list]
+        if full_shape_list is not None and isinstance(full_shape_list[0], int):
+            full_shape_list = [full_shape_list]
+        self._object_prediction_list_per_image = [
+            [
+                ObjectPrediction(
+                    bbox=bbox,
+                    category_id=0,
+                    category_name="car",
+                    score=0.9,
+                    shift_amount=shift_amount_list[image_ind],
+                    full_shape=None if full_shape_list is None else full_shape_list[image_ind],
+                )
+            ]
+            for image_ind, bbox in enumerate(self._original_predictions)
+        ]
+
+
 class TestPredict(unittest.TestCase):
     def test_prediction_score(self):
         from sahi.prediction import PredictionScore
@@ -294,6 +332,138 @@ class TestPredict(unittest.TestCase):
                 num_car += 1
         self.assertEqual(num_car, 10)
 
+    def test_get_sliced_prediction_with_batch_size(self):
+        from sahi.predict import get_sliced_prediction
+
+        # prepare image
+        image_path = "tests/data/small-vehicles1.jpeg"
+
+        voc_bboxes_per_run = {}
+        for batch_size, stream_slices in [(1, False), (4, False), (4, True)]:
+            detection_model = StaticDetectionModel(device=MODEL_DEVICE)
+            prediction_result = get_sliced_prediction(
+                image=image_path,
+                detection_model=detection_model,
+                slice_height=256,
+                slice_width=256,
+                overlap_height_ratio=0,
+                overlap_width_ratio=0,
+                perform_standard_pred=False,
+                postprocess_type="NMS",
+                postprocess_match_metric="IOU",
+                postprocess_match_threshold=0.5,
+                batch_size=batch_size,
+                stream_slices=stream_slices,
+                verbose=0,
+            )
+            voc_bboxes_per_run[batch_size, stream_slices] = sorted(
+                object_prediction.bbox.to_voc_bbox() for object_prediction in prediction_result.object_prediction_list
+            )
+            if batch_size == 1:
+                num_slices = len(detection_model.batch_sizes)
+            else:
+                self.assertEqual(detection_model.batch_sizes, [4, 4, 4, 3])
+
+        # compare
+        self.assertEqual(num_slices, 15)
+        self.assertEqual(len(voc_bboxes_per_run[1, False]), 15)
+        self.assertEqual(voc_bboxes_per_run[1, False], voc_bboxes_per_run[4, False])
+        self.assertEqual(voc_bboxes_per_run[1, False], voc_bboxes_per_run[4, True])
+        self.assertIn([266, 334, 306, 364], voc_bboxes_per_run[4, False])
+
+    def test_get_sliced_prediction_with_prediction_cache(self):
+        import tempfile
+
+        from sahi.predict import get_sliced_prediction
+        from sahi.utils.file import DiskLRUCache
+
+        image_path = "tests/data/small-vehicles1.jpeg"
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            voc_bboxes_per_run = []
+            for postprocess_match_threshold, batch_size in [(0.5, 1), (0.5, 4), (0.9, 4)]:
+                detection_model = StaticDetectionModel(device=MODEL_DEVICE)
+                prediction_result = get_sliced_prediction(
+                    image=image_path,
+                    detection_model=detection_model,
+                    slice_height=256,
+                    slice_width=256,
+                    postprocess_type="NMS",
+                    postprocess_match_metric="IOU",
+                    postprocess_match_threshold=postprocess_match_threshold,
+                    batch_size=batch_size,
+                    verbose=0,
+                    prediction_cache=DiskLRUCache(tmp_dir),
+                )
+                voc_bboxes_per_run.append(
+                    sorted(
+                        object_prediction.bbox.to_voc_bbox()
+                        for object_prediction in prediction_result.object_prediction_list
+                    )
+                )
+                # 15 slices and the standard prediction are only predicted in the first run
+                self.assertEqual(sum(detection_model.batch_sizes), 16 if len(voc_bboxes_per_run) == 1 else 0)
+            self.assertEqual(voc_bboxes_per_run[0], voc_bboxes_per_run[1])
+            self.assertEqual(voc_bboxes_per_run[0], voc_bboxes_per_run[2])
+
+            # a different confidence threshold is a different model setting
+            detection_model = StaticDetectionModel(device=MODEL_DEVICE, confidence_threshold=0.4)
+            get_sliced_prediction(
+                image=image_path,
+                detection_model=detection_model,
+                slice_height=256,
+                slice_width=256,
+                verbose=0,
+                prediction_cache=DiskLRUCache(tmp_dir),
+            )
+            self.assertEqual(sum(detection_model.batch_sizes), 16)
+
+    def test_pipelined_prediction(self):
+        from sahi.predict import predict
+        from sahi.utils.file import load_pickle
+
+        source = "tests/data/coco_utils/"
+        project_dir = "tests/data/predict_result"
+
+        voc_bboxes_per_run = {}
+        pipeline_configs = [(0, 0, "thread"), (2, 2, "thread"), (1, 2, "process")]
+        for num_decode_workers, num_export_workers, export_worker_type in pipeline_configs:
+            if os.path.isdir(project_dir):
+                shutil.rmtree(project_dir, ignore_errors=True)
+            result = predict(
+                detection_model=StaticDetectionModel(device=MODEL_DEVICE),
+                source=source,
+                no_standard_prediction=True,
+                slice_height=256,
+                slice_width=256,
+                postprocess_type="NMS",
+                postprocess_match_metric="IOU",
+                novisual=True,
+                export_pickle=True,
+                project=project_dir,
+                name="exp",
+                verbose=0,
+                return_dict=True,
+                num_decode_workers=num_decode_workers,
+                num_export_workers=num_export_workers,
+                pipeline_queue_size=1,
+                export_worker_type=export_worker_type,
+            )
+            pickle_paths = sorted(Path(result["export_dir"], "pickles").glob("*.pickle"))
+            voc_bboxes_per_run[num_export_workers, export_worker_type] = {
+                pickle_path.name: sorted(
+                    object_prediction.bbox.to_voc_bbox() for object_prediction in load_pickle(str(pickle_path))
+                )
+                for pickle_path in pickle_paths
+            }
+            for stage in ["decode", "decode_wait", "prediction", "export_files", "export_wait"]:
+                self.assertIn(stage, result["durations_in_seconds"])
+        shutil.rmtree(project_dir, ignore_errors=True)
+
+        # compare
+        self.assertEqual(len(voc_bboxes_per_run[0, "thread"]), 4)
+        self.assertEqual(voc_bboxes_per_run[0, "thread"], voc_bboxes_per_run[2, "thread"])
+        self.assertEqual(voc_bboxes_per_run[0, "thread"], voc_bboxes_per_run[2, "process"])
+
     def test_coco_json_prediction(self):
         from sahi.predict import predict
         from sahi.utils.mmdet import MmdetTestConstants, download_mmdet_yolox_tiny_model
@@ -0,0 +1,82 @@
+# OBSS SAHI Tool
+# Code written by Fatih C Akyon, 2020.
+
+import json
+import os
+import shutil
+import threading
+import time
+import unittest
+
+from sahi.utils.profiling import Profiler
+
+
+class TestProfiling(unittest.TestCase):
+    def test_profiler(self):
+        profiler = Profiler()
+        for _ in range(3):
+            with profiler.span("infer", batch_size=2) as span:
+                time.sleep(0.01)
+            self.assertGreaterEqual(span.duration, 0.01)
+        profiler.add_span("export", start=time.perf_counter(), duration=0.5, function="save_pickle")
+
+        # spans are recorded from any thread
+        thread = threading.Thread(target=lambda: profiler.add_span("decode", start=time.perf_counter(), duration=0.1))
+        thread.start()
+        thread.join()
+
+        self.assertEqual(len(profiler.get_durations("infer")), 3)
+        self.assertEqual(profiler.get_total_duration("export"), 0.5)
+        summary = profiler.summary(percentiles=(50, 99.9))
+        self.assertEqual(summary["infer"]["count"], 3)
+        self.assertLessEqual(summary["infer"]["min"], summary["infer"]["p50"])
+        self.assertLessEqual(summary["infer"]["p99.9"], summary["infer"]["max"])
+        self.assertEqual(summary["decode"]["p50"], 0.1)
+
+        trace_events = profiler.to_chrome_trace()["traceEvents"]
+        self.assertEqual([event["name"] for event in trace_events], ["infer"] * 3 + ["export", "decode"])
+        self.assertEqual(trace_events[0]["args"], {"batch_size": 2})
+        self.assertEqual(trace_events[3]["dur"], 0.5e6)
+        self.assertNotEqual(trace_events[0]["tid"], trace_events[4]["tid"])
+        self.assertTrue(all(event["ts"] > 0 for event in trace_events))
+
+        profiler.clear()
+        self.assertEqual(profiler.summary(), {})
+
+    def test_predict_export_profile(self):
+        from sahi.model import MockDetectionModel
+        from sahi.predict import predict
+
+        project_dir = "tests/data/predict_result"
+        if os.path.isdir(project_dir):
+            shutil.rmtree(project_dir, ignore_errors=True)
+        result = predict(
+            detection_model=MockDetectionModel(),
+            source="tests/data/small-vehicles1.jpeg",
+            slice_height=256,
+            slice_width=256,
+            batch_size=4,
+            novisual=True,
+            export_pickle=True,
+            project=project_dir,
+            name="exp",
+            verbose=0,
+            return_dict=True,
+            export_profile=True,
+        )
+        # 15 slices in 4 batches and the standard prediction
+        self.assertEqual(result["profile"]["infer"]["count"], 5)
+        self.assertEqual(result["profile"]["shift"]["count"], 15)
+        for stage in ["decode", "slice", "convert", "merge", "export"]:
+            self.assertIn(stage, result["profile"])
+
+        with open(os.path.join(result["export_dir"], "profile_trace.json")) as json_file:
+            trace = json.load(json_file)
+        self.assertIn("export", {event["name"] for event in trace["traceEvents"]})
+        with open(os.path.join(result["export_dir"], "profile_summary.json")) as json_file:
+            self.assertEqual(json.load(json_file)["infer"]["count"], 5)
+        shutil.rmtree(project_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+# OBSS SAHI Tool
+# Code written by Fatih C Akyon, 2020.
+
+import unittest
+
+import numpy as np
+
+from sahi.utils.rle import (
+    get_bool_mask_from_rle_counts,
+    get_rle_column_runs,
+    get_rle_counts_from_bool_mask,
+    get_rle_counts_from_column_runs,
+    get_rle_counts_from_string,
+)
+
+
+class TestRleUtils(unittest.TestCase):
+    def test_rle_counts(self):
+        bool_mask = np.array([[0, 1, 1], [1, 1, 0]], dtype=bool)
+        # column by column, starting with a background run
+        counts = get_rle_counts_from_bool_mask(bool_mask)
+        self.assertEqual(counts.tolist(), [1, 4, 1])
+        np.testing.assert_array_equal(get_bool_mask_from_rle_counts(counts, 2, 3), bool_mask)
+        self.assertEqual(get_rle_counts_from_bool_mask(np.ones((2, 2))).tolist(), [0, 4])
+
+        # compressed counts strings, as encoded by pycocotools
+        for counts_string, counts in [
+            (b"13", [1, 3]),
+            (b"04", [0, 4]),
+            (b"PeQ35Pfak22", [100000, 5, 3000000, 7]),
+            (b"312W1OiN", [3, 1, 2, 40, 1, 1]),
+        ]:
+            self.assertEqual(get_rle_counts_from_string(counts_string).tolist(), counts)
+            self.assertEqual(get_rle_counts_from_string(counts_string.decode()).tolist(), counts)
+
+    def test_rle_column_runs(self):
+        rng = np.random.default_rng(0)
+        for _ in range(20):
+            bool_masks = rng.random((2, 13, 17)) < 0.3
+            column_runs = [
+                get_rle_column_runs(get_rle_counts_from_bool_mask(bool_mask), 13) for bool_mask in bool_masks
+            ]
+            for runs in column_runs:
+                self.assertTrue(np.all(runs[2] <= 13))
+            # union of the masks
+            counts = get_rle_counts_from_column_runs(*map(np.concatenate, zip(*column_runs)), height=13, width=17)
+            np.testing.assert_array_equal(get_bool_mask_from_rle_counts(counts, 13, 17), bool_masks[0] | bool_masks[1])
+            self.assertEqual(counts.tolist(), get_rle_counts_from_bool_mask(bool_masks[0] | bool_masks[1]).tolist())
+        self.assertEqual(get_rle_counts_from_column_runs([], [], [], height=2, width=3).tolist(), [6])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -117,6 +117,32 @@ class TestShapelyUtils(unittest.TestCase):
             MultiPolygon([shapely_polygon]),
         )
 
+    def test_lazy_geometry(self):
+        from unittest import mock
+
+        from sahi.utils.coco import CocoAnnotation
+
+        # bbox and area of bboxes are calculated without creating the geometry
+        with mock.patch("sahi.utils.shapely.get_shapely_box") as get_shapely_box_mock:
+            shapely_annotation = ShapelyAnnotation.from_coco_bbox([5, 10, 20, -4], slice_bbox=[2, 3, 50, 50])
+            self.assertEqual(shapely_annotation.area, 80)
+            self.assertEqual(shapely_annotation.to_coco_bbox(), [3, 3, 20, 4])
+            self.assertEqual(shapely_annotation.to_voc_bbox(), [3, 3, 23, 7])
+            coco_annotation = CocoAnnotation(bbox=[1.2, 1, 10, 5.5], category_id=0, category_name="car")
+            self.assertEqual(coco_annotation.bbox, [1, 1, 10, 6])
+            self.assertEqual(coco_annotation.area, 60)
+            self.assertEqual(coco_annotation.segmentation, [])
+            get_shapely_box_mock.assert_not_called()
+        self.assertEqual(ShapelyAnnotation.from_coco_bbox([5, 10, 20, 0]).to_coco_bbox(), [])
+
+        # polygons are created when they are used
+        with mock.patch("sahi.utils.shapely.get_shapely_multipolygon", wraps=get_shapely_multipolygon) as mocked:
+            coco_annotation = CocoAnnotation(segmentation=[[1, 1, 325, 125, 250, 200, 5, 200]])
+            mocked.assert_not_called()
+            self.assertEqual(coco_annotation.area, 41177)
+            self.assertEqual(coco_annotation.bbox, [1, 1, 324, 199])
+            mocked.assert_called_once()
+
     def test_get_intersection(self):
         x, y, width, height = 1, 1, 256, 256
         shapely_box = get_shapely_box(x, y, width, height)
@@ -1,12 +1,14 @@
 # OBSS SAHI Tool
 # Code written by Fatih C Akyon, 2020.
 
+import os
+import tempfile
 import unittest
 
 import numpy as np
 from PIL import Image
 
-from sahi.slicing import slice_coco, slice_image
+from sahi.slicing import iter_slices, slice_coco, slice_image
 from sahi.utils.coco import Coco
 from sahi.utils.cv import read_image
 
@@ -91,6 +93,100 @@ class TestSlicing(unittest.TestCase):
             [17, 186, 48, 152],
         )
 
+    def test_annotation_slice_overlaps(self):
+        from sahi.slicing import (
+            annotation_inside_slice,
+            get_annotation_slice_overlaps,
+            get_slice_bboxes,
+            process_coco_annotations,
+        )
+
+        coco = Coco.from_coco_dict_or_path("tests/data/coco_utils/terrain1_coco.json")
+        coco_annotation_list = coco.images[0].annotations
+        slice_bboxes = get_slice_bboxes(
+            image_height=coco.images[0].height,
+            image_width=coco.images[0].width,
+            slice_height=256,
+            slice_width=256,
+            overlap_height_ratio=0.1,
+            overlap_width_ratio=0.2,
+        )
+        # touching boxes do not overlap
+        annotation_bboxes = [coco_annotation.bbox for coco_annotation in coco_annotation_list] + [[256, 0, 10, 10]]
+        overlaps = get_annotation_slice_overlaps(annotation_bboxes, slice_bboxes)
+        self.assertEqual(overlaps.shape, (len(annotation_bboxes), len(slice_bboxes)))
+        for annotation_ind, bbox in enumerate(annotation_bboxes):
+            for slice_ind, slice_bbox in enumerate(slice_bboxes):
+                self.assertEqual(
+                    overlaps[annotation_ind, slice_ind], annotation_inside_slice({"bbox": bbox}, slice_bbox)
+                )
+        self.assertFalse(overlaps[-1, 0])
+
+        sliced_coco_annotation_list = process_coco_annotations(coco_annotation_list, [0, 0, 512, 512], 0.1)
+        self.assertEqual(
+            [coco_annotation.json for coco_annotation in sliced_coco_annotation_list],
+            [
+                coco_annotation.get_sliced_coco_annotation([0, 0, 512, 512]).json
+                for coco_annotation in coco_annotation_list
+                if annotation_inside_slice(coco_annotation.json, [0, 0, 512, 512])
+            ],
+        )
+
+    def test_get_slice_plan(self):
+        from sahi.slicing import get_slice_bboxes, get_slice_plan
+
+        slice_kwargs = dict(slice_height=256, slice_width=256, overlap_height_ratio=0.1, overlap_width_ratio=0.2)
+        slice_plan = get_slice_plan(image_height=580, image_width=1068, **slice_kwargs)
+        self.assertEqual(slice_plan.slice_bboxes, get_slice_bboxes(image_height=580, image_width=1068, **slice_kwargs))
+        self.assertEqual(slice_plan.full_shape, [580, 1068])
+        self.assertEqual(slice_plan.shift_amounts[1], [205, 0])
+        self.assertEqual(len(slice_plan), 15)
+
+        # plans are cached by image size and slicing parameters
+        self.assertIs(get_slice_plan(image_height=580, image_width=1068, **slice_kwargs), slice_plan)
+        self.assertIsNot(get_slice_plan(image_height=581, image_width=1068, **slice_kwargs), slice_plan)
+
+    def test_iter_slices(self):
+        image_path = "tests/data/small-vehicles1.jpeg"
+        slice_kwargs = dict(slice_height=256, slice_width=256, overlap_height_ratio=0.1, overlap_width_ratio=0.2)
+        slice_image_result = slice_image(image=image_path, **slice_kwargs)
+
+        sliced_images = iter_slices(image=image_path, **slice_kwargs)
+        self.assertFalse(isinstance(sliced_images, list))
+        sliced_images = list(sliced_images)
+        self.assertEqual(len(sliced_images), len(slice_image_result))
+        for sliced_image, expected_sliced_image in zip(sliced_images, slice_image_result.sliced_image_list):
+            self.assertEqual(sliced_image.starting_pixel, expected_sliced_image.starting_pixel)
+            np.testing.assert_array_equal(sliced_image.image, expected_sliced_image.image)
+        self.assertEqual(sliced_images[1].coco_image.file_name, "205_0_461_256")
+
+        # memory mapped and tiled images are read window by window
+        image = read_image(image_path)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            npy_path = os.path.join(tmp_dir, "image.npy")
+            np.save(npy_path, image[:, :, 0])
+            sliced_images = list(iter_slices(image=npy_path, **slice_kwargs))
+            self.assertEqual(sliced_images[3].image.shape, (256, 256, 3))
+            np.testing.assert_array_equal(sliced_images[3].image[:, :, 2], slice_image_result.images[3][:, :, 0])
+
+            try:
+                import tifffile
+            except ImportError:
+                return
+            tiff_path = os.path.join(tmp_dir, "image.tif")
+            tifffile.imwrite(tiff_path, image, tile=(128, 128), compression="zlib")
+            for sliced_image, expected_image in zip(
+                iter_slices(image=tiff_path, **slice_kwargs), slice_image_result.images
+            ):
+                np.testing.assert_array_equal(sliced_image.image, expected_image)
+
+            # 16-bit images are converted to uint8 rgb as PIL converts them
+            tiff_path = os.path.join(tmp_dir, "image16.tif")
+            tifffile.imwrite(tiff_path, image.astype(np.uint16) * 257, tile=(128, 128), compression="zlib")
+            slice_image_result = slice_image(image=tiff_path, output_dir=tmp_dir, **slice_kwargs)
+            self.assertEqual(slice_image_result.images[3].dtype, np.uint8)
+            np.testing.assert_array_equal(slice_image_result.images[3][:100], read_image(tiff_path)[:100, 615:871])
+
     def test_slice_coco(self):
         import shutil
 
@@ -164,6 +260,45 @@ class TestSlicing(unittest.TestCase):
 
         shutil.rmtree(output_dir, ignore_errors=True)
 
+    def test_slice_coco_num_workers(self):
+        from sahi.utils.file import load_json, save_json
+
+        coco_dict = load_json("tests/data/coco_utils/terrain_all_coco.json")
+        # terrain3.png is not in the test data
+        coco_dict["images"] = [image for image in coco_dict["images"] if image["id"] != 1]
+        coco_dict["annotations"] = [
+            annotation for annotation in coco_dict["annotations"] if annotation["image_id"] != 1
+        ]
+        slice_kwargs = dict(
+            image_dir="tests/data/coco_utils/",
+            output_coco_annotation_file_name="test_out",
+            slice_height=512,
+            slice_width=512,
+            overlap_height_ratio=0.1,
+            overlap_width_ratio=0.4,
+            min_area_ratio=0.1,
+            out_ext=".png",
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            coco_path = os.path.join(tmp_dir, "coco.json")
+            save_json(coco_dict, coco_path)
+
+            serial_coco_dict, _ = slice_coco(coco_path, output_dir=os.path.join(tmp_dir, "serial"), **slice_kwargs)
+            parallel_coco_dict, _ = slice_coco(
+                coco_path, output_dir=os.path.join(tmp_dir, "parallel"), num_workers=2, **slice_kwargs
+            )
+            self.assertEqual(len(serial_coco_dict["images"]), 24)
+            self.assertEqual(parallel_coco_dict, serial_coco_dict)
+            self.assertEqual(
+                sorted(os.listdir(os.path.join(tmp_dir, "parallel"))),
+                sorted(os.listdir(os.path.join(tmp_dir, "serial"))),
+            )
+
+            # export errors are raised
+            slice_kwargs["out_ext"] = ".unknown"
+            with self.assertRaises(ValueError):
+                slice_coco(coco_path, output_dir=os.path.join(tmp_dir, "error"), num_workers=2, **slice_kwargs)
+
 
 if __name__ == "__main__":
     unittest.main()